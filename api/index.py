@@ -4,4 +4,8 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
+from backend import jobs
 from backend.app import app
+
+# Resume jobs persisted before a restart (no-op when JOBS_WORKER=0)
+jobs.worker.ensure_started()
@@ -1,19 +1,21 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import os
 import re
-import smtplib
-import threading
 import random
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import time
 from pathlib import Path
 import requests
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait, TimeoutError as FuturesTimeout
 from dotenv import load_dotenv
 from groq import Groq
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from backend import http_cache, json_provider, metrics, projection
+from backend import jikan, shared_store, tmdb, upstream, workers
+from backend import autocomplete_index, rec_store, similarity_index
+from backend import chat as chat_service, comment_store, jobs, outbox
+
 ROOT = Path(__file__).resolve().parents[1]
 ENV_PATH = ROOT / ".env"
 load_dotenv(dotenv_path=ENV_PATH)
@@ -27,13 +29,16 @@ app = Flask(
 
 # Reject request bodies larger than 512 KB
 app.config["MAX_CONTENT_LENGTH"] = 512 * 1024
+json_provider.install(app)
 
-# Rate limiter — in-memory per process (adequate for single-instance / Vercel)
+# Rate limiter — counters live in the shared store when REDIS_URL is set so every
+# instance enforces the same limits; falls back to per-process memory if it is down
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["300 per hour"],
-    storage_uri="memory://",
+    storage_uri=shared_store.limiter_storage_uri(),
+    in_memory_fallback_enabled=True,
 )
 
 _UUID_RE = re.compile(
@@ -42,8 +47,7 @@ _UUID_RE = re.compile(
 _EMAIL_RE = re.compile(r"^[^@\s]{1,64}@[^@\s]{1,255}\.[^@\s]{1,63}$")
 
 TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-REQUEST_TIMEOUT = 10
+REQUEST_TIMEOUT = upstream.client.timeout  # (connect, read) — see backend/upstream.py
 # Public anon key — safe to hardcode (already in JS frontend)
 SUPABASE_URL  = os.getenv("SUPABASE_URL",  "https://lqlqurgthkdknxwwgygx.supabase.co")
 SUPABASE_ANON = os.getenv("SUPABASE_ANON_KEY",
@@ -53,6 +57,21 @@ SUPABASE_ANON = os.getenv("SUPABASE_ANON_KEY",
 )
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 SUPPORTED_COMMENT_MEDIA_TYPES = {"movie", "tv", "anime"}
+# How many ranked recommendations are materialized per user for paging
+RECS_MATERIALIZED_DEPTH = 100
+RECS_PAGE_SIZE = 20
+RECS_MAX_PAGE = -(-RECS_MATERIALIZED_DEPTH // RECS_PAGE_SIZE)
+# Per-source deadlines (seconds) for /api/search; a late source is reported as timed out
+SEARCH_DEADLINES = {
+    "movie": float(os.getenv("SEARCH_TMDB_DEADLINE", "4")),
+    "tv":    float(os.getenv("SEARCH_TMDB_DEADLINE", "4")),
+    "anime": float(os.getenv("SEARCH_JIKAN_DEADLINE", "6")),
+}
+# Serve untransformed TMDB bodies byte-for-byte instead of decode + jsonify
+PROXY_PASSTHROUGH = os.getenv("PROXY_PASSTHROUGH", "1") != "0"
+# /api/batch: distinct items per call, and lookups in flight at once per call
+BATCH_MAX_ITEMS = 100
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
 
 # Initialize Groq client
 if GROQ_API_KEY:
@@ -69,6 +88,17 @@ _TMDB_ROUTE_PREFIXES = (
     "/api/search", "/api/recommendations",
 )
 
+@app.before_request
+def start_request_timings():
+    metrics.begin_request()
+    upstream.set_deadline(upstream.REQUEST_BUDGET)
+
+
+@app.teardown_request
+def clear_upstream_deadline(_exc):
+    upstream.set_deadline(None)
+
+
 @app.before_request
 def guard_tmdb_key():
     if not TMDB_API_KEY and request.path.startswith(_TMDB_ROUTE_PREFIXES):
@@ -84,6 +114,23 @@ def add_security_headers(response):
     return response
 
 
+@app.after_request
+def apply_http_caching(response):
+    # Personalised recommendation lists must not be shared through the CDN
+    private = request.endpoint == "get_recommendations" and bool(request.args.get("user_id"))
+    return http_cache.apply(response, request, request.endpoint, private=private)
+
+
+@app.after_request
+def add_server_timing(response):
+    timings = metrics.current()
+    if timings is not None:
+        response.headers["Server-Timing"] = timings.server_timing()
+        metrics.registry.observe_route(request.endpoint or "unknown", time.perf_counter() - timings.started)
+        metrics.end_request()
+    return response
+
+
 @app.errorhandler(413)
 def too_large(_):
     return jsonify({"error": "Request body too large (max 512 KB)."}), 413
@@ -93,6 +140,19 @@ def too_large(_):
 def rate_limited(_):
     return jsonify({"error": "Too many requests. Please slow down."}), 429
 
+
+@app.errorhandler(projection.InvalidFields)
+def invalid_fields(exc):
+    return jsonify({"error": str(exc)}), 400
+
+
+@app.errorhandler(workers.Saturated)
+def workers_saturated(exc):
+    app.logger.warning("Rejected request: %s", exc)
+    response = jsonify({"error": "Server is busy. Please retry shortly."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
 MOVIE_ENDPOINTS = {
     "trending": "/trending/movie/week",
     "popular": "/movie/popular",
@@ -109,27 +169,136 @@ TV_ENDPOINTS = {
     "airing_today": "/tv/airing_today",
 }
 
-# Jikan API (MyAnimeList) for anime
-JIKAN_BASE_URL = "https://api.jikan.moe/v4"
 
 
 def tmdb_get(path: str, **params):
     if not TMDB_API_KEY:
         return None, "Missing TMDB_API_KEY."
 
-    params["api_key"] = TMDB_API_KEY
-    url = f"{TMDB_BASE_URL}{path}"
+    try:
+        return tmdb.fetch(path, TMDB_API_KEY, timeout=REQUEST_TIMEOUT, **params), None
+    except requests.exceptions.Timeout:
+        return None, "Request timed out."
+    except requests.exceptions.RequestException:
+        return None, "Upstream service unavailable."
+
+
+def tmdb_raw(path: str, **params):
+    """``tmdb_get`` for pass-through routes: (JSON bytes, error)."""
+    if not TMDB_API_KEY:
+        return None, "Missing TMDB_API_KEY."
 
     try:
-        response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        return response.json(), None
+        return tmdb.fetch_raw(path, TMDB_API_KEY, timeout=REQUEST_TIMEOUT, **params), None
     except requests.exceptions.Timeout:
         return None, "Request timed out."
     except requests.exceptions.RequestException:
         return None, "Upstream service unavailable."
 
 
+def _passthrough(path: str, **params):
+    """Relay a TMDB object unchanged; the body is never decoded when ``PROXY_PASSTHROUGH`` is on."""
+    if not PROXY_PASSTHROUGH:
+        data, err = tmdb_get(path, **params)
+        if err:
+            return jsonify({"error": err}), 502
+        return jsonify(data or {})
+    body, err = tmdb_raw(path, **params)
+    if err:
+        return jsonify({"error": err}), 502
+    return Response(body, mimetype="application/json")
+
+
+# ── Shared response shaping (used by single-section and /full routes) ─────────
+
+def _cards(items: list, kind: str | None = None) -> list:
+    """Apply the request's ``?fields=`` projection (default: card profile) to a list."""
+    return projection.apply(items, projection.parse(request.args.get("fields")), kind)
+
+
+def _trailer_key(videos: dict):
+    results = (videos or {}).get("results", [])
+    trailer = next((v for v in results if v.get("type") == "Trailer" and v.get("site") == "YouTube"), None)
+    return trailer.get("key") if trailer else None
+
+
+def _trim_cast(credits: dict) -> list:
+    return [
+        {"id": m.get("id"), "name": m.get("name"), "character": m.get("character"),
+         "profile_path": m.get("profile_path"), "popularity": round(m.get("popularity", 0), 1)}
+        for m in (credits or {}).get("cast", [])[:8]
+    ]
+
+
+def _trim_reviews(reviews: dict) -> list:
+    return [
+        {
+            "author": r.get("author"),
+            "content": r.get("content", "")[:800],
+            "rating": r.get("author_details", {}).get("rating"),
+            "created_at": r.get("created_at", "")[:10],
+        }
+        for r in (reviews or {}).get("results", [])[:5]
+    ]
+
+
+# section name → TMDB append_to_response key
+_DETAIL_APPENDS = {
+    "credits": "credits",
+    "trailer": "videos",
+    "providers": "watch/providers",
+    "reviews": "reviews",
+}
+DETAIL_SECTIONS = ("details", *_DETAIL_APPENDS, "comments")
+
+
+def _full_detail(media_type: str, media_id: int):
+    """
+    Everything a detail page needs in one response: one TMDB call with
+    append_to_response for the TMDB sections, comments fetched alongside.
+    ``?include=`` picks sections (default: all).
+    """
+    include_arg = request.args.get("include", "").strip()
+    include = [s.strip() for s in include_arg.split(",") if s.strip()] if include_arg else list(DETAIL_SECTIONS)
+    unknown = [s for s in include if s not in DETAIL_SECTIONS]
+    if unknown:
+        return jsonify({"error": f"Unknown section(s): {', '.join(unknown)}"}), 400
+
+    comments_future = None
+    if "comments" in include:
+        comments_future = workers.submit("detail", _fetch_comments, media_type, media_id)
+
+    appends = [_DETAIL_APPENDS[s] for s in include if s in _DETAIL_APPENDS]
+    params = {"append_to_response": ",".join(appends)} if appends else {}
+    data, err = tmdb_get(f"/{media_type}/{media_id}", **params)
+    if err:
+        return jsonify({"error": err}), 502
+    data = data or {}
+
+    out = {}
+    if "details" in include:
+        out["details"] = {k: v for k, v in data.items() if k not in _DETAIL_APPENDS.values()}
+    if "credits" in include:
+        out["credits"] = {"cast": _trim_cast(data.get("credits"))}
+    if "trailer" in include:
+        out["trailer"] = {"key": _trailer_key(data.get("videos"))}
+    if "providers" in include:
+        out["providers"] = (data.get("watch/providers") or {}).get("results", {})
+    if "reviews" in include:
+        out["reviews"] = {"results": _trim_reviews(data.get("reviews"))}
+    if comments_future is not None:
+        try:
+            out["comments"] = {"results": comments_future.result()}
+        except Exception:
+            out["comments"] = {"results": [], "error": "Could not load comments."}
+    response = jsonify(out)
+    if comments_future is not None:
+        # The thread changes with every post (written through in comment_store);
+        # a CDN copy would hide a new comment from its author.  ETag revalidation still applies.
+        response.headers["Cache-Control"] = http_cache.cache_control(None)
+    return response
+
+
 @app.route("/")
 def home():
     return render_template("home.html")
@@ -162,7 +331,7 @@ def get_movies():
         )
         if err:
             return jsonify({"movies": [], "error": err}), 502
-        return jsonify({"movies": (data or {}).get("results", [])})
+        return jsonify({"movies": _cards((data or {}).get("results", []), "movie")})
 
     if category == "search":
         query = request.args.get("query", "")
@@ -185,7 +354,7 @@ def get_movies():
             movie for movie in results 
             if movie.get("vote_count", 0) > 50 or movie.get("popularity", 0) > 5
         ]
-        return jsonify({"movies": filtered_movies})
+        return jsonify({"movies": _cards(filtered_movies, "movie")})
             
         
     if category == "discover":
@@ -200,7 +369,7 @@ def get_movies():
         if err:
             return jsonify({"movies": [], "error": err}), 502
 
-        return jsonify({"movies": (data or {}).get("results", [])})
+        return jsonify({"movies": _cards((data or {}).get("results", []), "movie")})
 
     if category in MOVIE_ENDPOINTS:
         data, err = tmdb_get(MOVIE_ENDPOINTS[category], page=page)
@@ -208,19 +377,19 @@ def get_movies():
         if err:
             return jsonify({"movies": [], "error": err}), 502
 
-        return jsonify({"movies": (data or {}).get("results", [])})
+        return jsonify({"movies": _cards((data or {}).get("results", []), "movie")})
 
     return jsonify({"movies": [], "error": "Unknown category."}), 400
 
 
 @app.route("/api/movie/<int:movie_id>")
 def get_movie_details(movie_id):
-    data, err = tmdb_get(f"/movie/{movie_id}")
+    return _passthrough(f"/movie/{movie_id}")
 
-    if err:
-        return jsonify({"error": err}), 502
 
-    return jsonify(data or {})
+@app.route("/api/movie/<int:movie_id>/full")
+def get_movie_full(movie_id):
+    return _full_detail("movie", movie_id)
 
 
 @app.route("/api/movie/<int:movie_id>/trailer")
@@ -230,66 +399,51 @@ def get_movie_trailer(movie_id):
     if err:
         return jsonify({"error": err}), 502
 
-    # Find YouTube trailer
-    videos = (data or {}).get("results", [])
-    trailer = next((v for v in videos if v.get("type") == "Trailer" and v.get("site") == "YouTube"), None)
-    
-    if trailer:
-        return jsonify({"key": trailer.get("key")})
-    
-    return jsonify({"key": None})
+    return jsonify({"key": _trailer_key(data)})
 
 
 @app.route("/api/chat", methods=["POST"])
-@limiter.limit("20 per hour")
+# Cached answers cost no LLM quota, so they do not count against the hourly limit
+@limiter.limit("20 per hour", deduct_when=lambda response: response.headers.get("X-Chat-Cache") != "hit")
 def chat():
     if not groq_client:
         return jsonify({"error": "Chatbot service not available. GROQ_API_KEY not configured."}), 503
 
-    try:
-        data = request.get_json(silent=True) or {}
-        if not isinstance(data, dict):
-            return jsonify({"error": "Invalid JSON body."}), 400
-        movie_title    = str(data.get("movie_title", ""))[:200]
-        movie_overview = str(data.get("movie_overview", ""))[:1000]
-        user_message   = str(data.get("message", "")).strip()
-
-        if not user_message:
-            return jsonify({"error": "No message provided."}), 400
-        if len(user_message) > 500:
-            return jsonify({"error": "Message too long (max 500 characters)."}), 400
-        
-        # Create context-aware prompt
-        system_prompt = f"""You are a friendly movie discussion assistant. You're currently discussing the movie '{movie_title}'. 
-        
-Movie Overview: {movie_overview}
-        
-Help users by:
-- Answering questions about the movie
-- Discussing themes, characters, and plot points
-- Providing insights and analysis
-- Recommending similar movies
-- Being conversational and engaging
-
-Keep responses concise (2-3 paragraphs max) and friendly."""
-        
-        # Call Groq API
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        response_text = chat_completion.choices[0].message.content
-        
-        return jsonify({"response": response_text})
-        
-    except Exception:
-        return jsonify({"error": "Chat service unavailable. Please try again later."}), 500
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid JSON body."}), 400
+    movie_title    = str(data.get("movie_title", ""))[:200]
+    movie_overview = str(data.get("movie_overview", ""))[:1000]
+    user_message   = str(data.get("message", "")).strip()
+
+    if not user_message:
+        return jsonify({"error": "No message provided."}), 400
+    if len(user_message) > 500:
+        return jsonify({"error": "Message too long (max 500 characters)."}), 400
+
+    # Create context-aware prompt
+    messages = chat_service.messages(movie_title, movie_overview, user_message)
+    key = chat_service.answer_key(movie_title, movie_overview, user_message)
+    cached = chat_service.cached_answer(key)
+
+    # ?stream=1 or Accept: text/event-stream relays tokens as they are generated
+    if request.args.get("stream") == "1" or "text/event-stream" in request.headers.get("Accept", ""):
+        if cached is not None:
+            events = chat_service.replay_events(cached)
+        else:
+            events = chat_service.stream_events(groq_client, messages, key=key)
+        response = Response(stream_with_context(events), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["X-Accel-Buffering"] = "no"
+    elif cached is not None:
+        response = jsonify({"response": cached})
+    else:
+        try:
+            response = jsonify({"response": chat_service.complete(groq_client, messages, key=key)})
+        except Exception:
+            return jsonify({"error": "Chat service unavailable. Please try again later."}), 500
+    response.headers["X-Chat-Cache"] = "hit" if cached is not None else "miss"
+    return response
 
 
 @app.route("/health")
@@ -298,6 +452,55 @@ def health():
     return jsonify({"status": "ok"})
 
 
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_upstream_pool", upstream.stats(), "Upstream connection pool", label="host"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_upstream_coalescing", upstream.coalescing_stats(), "Coalesced upstream GETs"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_upstream_breaker", upstream.breaker_stats(), "Upstream circuit breakers", label="host"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_upstream_hedging", upstream.hedge_stats(), "Hedged upstream GETs"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_tmdb_cache", tmdb.cache_stats(), "TMDB response cache"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_jikan_cache", jikan.cache_stats(), "Jikan response cache"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_shared_cache",
+    {name: c.second.stats() for name, c in (("tmdb", tmdb.cache), ("jikan", jikan.cache))
+     if isinstance(c.second, shared_store.RedisStore)},
+    "Shared (Redis-protocol) cache tier", label="cache"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_jikan_scheduler", jikan.scheduler_stats(), "Jikan token-bucket scheduler"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_similarity_index", similarity_index.index.stats(), "Local similarity index"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_autocomplete_index", autocomplete_index.index.stats(), "Local autocomplete prefix index"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_worker_pool", workers.pool_stats(), "Shared upstream worker pool"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_jobs", jobs.stats(), "Background job queue"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_comments_cache", comment_store.cache.stats(), "Comment thread read cache"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_chat_cache", chat_service.cache_stats(), "Chat answer cache"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_chat_stream", chat_service.stats(), "Streamed chat completions"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_outbox", outbox.stats(), "Email outbox SMTP sender"))
+metrics.register_collector(lambda: metrics.families_from_stats(
+    "watchnext_worker_route", workers.stats(), "Upstream worker pool usage by route", label="route"))
+
+
+@app.route("/metrics")
+@app.route("/api/metrics")
+@limiter.exempt
+def prometheus_metrics():
+    token = os.getenv("METRICS_TOKEN")
+    if token and request.headers.get("Authorization", "") != f"Bearer {token}":
+        return jsonify({"error": "Unauthorized."}), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 # TV Shows routes
 @app.route("/tv/<int:tv_id>")
 def tv_detail(tv_id):
@@ -319,7 +522,7 @@ def get_tv_shows():
         )
         if err:
             return jsonify({"shows": [], "error": err}), 502
-        return jsonify({"shows": (data or {}).get("results", [])})
+        return jsonify({"shows": _cards((data or {}).get("results", []), "tv")})
 
     if category == "search":
         query = request.args.get("query", "")
@@ -334,57 +537,44 @@ def get_tv_shows():
         )
         if err:
             return jsonify({"shows": [], "error": err}), 502
-        return jsonify({"shows": (data or {}).get("results", [])})
+        return jsonify({"shows": _cards((data or {}).get("results", []), "tv")})
     
     if category in TV_ENDPOINTS:
         data, err = tmdb_get(TV_ENDPOINTS[category], page=page)
         if err:
             return jsonify({"shows": [], "error": err}), 502
-        return jsonify({"shows": (data or {}).get("results", [])})
+        return jsonify({"shows": _cards((data or {}).get("results", []), "tv")})
     
     return jsonify({"shows": [], "error": "Unknown category."}), 400
 
 @app.route("/api/tv/<int:tv_id>")
 def get_tv_details(tv_id):
-    data, err = tmdb_get(f"/tv/{tv_id}")
-    if err:
-        return jsonify({"error": err}), 502
-    return jsonify(data or {})
+    return _passthrough(f"/tv/{tv_id}")
+
+@app.route("/api/tv/<int:tv_id>/full")
+def get_tv_full(tv_id):
+    return _full_detail("tv", tv_id)
 
 @app.route("/api/tv/<int:tv_id>/trailer")
 def get_tv_trailer(tv_id):
     data, err = tmdb_get(f"/tv/{tv_id}/videos")
     if err:
         return jsonify({"error": err}), 502
-    videos = (data or {}).get("results", [])
-    trailer = next((v for v in videos if v.get("type") == "Trailer" and v.get("site") == "YouTube"), None)
-    if trailer:
-        return jsonify({"key": trailer.get("key")})
-    return jsonify({"key": None})
+    return jsonify({"key": _trailer_key(data)})
 
 @app.route("/api/movie/<int:movie_id>/credits")
 def get_movie_credits(movie_id):
     data, err = tmdb_get(f"/movie/{movie_id}/credits")
     if err:
         return jsonify({"error": err}), 502
-    cast = [
-        {"id": m.get("id"), "name": m.get("name"), "character": m.get("character"),
-         "profile_path": m.get("profile_path"), "popularity": round(m.get("popularity", 0), 1)}
-        for m in (data or {}).get("cast", [])[:8]
-    ]
-    return jsonify({"cast": cast})
+    return jsonify({"cast": _trim_cast(data)})
 
 @app.route("/api/tv/<int:tv_id>/credits")
 def get_tv_credits(tv_id):
     data, err = tmdb_get(f"/tv/{tv_id}/credits")
     if err:
         return jsonify({"error": err}), 502
-    cast = [
-        {"id": m.get("id"), "name": m.get("name"), "character": m.get("character"),
-         "profile_path": m.get("profile_path"), "popularity": round(m.get("popularity", 0), 1)}
-        for m in (data or {}).get("cast", [])[:8]
-    ]
-    return jsonify({"cast": cast})
+    return jsonify({"cast": _trim_cast(data)})
 
 # Anime routes
 @app.route("/anime/<int:anime_id>")
@@ -402,24 +592,12 @@ def get_anime():
             if not query:
                 return jsonify({"anime": [], "error": "No query provided."}), 400
             
-            response = requests.get(
-                f"{JIKAN_BASE_URL}/anime",
-                params={"q": query, "page": page},
-                timeout=REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            data = response.json()
-            return jsonify({"anime": data.get("data", [])})
+            data = jikan.fetch("/anime", lane="background", timeout=REQUEST_TIMEOUT, q=query, page=page)
+            return jsonify({"anime": _cards(data.get("data", []), "anime")})
         
         # Default: top anime
-        response = requests.get(
-            f"{JIKAN_BASE_URL}/top/anime",
-            params={"page": page},
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-        data = response.json()
-        return jsonify({"anime": data.get("data", [])})
+        data = jikan.fetch("/top/anime", timeout=REQUEST_TIMEOUT, page=page)
+        return jsonify({"anime": _cards(data.get("data", []), "anime")})
         
     except requests.exceptions.RequestException:
         return jsonify({"anime": [], "error": "Upstream service unavailable."}), 502
@@ -445,29 +623,24 @@ def get_tv_watch_providers(tv_id):
 @app.route("/api/anime/<int:anime_id>")
 def get_anime_details(anime_id):
     try:
-        response = requests.get(
-            f"{JIKAN_BASE_URL}/anime/{anime_id}/full",
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-        return jsonify(response.json().get("data", {}))
+        data = jikan.fetch(f"/anime/{anime_id}/full", timeout=REQUEST_TIMEOUT)
+        return jsonify(data.get("data", {}))
     except requests.exceptions.RequestException:
         return jsonify({"error": "Upstream service unavailable."}), 502
 
+def _trim_anime_recs(data: dict) -> list:
+    return [
+        {"mal_id": i["entry"]["mal_id"], "title": i["entry"]["title"], "images": i["entry"]["images"]}
+        for i in (data or {}).get("data", [])[:12]
+        if i.get("entry")
+    ]
+
+
 @app.route("/api/anime/<int:anime_id>/recommendations")
 def get_anime_recommendations(anime_id):
     try:
-        response = requests.get(
-            f"{JIKAN_BASE_URL}/anime/{anime_id}/recommendations",
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-        recs = [
-            {"mal_id": i["entry"]["mal_id"], "title": i["entry"]["title"], "images": i["entry"]["images"]}
-            for i in response.json().get("data", [])[:12]
-            if i.get("entry")
-        ]
-        return jsonify({"results": recs})
+        data = jikan.fetch(f"/anime/{anime_id}/recommendations", timeout=REQUEST_TIMEOUT)
+        return jsonify({"results": _trim_anime_recs(data)})
     except requests.exceptions.RequestException:
         return jsonify({"results": [], "error": "Upstream service unavailable."}), 502
 
@@ -478,7 +651,7 @@ def get_recommendations():
     media_type = request.args.get("media_type", "movie")
     media_id   = request.args.get("media_id",   type=int)
     user_id    = request.args.get("user_id",    "").strip()
-    page       = max(1, min(request.args.get("page", 1, type=int) or 1, 100))
+    page       = max(1, min(request.args.get("page", 1, type=int) or 1, RECS_MAX_PAGE))
 
     if not media_id and not user_id:
         return jsonify({"results": [], "error": "media_id or user_id required"}), 400
@@ -494,13 +667,26 @@ def get_recommendations():
 
     from backend.recommender import recommend_for_user, recommend_content_based
 
+    per_page = RECS_PAGE_SIZE
+    offset   = (page - 1) * per_page
+    cursor_fingerprint = None
+    cursor   = request.args.get("cursor", "").strip()
+    if cursor:
+        decoded = rec_store.decode_cursor(cursor)
+        if decoded is None:
+            return jsonify({"results": [], "error": "Invalid cursor."}), 400
+        offset, cursor_fingerprint = decoded
+
     supa_url = os.getenv("SUPABASE_URL", "https://lqlqurgthkdknxwwgygx.supabase.co")
     supa_key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_ANON_KEY", "")
 
+    fingerprint = None
     if user_id:
-        # Personalised path: score candidates using user history + ratings
-        results = recommend_for_user(
-            user_id, media_type, TMDB_API_KEY, supa_url, supa_key
+        # Personalised path: ranked list is materialized per (user, media_type)
+        # and rebuilt only when the user's watch history changes
+        results, fingerprint = recommend_for_user(
+            user_id, media_type, TMDB_API_KEY, supa_url, supa_key,
+            limit=RECS_MATERIALIZED_DEPTH, store=rec_store.store, with_fingerprint=True,
         )
         # Fall back to content-based if this user has no history for the media_type
         if not results and media_id:
@@ -509,10 +695,132 @@ def get_recommendations():
         # Anonymous path: enhanced content-based (deduped + quality-sorted)
         results = recommend_content_based(media_type, media_id, TMDB_API_KEY)
 
-    # Pagination shim so existing callers using page= still work
-    per_page = 20
-    start    = (page - 1) * per_page
-    return jsonify({"results": results[start: start + per_page]})
+    if cursor and cursor_fingerprint != fingerprint:
+        # The history changed since this cursor was minted; its offset points into another list
+        return jsonify({"results": [], "error": "Recommendations changed; start again from the first page."}), 409
+
+    end = offset + per_page
+    next_cursor = rec_store.encode_cursor(end, fingerprint) if end < len(results) else None
+    return jsonify({"results": results[offset:end], "next_cursor": next_cursor})
+
+
+# facet → TMDB append_to_response key (movie/tv); "recommendations" is its own lookup
+_BATCH_TMDB_APPENDS = {"credits": "credits", "providers": "watch/providers"}
+BATCH_FACETS = {
+    "movie": ("details", "credits", "providers", "recommendations"),
+    "tv":    ("details", "credits", "providers", "recommendations"),
+    "anime": ("details", "recommendations"),
+}
+
+
+def _batch_tmdb_params(facets: tuple) -> dict:
+    appends = [_BATCH_TMDB_APPENDS[f] for f in facets if f in _BATCH_TMDB_APPENDS]
+    return {"append_to_response": ",".join(appends)} if appends else {}
+
+
+def _batch_tmdb_item(media_type: str, media_id: int, facets: tuple) -> dict:
+    """details/credits/providers for one title in a single TMDB call."""
+    data, err = tmdb_get(f"/{media_type}/{media_id}", **_batch_tmdb_params(facets))
+    if err:
+        return {f: {"error": err} for f in facets}
+    data = data or {}
+    out = {}
+    if "details" in facets:
+        out["details"] = {k: v for k, v in data.items() if k not in _BATCH_TMDB_APPENDS.values()}
+    if "credits" in facets:
+        out["credits"] = {"cast": _trim_cast(data.get("credits"))}
+    if "providers" in facets:
+        out["providers"] = (data.get("watch/providers") or {}).get("results", {})
+    return out
+
+
+def _batch_tmdb_recommendations(media_type: str, media_id: int, facets: tuple) -> dict:
+    from backend.recommender import recommend_content_based
+
+    if not TMDB_API_KEY:
+        return {"recommendations": {"error": "Missing TMDB_API_KEY."}}
+    return {"recommendations": {"results": recommend_content_based(media_type, media_id, TMDB_API_KEY)}}
+
+
+def _batch_anime(media_type: str, anime_id: int, facets: tuple) -> dict:
+    out = {}
+    for facet in facets:
+        path = f"/anime/{anime_id}/full" if facet == "details" else f"/anime/{anime_id}/recommendations"
+        try:
+            data = jikan.fetch(path, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException:
+            out[facet] = {"error": "Upstream service unavailable."}
+            continue
+        out[facet] = data.get("data", {}) if facet == "details" else {"results": _trim_anime_recs(data)}
+    return out
+
+
+def _batch_lookups(items: dict) -> list:
+    """(fn, media_type, id, facets) per upstream lookup, facets grouped so each lookup is one call."""
+    lookups = []
+    for (media_type, media_id), facets in items.items():
+        if media_type == "anime":
+            lookups.append((_batch_anime, media_type, media_id, tuple(sorted(facets))))
+            continue
+        tmdb_facets = tuple(f for f in BATCH_FACETS[media_type] if f in facets and f != "recommendations")
+        if tmdb_facets:
+            lookups.append((_batch_tmdb_item, media_type, media_id, tmdb_facets))
+        if "recommendations" in facets:
+            lookups.append((_batch_tmdb_recommendations, media_type, media_id, ("recommendations",)))
+    return lookups
+
+
+@app.route("/api/batch", methods=["POST"])
+@limiter.limit("30 per minute")
+def batch_lookup():
+    """
+    Resolve many titles in one request.  Body:
+    ``{"items": [{"media_type": "movie", "id": 550, "facets": ["details", "providers"]}, ...]}``.
+    Duplicate items are merged; lookups run ``BATCH_CONCURRENCY`` at a time on
+    the shared worker pool.  Response: ``{"results": {"movie:550": {facet: ...}}}``,
+    where a facet that failed holds ``{"error": ...}``.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+        return jsonify({"error": "Body must be an object with an items list."}), 400
+
+    items: dict[tuple[str, int], set] = {}
+    for raw in data["items"]:
+        if not isinstance(raw, dict):
+            return jsonify({"error": "Each item must be an object."}), 400
+        media_type = raw.get("media_type")
+        media_id = raw.get("id")
+        if media_type not in BATCH_FACETS:
+            return jsonify({"error": "media_type must be movie, tv, or anime"}), 400
+        if not isinstance(media_id, int) or isinstance(media_id, bool) or not 1 <= media_id <= 10_000_000:
+            return jsonify({"error": "Invalid id."}), 400
+        facets = raw.get("facets") or ["details"]
+        if not isinstance(facets, list) or any(f not in BATCH_FACETS[media_type] for f in facets):
+            return jsonify({"error": f"facets for {media_type} must be among: {', '.join(BATCH_FACETS[media_type])}"}), 400
+        items.setdefault((media_type, media_id), set()).update(facets)
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many items (max {BATCH_MAX_ITEMS})."}), 400
+
+    results = {f"{media_type}:{media_id}": {} for media_type, media_id in items}
+    pending_lookups = _batch_lookups(items)
+    # One round trip to the shared cache tier instead of one per title
+    tmdb.warm([(f"/{mt}/{mid}", _batch_tmdb_params(facets))
+               for fn, mt, mid, facets in pending_lookups if fn is _batch_tmdb_item])
+    running: dict = {}
+    while pending_lookups or running:
+        while pending_lookups and len(running) < BATCH_CONCURRENCY:
+            fn, media_type, media_id, facets = pending_lookups.pop()
+            running[workers.submit("batch", fn, media_type, media_id, facets)] = (media_type, media_id, facets)
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            media_type, media_id, facets = running.pop(future)
+            try:
+                found = future.result()
+            except Exception:
+                app.logger.warning("Batch lookup failed for %s:%s", media_type, media_id, exc_info=True)
+                found = {f: {"error": "Lookup failed."} for f in facets}
+            results[f"{media_type}:{media_id}"].update(found)
+    return jsonify({"results": results})
 
 
 @app.route("/api/genres")
@@ -535,37 +843,60 @@ def autocomplete():
     if len(query) > 200:
         return jsonify({"results": [], "error": "Query too long."}), 400
 
+    autocomplete_index.ensure_seeded(TMDB_API_KEY)
+    local = autocomplete_index.index.lookup(query, limit=7)
+    if len(local) >= autocomplete_index.MIN_LOCAL_HITS:
+        autocomplete_index.index.count("local_answers")
+        return jsonify({"results": local, "query": query})
+    autocomplete_index.index.count("fallthroughs")
+
     data, err = tmdb_get("/search/multi", query=query, include_adult="false", page=1)
     if err:
         app.logger.warning("Autocomplete TMDB lookup failed for query %r: %s", query, err)
+        if local:
+            return jsonify({"results": local, "query": query})
         return jsonify({"results": [], "error": err})
 
+    items = (data or {}).get("results", [])[:10]
+    autocomplete_index.index.add_many(items)
+
     results = []
-    for item in (data or {}).get("results", [])[:10]:
-        mt = item.get("media_type")
-        if mt == "person":
-            known = item.get("known_for_department", "")
-            results.append({
-                "id": item.get("id"),
-                "media_type": "person",
-                "title": item.get("name"),
-                "profile_path": item.get("profile_path"),
-                "known_for": known,
-            })
-        elif mt in ("movie", "tv"):
-            results.append({
-                "id": item.get("id"),
-                "media_type": mt,
-                "title": item.get("title") or item.get("name"),
-                "year": (item.get("release_date") or item.get("first_air_date") or "")[:4],
-                "poster_path": item.get("poster_path"),
-            })
+    seen = set()
+    for card in [autocomplete_index.suggestion(item) for item in items] + local:
+        if card is None or (card["media_type"], card["id"]) in seen:
+            continue
+        seen.add((card["media_type"], card["id"]))
+        results.append(card)
         if len(results) >= 7:
             break
 
     return jsonify({"results": results, "query": query})
 
 
+@app.route("/api/autocomplete/click", methods=["POST"])
+@limiter.limit("60 per minute")
+def autocomplete_click():
+    """Boost a suggestion the user picked so it ranks higher next time."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid JSON body."}), 400
+    media_type = data.get("media_type")
+    media_id = data.get("id")
+    if media_type not in ("movie", "tv", "person"):
+        return jsonify({"error": "Invalid media_type."}), 400
+    if not isinstance(media_id, int) or isinstance(media_id, bool) or media_id <= 0:
+        return jsonify({"error": "Invalid id."}), 400
+
+    if not autocomplete_index.index.click(media_type, media_id):
+        # Unknown title: learn it from TMDB (cached) rather than trusting the client
+        item, err = tmdb_get(f"/{media_type}/{media_id}")
+        if err:
+            return jsonify({"ok": False, "error": err}), 502
+        autocomplete_index.index.add(item, media_type)
+        autocomplete_index.index.click(media_type, media_id)
+    return jsonify({"ok": True})
+
+
 @app.route("/api/search")
 @limiter.limit("30 per minute")
 def global_search():
@@ -577,58 +908,116 @@ def global_search():
     if len(query) > 200:
         return jsonify({"results": [], "error": "Query too long."}), 400
 
+    stream = request.args.get("stream") == "1" or "application/x-ndjson" in request.headers.get("Accept", "")
+    fields = projection.parse(request.args.get("fields"))
+
+    sources = list(_SEARCH_SOURCES)
+    submitted = workers.submit_all("search", _run_search_source, [(s, query, page) for s in sources])
+    futures = dict(zip(submitted, sources))
+
+    if stream:
+        lines = (app.json.dumps(event) + "\n" for event in _search_events(futures, fields))
+        response = Response(stream_with_context(lines), mimetype="application/x-ndjson")
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    by_source, timed_out = {}, []
+    for event in _search_events(futures, fields):
+        if event.get("error") == "timeout":
+            timed_out.append(event["source"])
+        elif "source" in event:
+            by_source[event["source"]] = event["results"]
+
     results = []
+    for source in _SEARCH_SOURCES:
+        results.extend(by_source.get(source, []))
+    body = {"results": results}
+    if timed_out:
+        body["timed_out"] = timed_out
+    return jsonify(body)
 
-    def fetch_movies():
-        data, _ = tmdb_get("/search/movie", query=query, page=page, include_adult="false")
-        items = []
-        for m in (data or {}).get("results", []):
-            if m.get("vote_count", 0) > 50 or m.get("popularity", 0) > 5:
-                m["media_type"] = "movie"
-                items.append(m)
-        return items
-
-    def fetch_tv():
-        data, _ = tmdb_get("/search/tv", query=query, page=page, include_adult="false")
-        items = []
-        for s in (data or {}).get("results", []):
-            s["media_type"] = "tv"
-            items.append(s)
-        return items
-
-    def fetch_anime():
-        try:
-            resp = requests.get(
-                f"{JIKAN_BASE_URL}/anime",
-                params={"q": query, "page": page},
-                timeout=REQUEST_TIMEOUT,
-            )
-            resp.raise_for_status()
-            items = []
-            for a in resp.json().get("data", []):
-                a["media_type"] = "anime"
-                items.append(a)
-            return items
-        except Exception:
-            return []
 
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        futures = [executor.submit(fetch_movies), executor.submit(fetch_tv), executor.submit(fetch_anime)]
-        for f in futures:
-            results.extend(f.result())
+def _search_movies(query: str, page: int) -> list:
+    data, err = tmdb_get("/search/movie", query=query, page=page, include_adult="false")
+    if err:
+        raise RuntimeError(err)
+    items = []
+    for m in (data or {}).get("results", []):
+        if m.get("vote_count", 0) > 50 or m.get("popularity", 0) > 5:
+            m["media_type"] = "movie"
+            items.append(m)
+    return items
 
-    return jsonify({"results": results})
+
+def _search_tv(query: str, page: int) -> list:
+    data, err = tmdb_get("/search/tv", query=query, page=page, include_adult="false")
+    if err:
+        raise RuntimeError(err)
+    items = []
+    for s in (data or {}).get("results", []):
+        s["media_type"] = "tv"
+        items.append(s)
+    return items
+
+
+def _search_anime(query: str, page: int) -> list:
+    data = jikan.fetch(
+        "/anime", lane="background", deadline=SEARCH_DEADLINES["anime"],
+        timeout=REQUEST_TIMEOUT, q=query, page=page,
+    )
+    items = []
+    for a in data.get("data", []):
+        a["media_type"] = "anime"
+        items.append(a)
+    return items
+
+
+# Response order for the non-streaming mode
+_SEARCH_SOURCES = {"movie": _search_movies, "tv": _search_tv, "anime": _search_anime}
+
+
+def _run_search_source(source: str, query: str, page: int) -> list:
+    return _SEARCH_SOURCES[source](query, page)
+
+
+def _search_events(futures: dict, fields=None):
+    """
+    Yield one event per source in completion order, results projected with
+    *fields* (see backend/projection.py):
+    ``{"source", "results"}``, ``{"source", "error"}`` or, once a source's
+    deadline passes, ``{"source", "error": "timeout"}``; then ``{"done": true}``.
+    """
+    started = time.monotonic()
+    pending = dict(futures)
+    while pending:
+        now = time.monotonic() - started
+        overdue = [f for f, src in pending.items() if SEARCH_DEADLINES[src] <= now]
+        for f in overdue:
+            f.cancel()
+            yield {"source": pending.pop(f), "results": [], "error": "timeout"}
+        if not pending:
+            break
+        wait = min(SEARCH_DEADLINES[src] for src in pending.values()) - now
+        try:
+            for f in as_completed(list(pending), timeout=max(wait, 0)):
+                source = pending.pop(f)
+                try:
+                    yield {"source": source, "results": projection.apply(f.result(), fields)}
+                except Exception:
+                    app.logger.warning("Search source %s failed", source, exc_info=True)
+                    yield {"source": source, "results": [], "error": "unavailable"}
+                # Re-check deadlines after each completion
+                break
+        except FuturesTimeout:
+            continue
+    yield {"done": True}
 
 
 @app.route('/api/send-welcome-email', methods=['POST'])
 @limiter.limit("5 per 15 minutes")
 def send_welcome_email():
-    smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER')
-    smtp_pass = os.getenv('SMTP_PASS')
-
-    if not smtp_user or not smtp_pass:
+    if not outbox.configured():
         # Email service not configured — skip silently
         return jsonify({'success': True, 'note': 'Email service not configured'})
 
@@ -640,7 +1029,16 @@ def send_welcome_email():
     from datetime import datetime, timezone
     agreed_at = data.get('agreed_at') or datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
 
-    html_body = f"""<!DOCTYPE html>
+    # Sent now over the pooled SMTP connection, so success means the mail went out
+    try:
+        outbox.send_now(to_email, '🎬 Welcome to WatchNextAI!', _welcome_email_html(to_email, agreed_at))
+        return jsonify({'success': True})
+    except Exception:
+        return jsonify({'success': False, 'error': 'Failed to send email. Please try again.'}), 500
+
+
+def _welcome_email_html(to_email, agreed_at):
+    return f"""<!DOCTYPE html>
 <html><head><style>
   body{{margin:0;padding:0;background:#0b0f18;font-family:'Segoe UI',Arial,sans-serif;}}
   .wrap{{max-width:560px;margin:40px auto;background:rgba(255,255,255,0.06);
@@ -685,22 +1083,6 @@ def send_welcome_email():
 </div>
 </body></html>"""
 
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = '🎬 Welcome to WatchNextAI!'
-        msg['From']    = smtp_user
-        msg['To']      = to_email
-        msg.attach(MIMEText(html_body, 'html'))
-
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_user, to_email, msg.as_string())
-
-        return jsonify({'success': True})
-    except Exception:
-        return jsonify({'success': False, 'error': 'Failed to send email. Please try again.'}), 500
-
 
 @app.route('/profile')
 def profile():
@@ -719,18 +1101,11 @@ def privacy():
     return render_template('privacy.html')
 
 
-def _send_checkin_email(to_email, title, media_type, user_name):
-    smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER')
-    smtp_pass = os.getenv('SMTP_PASS')
-    if not smtp_user or not smtp_pass:
-        return
-
+def _checkin_email_html(to_email, title, media_type, user_name):
     greeting = f"Hey {user_name}!" if user_name else "Hey!"
     type_label = {'movie': 'movie', 'tv': 'TV show', 'anime': 'anime'}.get(media_type, 'title')
 
-    html_body = f"""<!DOCTYPE html>
+    return f"""<!DOCTYPE html>
 <html><head><style>
   body{{margin:0;padding:0;background:#0b0f18;font-family:'Segoe UI',Arial,sans-serif;}}
   .wrap{{max-width:520px;margin:40px auto;background:rgba(255,255,255,0.06);
@@ -760,26 +1135,11 @@ def _send_checkin_email(to_email, title, media_type, user_name):
 </div>
 </body></html>"""
 
-    try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f'📺 Still thinking about {title}?'
-        msg['From']    = smtp_user
-        msg['To']      = to_email
-        msg.attach(MIMEText(html_body, 'html'))
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_user, to_email, msg.as_string())
-    except Exception:
-        pass  # best-effort; never surface email errors to users
-
 
 @app.route('/api/schedule-checkin-email', methods=['POST'])
 @limiter.limit("5 per 15 minutes")
 def schedule_checkin_email():
-    smtp_user = os.getenv('SMTP_USER')
-    smtp_pass = os.getenv('SMTP_PASS')
-    if not smtp_user or not smtp_pass:
+    if not outbox.configured():
         return jsonify({'success': True, 'note': 'Email service not configured'})
 
     data = request.get_json(silent=True) or {}
@@ -793,15 +1153,27 @@ def schedule_checkin_email():
     if media_type not in SUPPORTED_COMMENT_MEDIA_TYPES:
         media_type = 'movie'
 
-    # Schedule send 1–5 hours from now (in seconds)
+    # Schedule send 1–5 hours from now (in seconds) through the outbox
     delay_seconds = random.randint(3600, 18000)
-    t = threading.Timer(delay_seconds, _send_checkin_email, args=[to_email, title, media_type, user_name])
-    t.daemon = True
-    t.start()
+    try:
+        outbox.enqueue(to_email, f'📺 Still thinking about {title}?',
+                       _checkin_email_html(to_email, title, media_type, user_name), delay=delay_seconds)
+    except Exception:
+        return jsonify({'success': False, 'error': 'Failed to schedule email. Please try again.'}), 500
 
     return jsonify({'success': True, 'scheduled_in_seconds': delay_seconds})
 
 
+@app.route('/api/jobs/run', methods=['GET', 'POST'])
+@limiter.exempt
+def run_due_jobs():
+    """Cron entry point: drain due jobs where no worker thread survives between requests."""
+    token = os.getenv("CRON_SECRET")
+    if not token or request.headers.get("Authorization", "") != f"Bearer {token}":
+        return jsonify({"error": "Unauthorized."}), 401
+    return jsonify(jobs.run_due())
+
+
 # ── Person / Cast pages ────────────────────────────────────────────────────────
 
 @app.route("/person/<int:person_id>")
@@ -811,10 +1183,7 @@ def person_detail(person_id):
 
 @app.route("/api/person/<int:person_id>")
 def get_person(person_id):
-    data, err = tmdb_get(f"/person/{person_id}")
-    if err:
-        return jsonify({"error": err}), 502
-    return jsonify(data or {})
+    return _passthrough(f"/person/{person_id}")
 
 
 @app.route("/api/person/<int:person_id>/credits")
@@ -854,16 +1223,7 @@ def get_movie_reviews(movie_id):
     data, err = tmdb_get(f"/movie/{movie_id}/reviews", page=1)
     if err:
         return jsonify({"results": []}), 502
-    reviews = [
-        {
-            "author": r.get("author"),
-            "content": r.get("content", "")[:800],
-            "rating": r.get("author_details", {}).get("rating"),
-            "created_at": r.get("created_at", "")[:10],
-        }
-        for r in (data or {}).get("results", [])[:5]
-    ]
-    return jsonify({"results": reviews})
+    return jsonify({"results": _trim_reviews(data)})
 
 
 @app.route("/api/tv/<int:tv_id>/reviews")
@@ -871,16 +1231,7 @@ def get_tv_reviews(tv_id):
     data, err = tmdb_get(f"/tv/{tv_id}/reviews", page=1)
     if err:
         return jsonify({"results": []}), 502
-    reviews = [
-        {
-            "author": r.get("author"),
-            "content": r.get("content", "")[:800],
-            "rating": r.get("author_details", {}).get("rating"),
-            "created_at": r.get("created_at", "")[:10],
-        }
-        for r in (data or {}).get("results", [])[:5]
-    ]
-    return jsonify({"results": reviews})
+    return jsonify({"results": _trim_reviews(data)})
 
 
 # ── Comments ────────────────────────────────────────────────────────────────────
@@ -892,31 +1243,75 @@ def _is_clean(text: str) -> bool:
     return not words.intersection(_PROFANITY)
 
 
+COMMENTS_PAGE_SIZE = 50
+COMMENTS_MAX_PAGE = 100
+
+
+def _query_comments(media_type: str, media_id: int, limit: int, before=None) -> list:
+    # Read directly from Supabase REST (SELECT is allowed for all via RLS)
+    import urllib.parse
+    query = {
+        "media_id":   f"eq.{media_id}",
+        "media_type": f"eq.{media_type}",
+        "order":      "created_at.desc,id.desc",
+        "limit":      str(limit),
+        "select":     ",".join(comment_store.FIELDS),
+    }
+    if before is not None:
+        # Keyset: strictly older than the cursor row, ties on created_at broken by id
+        created_at, row_id = before
+        query["or"] = f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id}))'
+    resp = upstream.get(
+        f"{SUPABASE_URL}/rest/v1/comments?{urllib.parse.urlencode(query)}",
+        headers={"apikey": SUPABASE_ANON, "Authorization": f"Bearer {SUPABASE_ANON}"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _comment_page(media_type: str, media_id: int, limit: int = COMMENTS_PAGE_SIZE, before=None):
+    """
+    One newest-first page of comments and the cursor for the next one (or
+    None).  Served from ``comment_store.cache`` when it covers the page.
+    """
+    cached = comment_store.cache.get(media_type, media_id)
+    if cached is None and before is None:
+        rows = _query_comments(media_type, media_id, comment_store.cache.rows + 1)
+        cached = (rows[:comment_store.cache.rows], len(rows) <= comment_store.cache.rows)
+        comment_store.cache.put(media_type, media_id, *cached)
+
+    page = comment_store.page_of(*cached, limit, before) if cached is not None else None
+    if page is None:
+        rows = _query_comments(media_type, media_id, limit + 1, before)
+        page = (rows[:limit], len(rows) > limit)
+    rows, has_more = page
+    return rows, comment_store.encode_cursor(rows[-1]) if has_more and rows else None
+
+
+def _fetch_comments(media_type: str, media_id: int) -> list:
+    return _comment_page(media_type, media_id)[0]
+
+
 @app.route("/api/comments", methods=["GET"])
 def get_comments():
     media_id   = request.args.get("media_id", type=int)
     media_type = request.args.get("media_type", "movie")
+    limit      = max(1, min(request.args.get("limit", COMMENTS_PAGE_SIZE, type=int) or COMMENTS_PAGE_SIZE,
+                            COMMENTS_MAX_PAGE))
     if not media_id:
         return jsonify({"results": []}), 400
     if media_type not in SUPPORTED_COMMENT_MEDIA_TYPES:
         return jsonify({"results": [], "error": "media_type must be movie, tv, or anime"}), 400
-    # Read directly from Supabase REST (SELECT is allowed for all via RLS)
-    import urllib.parse
-    params = urllib.parse.urlencode({
-        "media_id":   f"eq.{media_id}",
-        "media_type": f"eq.{media_type}",
-        "order":      "created_at.desc",
-        "limit":      "50",
-        "select":     "id,username,content,created_at",
-    })
+    before = None
+    cursor = request.args.get("before", "").strip()
+    if cursor:
+        before = comment_store.decode_cursor(cursor)
+        if before is None:
+            return jsonify({"results": [], "error": "Invalid cursor."}), 400
     try:
-        resp = requests.get(
-            f"{SUPABASE_URL}/rest/v1/comments?{params}",
-            headers={"apikey": SUPABASE_ANON, "Authorization": f"Bearer {SUPABASE_ANON}"},
-            timeout=REQUEST_TIMEOUT,
-        )
-        resp.raise_for_status()
-        return jsonify({"results": resp.json()})
+        rows, next_cursor = _comment_page(media_type, media_id, limit, before)
+        return jsonify({"results": rows, "next_cursor": next_cursor})
     except Exception:
         return jsonify({"results": [], "error": "Could not load comments."}), 502
 
@@ -955,7 +1350,7 @@ def post_comment():
     supa_service = os.getenv("SUPABASE_SERVICE_KEY", "")
     bearer = user_jwt or supa_service or SUPABASE_ANON
     try:
-        resp = requests.post(
+        resp = upstream.post(
             f"{SUPABASE_URL}/rest/v1/comments",
             headers={
                 "apikey": SUPABASE_ANON,
@@ -968,10 +1363,16 @@ def post_comment():
             timeout=REQUEST_TIMEOUT,
         )
         resp.raise_for_status()
-        return jsonify({"success": True, "comment": resp.json()[0] if resp.json() else {}})
+        comment = resp.json()[0] if resp.json() else {}
     except Exception:
         return jsonify({"error": "Could not save comment. Please try again."}), 502
+    if comment.get("id") is not None and comment.get("created_at"):
+        # Write-through: the next read of this thread includes the new comment without a round trip
+        comment_store.cache.add(media_type, media_id, comment)
+    return jsonify({"success": True, "comment": comment})
 
 
 if __name__ == "__main__":
+    # Resume jobs persisted before a restart (no-op when JOBS_WORKER=0)
+    jobs.worker.ensure_started()
     app.run(debug=False)
@@ -0,0 +1,247 @@
+"""
+In-process prefix index for ``/api/autocomplete``.
+
+Titles and person names are normalized (accents stripped, lower-cased,
+punctuation folded to spaces) and stored as a sorted array of
+``(key, item)`` pairs.  Every word start of a title is a key, so "kni"
+finds "The Dark Knight".  A lookup is a bisect to the first key >= the
+query plus a short forward scan, then a rank by popularity (+ clicks).
+
+The index is seeded from TMDB trending / popular / top-rated lists (through
+the shared TMDB cache), learns every result the TMDB fall-through returns,
+and boosts titles users actually click.
+
+Tunables (environment)
+----------------------
+AUTOCOMPLETE_MIN_LOCAL     local hits needed to skip TMDB          (default 5)
+AUTOCOMPLETE_MAX_ITEMS     indexed titles/people before eviction   (default 20000)
+AUTOCOMPLETE_SEED_PAGES    pages per seed list                     (default 3)
+AUTOCOMPLETE_RESEED        seconds between catalog re-seeds        (default 21600)
+"""
+
+import bisect
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from backend import tmdb
+
+MIN_LOCAL_HITS = int(os.getenv("AUTOCOMPLETE_MIN_LOCAL", "5"))
+MAX_ITEMS = int(os.getenv("AUTOCOMPLETE_MAX_ITEMS", "20000"))
+SEED_PAGES = int(os.getenv("AUTOCOMPLETE_SEED_PAGES", "3"))
+RESEED_SECONDS = int(os.getenv("AUTOCOMPLETE_RESEED", str(6 * 3600)))
+
+# Keys scanned per lookup; a two-letter prefix can match thousands of words
+MAX_SCAN = 400
+CLICK_BOOST = 25.0
+# Score multiplier when the query is a prefix of the whole title, not just a later word
+WHOLE_TITLE_BOOST = 2.0
+
+SEED_LISTS = (
+    ("movie", "/trending/movie/week"),
+    ("movie", "/movie/popular"),
+    ("movie", "/movie/top_rated"),
+    ("tv", "/trending/tv/week"),
+    ("tv", "/tv/popular"),
+    ("tv", "/tv/top_rated"),
+    ("person", "/trending/person/week"),
+    ("person", "/person/popular"),
+)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def suggestion(item: dict, media_type: str | None = None):
+    """Shape a TMDB list/search item the way the autocomplete route returns it."""
+    mt = item.get("media_type") or media_type
+    if mt == "person":
+        if not item.get("name"):
+            return None
+        return {
+            "id": item.get("id"),
+            "media_type": "person",
+            "title": item.get("name"),
+            "profile_path": item.get("profile_path"),
+            "known_for": item.get("known_for_department", ""),
+        }
+    if mt in ("movie", "tv"):
+        title = item.get("title") or item.get("name")
+        if not title:
+            return None
+        return {
+            "id": item.get("id"),
+            "media_type": mt,
+            "title": title,
+            "year": (item.get("release_date") or item.get("first_air_date") or "")[:4],
+            "poster_path": item.get("poster_path"),
+        }
+    return None
+
+
+def _word_keys(title: str) -> list[str]:
+    words = normalize(title).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    def __init__(self, max_items: int = MAX_ITEMS):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._keys: list[tuple[str, tuple]] = []       # sorted (key, (media_type, id))
+        self._items: dict[tuple, dict] = {}            # ref -> suggestion
+        self._titles: dict[tuple, str] = {}            # ref -> normalized title
+        self._popularity: dict[tuple, float] = {}
+        self._clicks: dict[tuple, int] = {}
+        # Min-heap of (score, insertion order, ref) for eviction.  Scores only
+        # grow, so a changed score pushes a fresh entry and the old one is
+        # skipped when it surfaces (its score no longer matches).
+        self._heap: list[tuple[float, int, tuple]] = []
+        self._order: dict[tuple, int] = {}
+        self._sequence = itertools.count()
+        self._counters = {"local_answers": 0, "fallthroughs": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item: dict, media_type: str | None = None, popularity: float | None = None) -> bool:
+        card = suggestion(item, media_type)
+        if card is None or not card.get("id"):
+            return False
+        ref = (card["media_type"], int(card["id"]))
+        pop = float(popularity if popularity is not None else item.get("popularity") or 0.0)
+        with self._lock:
+            if ref in self._items:
+                self._items[ref] = card
+                if pop > self._popularity[ref]:
+                    self._popularity[ref] = pop
+                    self._rescore(ref)
+                return True
+            if len(self._items) >= self.max_items:
+                self._evict_one()
+            self._items[ref] = card
+            self._popularity[ref] = pop
+            self._titles[ref] = normalize(card["title"])
+            self._order[ref] = next(self._sequence)
+            self._rescore(ref)
+            for key in _word_keys(card["title"]):
+                bisect.insort(self._keys, (key, ref))
+        return True
+
+    def add_many(self, items, media_type: str | None = None) -> int:
+        return sum(self.add(item, media_type) for item in items or [])
+
+    def _rescore(self, ref):
+        heapq.heappush(self._heap, (self._score(ref), self._order[ref], ref))
+        if len(self._heap) > 2 * len(self._items) + 64:
+            # Drop superseded entries so clicks cannot grow the heap without bound
+            self._heap = [(self._score(r), self._order[r], r) for r in self._items]
+            heapq.heapify(self._heap)
+
+    def _evict_one(self):
+        # Least popular, never-clicked title goes first (oldest on a tie)
+        while True:
+            score, order, ref = heapq.heappop(self._heap)
+            if self._order.get(ref) == order and self._score(ref) == score:
+                break
+        title = self._items.pop(ref)["title"]
+        self._popularity.pop(ref, None)
+        self._clicks.pop(ref, None)
+        self._titles.pop(ref, None)
+        self._order.pop(ref, None)
+        for key in _word_keys(title):
+            i = bisect.bisect_left(self._keys, (key, ref))
+            if i < len(self._keys) and self._keys[i] == (key, ref):
+                del self._keys[i]
+        self._counters["evictions"] += 1
+
+    def _score(self, ref) -> float:
+        return self._popularity.get(ref, 0.0) + CLICK_BOOST * self._clicks.get(ref, 0)
+
+    def click(self, media_type: str, media_id: int) -> bool:
+        """Boost a title a user picked; False if it isn't indexed yet."""
+        ref = (media_type, int(media_id))
+        with self._lock:
+            if ref not in self._items:
+                return False
+            self._clicks[ref] = self._clicks.get(ref, 0) + 1
+            self._rescore(ref)
+        return True
+
+    def lookup(self, query: str, limit: int = 7) -> list[dict]:
+        q = normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (q,))
+            found: dict[tuple, bool] = {}
+            for key, ref in self._keys[start:start + MAX_SCAN]:
+                if not key.startswith(q):
+                    break
+                found[ref] = found.get(ref, False) or key == self._titles[ref]
+            ranked = sorted(
+                found, key=lambda r: -self._score(r) * (WHOLE_TITLE_BOOST if found[r] else 1.0),
+            )
+            return [dict(self._items[r]) for r in ranked[:limit]]
+
+    def count(self, name: str):
+        """Bump a route-level counter (``local_answers``, ``fallthroughs``)."""
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "keys": len(self._keys), **self._counters}
+
+
+index = PrefixIndex()
+
+
+# ── catalog seeding ───────────────────────────────────────────────────────────
+
+_seed_lock = threading.Lock()
+_seeding = False
+_seeded_at = 0.0
+
+
+def seed_from_tmdb(api_key: str, pages: int = SEED_PAGES) -> int:
+    added = 0
+    for media_type, path in SEED_LISTS:
+        for page in range(1, pages + 1):
+            try:
+                data = tmdb.fetch(path, api_key, page=page)
+            except Exception:
+                break
+            added += index.add_many((data or {}).get("results", []), media_type)
+    return added
+
+
+def ensure_seeded(api_key: str):
+    """Start a background catalog seed if none ran within RESEED_SECONDS."""
+    global _seeding, _seeded_at
+    if not api_key:
+        return
+    with _seed_lock:
+        if _seeding or (_seeded_at and time.time() - _seeded_at < RESEED_SECONDS):
+            return
+        _seeding = True
+
+    def run():
+        global _seeding, _seeded_at
+        try:
+            seed_from_tmdb(api_key)
+        finally:
+            with _seed_lock:
+                _seeding = False
+                _seeded_at = time.time()
+
+    threading.Thread(target=run, daemon=True).start()
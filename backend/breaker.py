@@ -0,0 +1,143 @@
+"""
+Per-upstream circuit breakers (closed → open → half-open).
+
+``UpstreamClient`` keeps one breaker per host and reports every call to it.
+A call *fails* when it raises, returns 5xx or 429, or takes longer than
+``BREAKER_SLOW_SECONDS``.
+
+* closed: calls go through.  Once the last ``BREAKER_WINDOW`` seconds hold
+  at least ``BREAKER_MIN_CALLS`` calls and ``BREAKER_FAILURE_RATIO`` of
+  them failed, the breaker opens.
+* open: calls raise ``CircuitOpen`` immediately, without touching the
+  network, for ``BREAKER_OPEN_SECONDS``.
+* half-open: one probe call is let through; success closes the breaker,
+  failure opens it again.  Other calls keep failing fast meanwhile.
+
+``CircuitOpen`` is a ``requests`` ``ConnectionError``, so existing error
+handling applies; the TMDB and Jikan caches answer it with their last known
+copy when they have one.
+
+Tunables (environment)
+----------------------
+BREAKER_WINDOW          seconds of history that count      (default 30)
+BREAKER_MIN_CALLS       calls needed before tripping        (default 10)
+BREAKER_FAILURE_RATIO   failed share that trips it          (default 0.5)
+BREAKER_SLOW_SECONDS    slower calls count as failures      (default 3)
+BREAKER_OPEN_SECONDS    how long an open breaker rejects    (default 15)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+# Numeric states for metrics
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """The upstream's breaker is open; the call was not attempted."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit open for {name}; retry in {retry_in:.1f}s.")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def _env_float(name: str, default: float, floor: float = 0.01) -> float:
+    try:
+        return max(floor, float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: float = 30.0,
+        min_calls: int = 10,
+        failure_ratio: float = 0.5,
+        slow_seconds: float = 3.0,
+        open_seconds: float = 15.0,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._opened_until = 0.0
+        self._probing = False
+        self._calls: deque[tuple[float, bool]] = deque()
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            window=_env_float("BREAKER_WINDOW", 30.0, 1.0),
+            min_calls=int(_env_float("BREAKER_MIN_CALLS", 10, 1)),
+            failure_ratio=min(1.0, _env_float("BREAKER_FAILURE_RATIO", 0.5)),
+            slow_seconds=_env_float("BREAKER_SLOW_SECONDS", 3.0),
+            open_seconds=_env_float("BREAKER_OPEN_SECONDS", 15.0),
+        )
+
+    def before_call(self):
+        """Raise ``CircuitOpen`` unless a call may go out now."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now >= self._opened_until:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+                self._counters["rejected"] += 1
+                raise CircuitOpen(self.name, max(0.0, self._opened_until - now))
+            if self.state == HALF_OPEN:
+                self._probing = True
+
+    def record(self, ok: bool, elapsed: float):
+        """Report the outcome of a call that ``before_call`` let through."""
+        slow = elapsed >= self.slow_seconds
+        failed = not ok or slow
+        with self._lock:
+            now = time.monotonic()
+            self._counters["calls"] += 1
+            self._counters["failures"] += not ok
+            self._counters["slow_calls"] += slow
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    self._failures = 0
+                return
+            if self.state == OPEN:
+                return  # a call admitted before the breaker tripped
+            self._calls.append((now, failed))
+            self._failures += failed
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._failures -= self._calls.popleft()[1]
+            if len(self._calls) >= self.min_calls and self._failures / len(self._calls) >= self.failure_ratio:
+                self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_until = now + self.open_seconds
+        self._counters["opened"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["state"] = STATE_CODES[self.state]
+            out["window_calls"] = len(self._calls)
+            out["window_failures"] = self._failures
+        return out
@@ -0,0 +1,222 @@
+"""
+Two-tier TTL cache used in front of upstream APIs.
+
+Tier 1 is an in-process LRU (``MemoryLRU``).  Tier 2 is optional and
+survives restarts: ``SQLiteStore``, or ``shared_store.RedisStore`` to share
+entries across instances.  Entries carry two deadlines:
+
+    fresh_until   serve directly
+    stale_until   serve, but the caller should revalidate in the background
+
+Values are stored as raw bytes so every reader decodes its own copy —
+callers are free to mutate what they get back without corrupting the
+cached body for other threads.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: bytes
+    status: int
+    fresh_until: float
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+# ── tiers ─────────────────────────────────────────────────────────────────────
+
+class MemoryLRU:
+    """Thread-safe, size-bounded LRU of ``CacheEntry`` objects."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteStore:
+    """File-backed second tier.  Expired rows are pruned opportunistically."""
+
+    _PRUNE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, status INTEGER, value BLOB,"
+            " fresh_until REAL, stale_until REAL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, status, fresh_until, stale_until FROM cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(bytes(row[0]), row[1], row[2], row[3])
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, status, value, fresh_until, stale_until)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, entry.status, entry.value, entry.fresh_until, entry.stale_until),
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                cur = self._conn.execute("DELETE FROM cache WHERE stale_until < ?", (time.time(),))
+                self.evictions += cur.rowcount
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+# ── facade ────────────────────────────────────────────────────────────────────
+
+class TieredCache:
+    """
+    Memory LRU in front of an optional persistent store.
+    Second-tier hits are promoted into memory.
+    """
+
+    def __init__(self, memory: MemoryLRU, second=None):
+        self.memory = memory
+        self.second = second
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "second_tier_hits": 0,
+        }
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def get(self, key: str, now: float | None = None):
+        """Return a usable (fresh or stale) entry, or None."""
+        now = time.time() if now is None else now
+        entry = self.memory.get(key)
+        if entry is not None and not entry.is_usable(now):
+            entry = None  # kept (until evicted or replaced) for ``last_known``
+        if entry is None and self.second is not None:
+            try:
+                entry = self.second.get(key)
+            except Exception:
+                entry = None
+            if entry is not None and entry.is_usable(now):
+                self.count("second_tier_hits")
+                self.memory.set(key, entry)
+            else:
+                entry = None
+        return entry
+
+    def get_many(self, keys: list[str], now: float | None = None) -> dict:
+        """
+        Usable entries for *keys* as ``{key: entry}``.  Memory misses are read
+        from the second tier in one batch when it supports ``get_many``.
+        """
+        now = time.time() if now is None else now
+        out = {}
+        missing = []
+        for key in keys:
+            entry = self.memory.get(key)
+            if entry is not None and entry.is_usable(now):
+                out[key] = entry
+            else:
+                missing.append(key)
+        if not missing or self.second is None:
+            return out
+        try:
+            if hasattr(self.second, "get_many"):
+                found = self.second.get_many(missing)
+            else:
+                found = {key: self.second.get(key) for key in missing}
+        except Exception:
+            found = {}
+        for key, entry in found.items():
+            if entry is not None and entry.is_usable(now):
+                self.count("second_tier_hits")
+                self.memory.set(key, entry)
+                out[key] = entry
+        return out
+
+    def last_known(self, key: str):
+        """
+        The newest copy held for *key*, however old — for answering while the
+        upstream's circuit breaker is open.
+        """
+        entry = self.memory.get(key)
+        if entry is None and self.second is not None:
+            try:
+                entry = self.second.get(key)
+            except Exception:
+                entry = None
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self.memory.set(key, entry)
+        if self.second is not None:
+            try:
+                self.second.set(key, entry)
+            except Exception:
+                pass
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.second is not None:
+            try:
+                self.second.delete(key)
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+        out["evictions"] = self.memory.evictions + getattr(self.second, "evictions", 0)
+        out["size"] = len(self.memory)
+        return out
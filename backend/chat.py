@@ -0,0 +1,216 @@
+"""
+Chat completions relayed token by token as Server-Sent Events.
+
+``stream_events`` asks Groq for a streamed completion and turns each delta
+into an SSE frame as soon as it arrives, so the browser shows the first
+words after time-to-first-token instead of after the whole answer:
+
+    event: token   data: {"text": "..."}          one per non-empty delta
+    event: done    data: {"finish_reason": "stop"}
+    event: error   data: {"error": "timeout" | "unavailable"}
+
+The whole answer must finish within ``CHAT_STREAM_DEADLINE`` seconds (also
+the SDK's read timeout, so a stalled upstream cannot hold the worker).
+When the client disconnects the generator is closed, which closes the
+upstream stream and stops generation.
+
+Completed answers are cached (``backend.cache``) under the title, a hash
+of its overview and the question normalised for case, punctuation and
+spacing, so "Is this worth watching?" and "is this worth watching" about
+the same title share one LLM call.  A hit is replayed as a single token
+event (or the usual JSON) without touching Groq.  Only answers that
+finished naturally (``finish_reason == "stop"``) are stored; one cut off
+at ``MAX_TOKENS`` is served once and not replayed.
+
+Tunables (environment)
+----------------------
+CHAT_STREAM_DEADLINE   seconds a streamed answer may take   (default 30)
+CHAT_CACHE_SIZE        answers kept in process              (default 512)
+CHAT_CACHE_TTL         seconds an answer is reused          (default 86400)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from backend import metrics, shared_store
+from backend.cache import CacheEntry, MemoryLRU, TieredCache
+
+MODEL = "llama-3.3-70b-versatile"
+MAX_TOKENS = 500
+TEMPERATURE = 0.7
+
+_counters = {
+    "streams": 0, "completed": 0, "cancelled": 0, "timed_out": 0, "failed": 0,
+    "tokens": 0, "first_token_seconds_total": 0.0,
+}
+_lock = threading.Lock()
+
+
+def _count(name: str, n=1):
+    with _lock:
+        _counters[name] += n
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _build_cache() -> TieredCache:
+    return TieredCache(MemoryLRU(max(16, _env_int("CHAT_CACHE_SIZE", 512))), shared_store.cache_store("chat"))
+
+
+cache = _build_cache()
+
+_NOT_WORD = re.compile(r"[^\w\s]+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _SPACE.sub(" ", _NOT_WORD.sub(" ", text.casefold())).strip()
+
+
+def answer_key(title: str, overview: str, question: str) -> str:
+    overview_hash = hashlib.sha1(overview.encode()).hexdigest()[:12]
+    return f"{normalize(title)}|{overview_hash}|{normalize(question)}"
+
+
+def cached_answer(key: str) -> str | None:
+    entry = cache.get(key)
+    if entry is None:
+        cache.count("misses")
+        return None
+    cache.count("hits")
+    return entry.value.decode()
+
+
+def store_answer(key: str, text: str):
+    if not text:
+        return
+    now = time.time()
+    expires = now + _env_int("CHAT_CACHE_TTL", 86400)
+    cache.set(key, CacheEntry(text.encode(), 200, expires, expires))
+
+
+def deadline() -> float:
+    try:
+        return max(1.0, float(os.getenv("CHAT_STREAM_DEADLINE", "30")))
+    except ValueError:
+        return 30.0
+
+
+def messages(title: str, overview: str, user_message: str) -> list:
+    system_prompt = f"""You are a friendly movie discussion assistant. You're currently discussing the movie '{title}'.
+
+Movie Overview: {overview}
+
+Help users by:
+- Answering questions about the movie
+- Discussing themes, characters, and plot points
+- Providing insights and analysis
+- Recommending similar movies
+- Being conversational and engaging
+
+Keep responses concise (2-3 paragraphs max) and friendly."""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message},
+    ]
+
+
+def complete(client, chat_messages: list, key: str | None = None) -> str:
+    with metrics.timed("groq", "/chat/completions"):
+        completion = client.chat.completions.create(
+            messages=chat_messages, model=MODEL, temperature=TEMPERATURE, max_tokens=MAX_TOKENS,
+        )
+    choice = completion.choices[0]
+    text = choice.message.content
+    if key is not None and choice.finish_reason == "stop":
+        store_answer(key, text)
+    return text
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def replay_events(text: str):
+    """SSE frames for a cached answer."""
+    yield sse("token", {"text": text})
+    yield sse("done", {"finish_reason": "stop", "cached": True})
+
+
+def stream_events(client, chat_messages: list, limit: float | None = None, key: str | None = None):
+    """
+    Yield SSE frames for one streamed completion; see the module docstring.
+    A completed answer is cached under *key*.
+    """
+    limit = deadline() if limit is None else limit
+    started = time.monotonic()
+    give_up = started + limit
+    _count("streams")
+    stream = None
+    outcome = "cancelled"  # unless the loop below finishes
+    try:
+        try:
+            with metrics.timed("groq", "/chat/completions"):
+                stream = client.chat.completions.create(
+                    messages=chat_messages, model=MODEL, temperature=TEMPERATURE,
+                    max_tokens=MAX_TOKENS, stream=True, timeout=limit,
+                )
+            finish_reason = None
+            first = True
+            parts = []
+            for chunk in stream:
+                if time.monotonic() > give_up:
+                    outcome = "timed_out"
+                    break
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                text = choice.delta.content if choice.delta else None
+                if text:
+                    if first:
+                        _count("first_token_seconds_total", time.monotonic() - started)
+                        first = False
+                    _count("tokens")
+                    parts.append(text)
+                    yield sse("token", {"text": text})
+                finish_reason = choice.finish_reason or finish_reason
+            else:
+                outcome = "completed"
+        except Exception as exc:
+            outcome = "timed_out" if "timeout" in type(exc).__name__.lower() else "failed"
+
+        if outcome == "completed":
+            if key is not None and finish_reason == "stop":
+                store_answer(key, "".join(parts))
+            yield sse("done", {"finish_reason": finish_reason or "stop"})
+        else:
+            yield sse("error", {"error": "timeout" if outcome == "timed_out" else "unavailable"})
+    finally:
+        # GeneratorExit (client went away) lands here with outcome still "cancelled"
+        _count(outcome)
+        if stream is not None and hasattr(stream, "close"):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def cache_stats() -> dict:
+    out = cache.stats()
+    lookups = out["hits"] + out["misses"]
+    out["hit_ratio"] = out["hits"] / lookups if lookups else 0.0
+    return out
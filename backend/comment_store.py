@@ -0,0 +1,137 @@
+"""
+Read cache and keyset cursors for detail-page comment threads.
+
+The newest ``COMMENTS_CACHE_ROWS`` comments of each (media_type, media_id)
+are cached (``backend.cache``; shared across instances when REDIS_URL is
+set), so a hot title costs one Supabase read per ``COMMENTS_CACHE_TTL``
+instead of one per pageview.  A successful post is written through into
+the cached thread, so the author sees it straight away; other instances
+without a shared tier pick it up when their copy expires.
+
+Threads are ordered newest first by (created_at, id).  Older pages are
+addressed with an opaque ``before`` cursor (base64url JSON of the last row's
+key) and answered from the cached rows when they cover the page, otherwise
+with one keyset query (``created_at < t or (created_at = t and id < i)``),
+which costs the same at any depth.
+
+Tunables (environment)
+----------------------
+COMMENTS_CACHE_ROWS   newest comments kept per title       (default 50)
+COMMENTS_CACHE_SIZE   titles kept in process               (default 1024)
+COMMENTS_CACHE_TTL    seconds before a thread is re-read   (default 60)
+"""
+
+import base64
+import json
+import os
+import re
+import time
+
+from backend import shared_store
+from backend.cache import CacheEntry, MemoryLRU, TieredCache
+
+FIELDS = ("id", "username", "content", "created_at")
+
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}(:?\d{2})?)?$")
+_ID_RE = re.compile(r"^[0-9A-Za-z-]{1,64}$")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def sort_key(row: dict) -> tuple:
+    return (row.get("created_at") or "", row.get("id"))
+
+
+class CommentCache:
+    def __init__(self, cache: TieredCache, rows: int, ttl: int):
+        self.cache = cache
+        self.rows = rows
+        self.ttl = ttl
+
+    @classmethod
+    def from_env(cls) -> "CommentCache":
+        cache = TieredCache(MemoryLRU(_env_int("COMMENTS_CACHE_SIZE", 1024)), shared_store.cache_store("comments"))
+        return cls(cache, _env_int("COMMENTS_CACHE_ROWS", 50), _env_int("COMMENTS_CACHE_TTL", 60))
+
+    @staticmethod
+    def _key(media_type: str, media_id: int) -> str:
+        return f"{media_type}:{media_id}"
+
+    def _load(self, media_type: str, media_id: int):
+        entry = self.cache.get(self._key(media_type, media_id))
+        if entry is None or not entry.is_fresh(time.time()):
+            return None
+        stored = json.loads(entry.value)
+        return stored["rows"], stored["complete"]
+
+    def get(self, media_type: str, media_id: int):
+        """``(rows, complete)`` for a cached thread, else None.  *complete*: no older rows exist."""
+        cached = self._load(media_type, media_id)
+        self.cache.count("misses" if cached is None else "hits")
+        return cached
+
+    def put(self, media_type: str, media_id: int, rows: list[dict], complete: bool):
+        now = time.time()
+        rows = [{k: row.get(k) for k in FIELDS} for row in rows[:self.rows]]
+        body = json.dumps({"rows": rows, "complete": complete}).encode()
+        self.cache.set(self._key(media_type, media_id), CacheEntry(body, 200, now + self.ttl, now + self.ttl))
+
+    def add(self, media_type: str, media_id: int, row: dict):
+        """Write a newly posted comment through into the cached thread, if there is one."""
+        cached = self._load(media_type, media_id)
+        if cached is None:
+            return
+        rows, complete = cached
+        rows = sorted([row, *(r for r in rows if r.get("id") != row.get("id"))], key=sort_key, reverse=True)
+        self.put(media_type, media_id, rows, complete and len(rows) <= self.rows)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+cache = CommentCache.from_env()
+
+
+def page_of(rows: list[dict], complete: bool, limit: int, before: tuple | None):
+    """
+    Slice a page out of cached newest-first *rows*: ``(page, has_more)``, or
+    None when the cached rows cannot tell whether the page is whole.
+    """
+    if before is not None:
+        try:
+            rows = [r for r in rows if sort_key(r) < before]
+        except TypeError:
+            return None  # cursor id of another type than the cached ids; let the query decide
+    if len(rows) > limit:
+        return rows[:limit], True
+    if complete:
+        return rows, False
+    return None
+
+
+# ── cursors ───────────────────────────────────────────────────────────────────
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps({"t": row.get("created_at"), "i": row.get("id")}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return the (created_at, id) key encoded in *cursor*, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        created_at, row_id = data["t"], data["i"]
+        # Both end up in a PostgREST filter: accept only timestamp- and id-shaped values
+        if not isinstance(created_at, str) or not _TIMESTAMP_RE.match(created_at):
+            return None
+        if isinstance(row_id, bool) or not (isinstance(row_id, int) or (isinstance(row_id, str) and _ID_RE.match(row_id))):
+            return None
+        return created_at, row_id
+    except (ValueError, TypeError, KeyError):
+        return None
@@ -0,0 +1,133 @@
+"""
+HTTP caching policy for JSON API responses.
+
+Every successful GET of a JSON route gets:
+
+* ``Cache-Control`` from the route's cache class (``ENDPOINT_CLASSES``):
+  ``max-age`` for browsers, ``s-maxage`` + ``stale-while-revalidate`` so the
+  CDN (Vercel's edge) absorbs catalog traffic.  Routes without a class get
+  ``no-cache`` — still cacheable, but revalidated every time.
+* A strong ``ETag`` (SHA-256 of the identity body, suffixed per content
+  coding) and a ``304 Not Modified`` when ``If-None-Match`` matches.
+* gzip (or brotli, when the optional ``brotli`` package is installed and the
+  client accepts it) for bodies of at least ``MIN_COMPRESS_BYTES``.
+
+Responses that carry an ``"error"`` or ``"timed_out"`` key are partial or
+failed answers and are never marked publicly cacheable.  Streamed
+responses and routes that already set ``Cache-Control`` are left alone.
+"""
+
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+MIN_COMPRESS_BYTES = 1024
+
+# class → (max-age, s-maxage, stale-while-revalidate)
+CACHE_CLASSES = {
+    "static":  (HOUR,       DAY,         7 * DAY),
+    "catalog": (5 * MINUTE, HOUR,        DAY),
+    "detail":  (10 * MINUTE, DAY,        DAY),
+    "live":    (MINUTE,     5 * MINUTE,  10 * MINUTE),
+    "search":  (MINUTE,     10 * MINUTE, 10 * MINUTE),
+}
+
+# Flask endpoint name → cache class
+ENDPOINT_CLASSES = {
+    "get_genres": "static",
+    "get_movies": "catalog",
+    "get_tv_shows": "catalog",
+    "get_anime": "catalog",
+    "get_movie_details": "detail",
+    "get_tv_details": "detail",
+    "get_movie_trailer": "detail",
+    "get_tv_trailer": "detail",
+    "get_movie_credits": "detail",
+    "get_tv_credits": "detail",
+    "get_movie_watch_providers": "detail",
+    "get_tv_watch_providers": "detail",
+    "get_movie_reviews": "detail",
+    "get_tv_reviews": "detail",
+    "get_anime_details": "detail",
+    "get_anime_recommendations": "detail",
+    "get_person": "detail",
+    "get_person_credits": "detail",
+    # TMDB sections only; a /full response that includes comments marks itself no-cache
+    "get_movie_full": "detail",
+    "get_tv_full": "detail",
+    "get_recommendations": "live",
+    "autocomplete": "search",
+    "global_search": "search",
+}
+
+# With compact JSON these only occur as object keys
+_UNCACHEABLE_MARKERS = (b'"error":', b'"timed_out":')
+
+
+def cache_control(cache_class: str | None, private: bool = False) -> str:
+    if private:
+        return "private, no-cache"
+    if cache_class is None:
+        return "no-cache"
+    max_age, s_maxage, swr = CACHE_CLASSES[cache_class]
+    return f"public, max-age={max_age}, s-maxage={s_maxage}, stale-while-revalidate={swr}"
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def apply(response, request, endpoint: str | None, private: bool = False):
+    """Add caching headers, answer conditional GETs and compress.  Returns the response."""
+    if (
+        request.method not in ("GET", "HEAD")
+        or response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or not response.is_json
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    body = response.get_data()
+    if "Cache-Control" not in response.headers:
+        cache_class = ENDPOINT_CLASSES.get(endpoint or "")
+        if any(marker in body for marker in _UNCACHEABLE_MARKERS):
+            cache_class = None
+        response.headers["Cache-Control"] = cache_control(cache_class, private)
+
+    tag = hashlib.sha256(body).hexdigest()[:32]
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", "")) if len(body) >= MIN_COMPRESS_BYTES else None
+    response.set_etag(f"{tag}-{encoding}" if encoding else tag)
+    response.vary.add("Accept-Encoding")
+
+    # Any coding of the same body is the same representation for revalidation
+    if any(request.if_none_match.contains(t) for t in (tag, f"{tag}-gzip", f"{tag}-br")):
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Type", None)
+        return response
+
+    if encoding:
+        response.set_data(_compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,306 @@
+"""
+Quota-aware Jikan (MyAnimeList) client.
+
+Jikan allows roughly 3 requests per second and 60 per minute.  Every
+upstream call first takes a token from both buckets through one
+``Scheduler``; callers queue for a token instead of bursting into 429s,
+and give up only when no token can be had within their deadline.
+
+* Lanes: ``interactive`` (detail pages, top lists) is always served ahead
+  of ``background`` (search); within a lane it is first come, first served.
+* A 429 blocks the whole scheduler for ``Retry-After`` seconds and the call
+  is retried once if its deadline allows.
+* Responses are cached like TMDB's (``backend.cache``): top lists and
+  ``/anime/{id}/full`` for a long time, search briefly, with
+  stale-while-revalidate refreshes running in the background lane.
+  Identical concurrent misses share one upstream call (and one token).
+  While Jikan's circuit breaker is open a miss is answered with the last
+  copy held, however old, when there is one.
+
+Tunables (environment)
+----------------------
+JIKAN_BASE_URL         override the API root (used by local stand-ins)
+JIKAN_RATE_PER_SECOND  token refill per second                  (default 3)
+JIKAN_RATE_PER_MINUTE  token refill per minute                  (default 60)
+JIKAN_QUEUE_DEADLINE   seconds a call may wait for a token      (default 5)
+JIKAN_CACHE_SIZE       in-process LRU entries                   (default 1024)
+JIKAN_CACHE_DB         SQLite file for the persistent tier      (default: off;
+                       ignored when REDIS_URL provides a shared tier)
+"""
+
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+from backend import shared_store, upstream
+from backend.breaker import CircuitOpen
+from backend.cache import CacheEntry, MemoryLRU, SQLiteStore, TieredCache
+from backend.singleflight import Group
+
+JIKAN_BASE_URL = os.getenv("JIKAN_BASE_URL", "https://api.jikan.moe/v4")
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# (name, pattern, fresh seconds, stale-while-revalidate seconds) — first match wins
+TTL_CLASSES = [
+    ("top",             re.compile(r"^/top/anime$"),                   6 * HOUR, DAY),
+    ("details",         re.compile(r"^/anime/\d+/full$"),              DAY,      7 * DAY),
+    ("recommendations", re.compile(r"^/anime/\d+/recommendations$"),   DAY,      3 * DAY),
+    ("search",          re.compile(r"^/anime$"),                       10 * MINUTE, 10 * MINUTE),
+]
+DEFAULT_TTL = ("default", None, 15 * MINUTE, 15 * MINUTE)
+NEGATIVE_TTL = 10 * MINUTE
+
+LANES = ("interactive", "background")
+
+
+class RateLimited(requests.exceptions.RequestException):
+    """No Jikan token could be obtained within the caller's deadline."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.1, float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def ttl_class(path: str) -> tuple:
+    for cls in TTL_CLASSES:
+        if cls[1].search(path):
+            return cls
+    return DEFAULT_TTL
+
+
+def cache_key(path: str, params: dict) -> str:
+    items = sorted((k, str(v)) for k, v in params.items())
+    return path + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+
+# ── scheduling ────────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """``capacity`` tokens, refilled continuously at ``rate`` per second.  Not locked."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Scheduler:
+    """
+    Hands out tokens from every bucket at once, one caller at a time, in
+    (lane, arrival) order.  An empty bucket list means unthrottled.
+    """
+
+    def __init__(self, buckets: list[TokenBucket]):
+        self.buckets = buckets
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._counters = {"granted": 0, "rejected": 0, "throttled": 0, "wait_seconds_total": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "Scheduler":
+        per_second = _env_float("JIKAN_RATE_PER_SECOND", 3)
+        per_minute = _env_float("JIKAN_RATE_PER_MINUTE", 60)
+        return cls([TokenBucket(per_second, per_second), TokenBucket(per_minute / MINUTE, per_minute)])
+
+    def _wait_for_token(self, now: float) -> float:
+        waits = [bucket.wait_time(now) for bucket in self.buckets]
+        return max([self.blocked_until - now, 0.0, *waits])
+
+    def acquire(self, lane: str = "interactive", deadline: float = 5.0):
+        """Block until a token is granted; raise ``RateLimited`` if that would take past *deadline* seconds."""
+        start = time.monotonic()
+        give_up = start + deadline
+        ticket = (LANES.index(lane), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] == ticket:
+                        wait = self._wait_for_token(now)
+                        if wait <= 0:
+                            for bucket in self.buckets:
+                                bucket.take()
+                            self._counters["granted"] += 1
+                            self._counters["wait_seconds_total"] += now - start
+                            return
+                        # The head of the queue knows exactly when its token arrives
+                        if now + wait > give_up:
+                            break
+                    else:
+                        wait = give_up - now
+                        if wait <= 0:
+                            break
+                    self._cond.wait(wait)
+                self._counters["rejected"] += 1
+                raise RateLimited(f"No Jikan quota available within {deadline:g}s.")
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def penalize(self, seconds: float):
+        """Upstream said 429: hold every caller back for *seconds*."""
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self._counters["throttled"] += 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._counters)
+            out["queued"] = len(self._waiting)
+        return out
+
+
+def _retry_after(response: requests.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "1")))
+    except ValueError:
+        return 1.0
+
+
+# ── cache ─────────────────────────────────────────────────────────────────────
+
+def _build_cache() -> TieredCache:
+    try:
+        size = max(16, int(os.getenv("JIKAN_CACHE_SIZE", "1024")))
+    except ValueError:
+        size = 1024
+    second = shared_store.cache_store("jikan")
+    db_path = os.getenv("JIKAN_CACHE_DB")
+    if second is None and db_path:
+        try:
+            second = SQLiteStore(db_path)
+        except Exception:
+            second = None
+    return TieredCache(MemoryLRU(size), second)
+
+
+scheduler = Scheduler.from_env()
+cache = _build_cache()
+QUEUE_DEADLINE = _env_float("JIKAN_QUEUE_DEADLINE", 5.0)
+
+_flights = Group()
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+# ── fetch ─────────────────────────────────────────────────────────────────────
+
+def _fetch_upstream(key: str, path: str, params: dict, lane: str, deadline: float, timeout) -> CacheEntry:
+    give_up = time.monotonic() + deadline
+    for attempt in range(2):
+        scheduler.acquire(lane, max(0.0, give_up - time.monotonic()))
+        response = upstream.get(f"{JIKAN_BASE_URL}{path}", params=params or None, timeout=timeout, coalesce=False)
+        if response.status_code != 429:
+            break
+        retry_after = _retry_after(response)
+        scheduler.penalize(retry_after)
+        if attempt or time.monotonic() + retry_after > give_up:
+            response.raise_for_status()
+
+    now = time.time()
+    if response.status_code == 404:
+        cache.set(key, CacheEntry(b"", 404, now + NEGATIVE_TTL, now + NEGATIVE_TTL))
+    response.raise_for_status()
+    _, _, fresh, swr = ttl_class(path)
+    entry = CacheEntry(response.content, response.status_code, now + fresh, now + fresh + swr)
+    cache.set(key, entry)
+    return entry
+
+
+def _timeout_total(timeout) -> float:
+    timeout = timeout or upstream.client.timeout
+    return sum(timeout) if isinstance(timeout, tuple) else timeout
+
+
+def _refresh(key: str, path: str, params: dict, timeout):
+    try:
+        _flights.do(key, _fetch_upstream, key, path, params, "background", QUEUE_DEADLINE, timeout,
+                    wait=QUEUE_DEADLINE + _timeout_total(timeout))
+    except Exception:
+        pass  # keep serving the stale copy until it expires
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key: str, path: str, params: dict, timeout):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh, args=(key, path, params, timeout), daemon=True).start()
+
+
+def _decode(path: str, entry: CacheEntry):
+    if entry.status == 404:
+        raise requests.exceptions.HTTPError(f"404 Not Found (cached) for {path}")
+    return json.loads(entry.value)
+
+
+def fetch(path: str, lane: str = "interactive", deadline: float | None = None, timeout=None, **params) -> dict:
+    """
+    Return the decoded JSON body for *path*.  Raises ``requests`` exceptions
+    (``RateLimited`` when the quota cannot be met within *deadline*).
+    """
+    key = cache_key(path, params)
+    now = time.time()
+
+    entry = cache.get(key, now)
+    if entry is not None:
+        if entry.status == 404:
+            cache.count("negative_hits")
+        elif entry.is_fresh(now):
+            cache.count("hits")
+        else:
+            cache.count("stale_hits")
+            _schedule_refresh(key, path, dict(params), timeout)
+        return _decode(path, entry)
+
+    cache.count("misses")
+    deadline = QUEUE_DEADLINE if deadline is None else deadline
+    try:
+        entry = _flights.do(key, _fetch_upstream, key, path, params, lane, deadline, timeout,
+                            wait=deadline + _timeout_total(timeout))
+    except CircuitOpen:
+        entry = cache.last_known(key)
+        if entry is None:
+            raise
+        cache.count("served_while_open")
+    return _decode(path, entry)
+
+
+def cache_stats() -> dict:
+    return cache.stats()
+
+
+def scheduler_stats() -> dict:
+    return scheduler.stats()
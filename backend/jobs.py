@@ -0,0 +1,347 @@
+"""
+Durable background jobs (scheduled check-in emails, other deferred work).
+
+Jobs are rows in a SQLite table, so a scheduled send outlives the process
+that accepted it.  Nothing sleeps per job: one worker thread per process
+(or a periodic ``python -m backend.jobs run-due`` / ``/api/jobs/run`` cron
+call where threads do not survive, e.g. serverless) claims due jobs in
+batches and runs their handlers one after another.
+
+* Claiming takes a lease (``JOBS_LEASE_SECONDS``) inside a write
+  transaction, so concurrent workers never run the same job; a job whose
+  worker died is picked up again once its lease lapses.
+* A handler that raises is retried with exponential backoff; after
+  ``JOBS_MAX_ATTEMPTS`` tries the job is parked as ``dead`` with its error.
+* The server entry points (api/index.py, ``python -m backend.app``) start
+  the worker at boot, so jobs persisted before a restart run without
+  waiting for the next ``enqueue``.  Importing ``backend.app`` alone (tests,
+  benchmarks, this CLI) does not.
+* vercel.json schedules the ``/api/jobs/run`` cron (set ``CRON_SECRET``).
+  A serverless instance's temp dir is neither durable nor shared, so
+  delayed mail only survives there with ``JOBS_DB`` on persistent storage.
+* Handlers are registered by kind (``register``) and receive the JSON
+  payload given to ``enqueue`` as keyword arguments.
+
+Tunables (environment)
+----------------------
+JOBS_DB               SQLite file for the queue          (default data/jobs.sqlite3, or
+                      <tmp>/watchnext/jobs.sqlite3 when the code tree is read-only,
+                      e.g. on Vercel; point it at persistent storage there)
+JOBS_WORKER           run the in-process worker thread    (default 1; 0 = cron only)
+JOBS_POLL_SECONDS     worker sleep between empty polls    (default 30)
+JOBS_BATCH_SIZE       jobs claimed per transaction        (default 20)
+JOBS_LEASE_SECONDS    how long a claimed job stays locked (default 300)
+JOBS_MAX_ATTEMPTS     tries before a job is parked dead   (default 5)
+JOBS_BACKOFF_SECONDS  first retry delay, doubled per try  (default 60; capped at 6h)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _default_db() -> str:
+    data = ROOT / "data"
+    if os.access(data if data.is_dir() else ROOT, os.W_OK):
+        return str(data / "jobs.sqlite3")
+    return os.path.join(tempfile.gettempdir(), "watchnext", "jobs.sqlite3")
+
+
+JOBS_DB = os.getenv("JOBS_DB") or _default_db()
+MAX_BACKOFF = 6 * 60 * 60
+
+STATUSES = ("pending", "running", "done", "dead")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.01, float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+
+
+def backoff(attempts: int, base: float) -> float:
+    """Delay before retry number *attempts* (1-based): base, 2×base, 4×base, ..."""
+    return min(MAX_BACKOFF, base * 2 ** max(0, attempts - 1))
+
+
+# ── store ─────────────────────────────────────────────────────────────────────
+
+class JobStore:
+    """SQLite-backed queue.  Safe to share between threads and processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', run_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, locked_until REAL, last_error TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, run_at)")
+        self._lock = threading.Lock()
+
+    def enqueue(self, kind: str, payload: dict, run_at: float | None = None) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (kind, payload, run_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), now if run_at is None else run_at, now, now),
+            )
+        return cur.lastrowid
+
+    def claim(self, limit: int, lease: float, now: float | None = None) -> list[Job]:
+        """Lock up to *limit* due jobs (or jobs whose lease lapsed) for *lease* seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs"
+                    " WHERE (status = 'pending' AND run_at <= ?)"
+                    "    OR (status = 'running' AND locked_until <= ?)"
+                    " ORDER BY run_at, id LIMIT ?",
+                    (now, now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                    " locked_until = ?, updated_at = ? WHERE id = ?",
+                    [(now + lease, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [Job(row[0], row[1], json.loads(row[2]), row[3] + 1) for row in rows]
+
+    def complete(self, job_id: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', locked_until = NULL, last_error = NULL, updated_at = ?"
+                " WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str, retry_at: float | None):
+        """Record a failed attempt; ``retry_at=None`` parks the job as dead."""
+        status = "dead" if retry_at is None else "pending"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, run_at = COALESCE(?, run_at), locked_until = NULL,"
+                " last_error = ?, updated_at = ? WHERE id = ?",
+                (status, retry_at, error[:500], time.time(), job_id),
+            )
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished jobs last touched before *older_than*."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (older_than,))
+        return cur.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        out = dict.fromkeys(STATUSES, 0)
+        out.update(rows)
+        return out
+
+    def get(self, job_id: int) -> dict | None:
+        with self._lock:
+            cur = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return dict(zip((c[0] for c in cur.description), row))
+
+
+# ── handlers and the worker ───────────────────────────────────────────────────
+
+HANDLERS: dict = {}
+
+_store: JobStore | None = None
+_store_lock = threading.Lock()
+_counters = {"runs": 0, "succeeded": 0, "retried": 0, "parked": 0}
+_counters_lock = threading.Lock()
+
+
+def register(kind: str, fn):
+    HANDLERS[kind] = fn
+
+
+def get_store() -> JobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore(JOBS_DB)
+        return _store
+
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def enqueue(kind: str, payload: dict, delay: float = 0.0) -> int:
+    """Persist a *kind* job to run *delay* seconds from now; starts the worker if enabled."""
+    job_id = get_store().enqueue(kind, payload, time.time() + delay)
+    worker.ensure_started()
+    if delay <= 0:
+        worker.wake()
+    return job_id
+
+
+def _run(store: JobStore, job: Job, max_attempts: int, base: float):
+    _count("runs")
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}.")
+        handler(**job.payload)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        if handler is None or job.attempts >= max_attempts:
+            _count("parked")
+            store.fail(job.id, error, None)
+        else:
+            _count("retried")
+            store.fail(job.id, error, time.time() + backoff(job.attempts, base))
+        return
+    _count("succeeded")
+    store.complete(job.id)
+
+
+def run_due(store: JobStore | None = None, max_batches: int | None = None) -> dict:
+    """Claim and run due jobs batch by batch until none are left; returns a summary."""
+    store = store or get_store()
+    batch_size = _env_int("JOBS_BATCH_SIZE", 20)
+    lease = _env_float("JOBS_LEASE_SECONDS", 300.0)
+    max_attempts = _env_int("JOBS_MAX_ATTEMPTS", 5)
+    base = _env_float("JOBS_BACKOFF_SECONDS", 60.0)
+
+    ran = batches = 0
+    while max_batches is None or batches < max_batches:
+        claimed = store.claim(batch_size, lease)
+        if not claimed:
+            break
+        batches += 1
+        for job in claimed:
+            _run(store, job, max_attempts, base)
+        ran += len(claimed)
+    return {"ran": ran, "batches": batches, **store.counts()}
+
+
+class Worker:
+    """
+    One daemon thread per process that drains due jobs, then sleeps
+    ``JOBS_POLL_SECONDS`` or until ``wake`` is called for a job due now.
+    """
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("JOBS_WORKER", "1") != "0"
+
+    def ensure_started(self):
+        if not self.enabled():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="jobs-worker", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def _loop(self):
+        poll = _env_float("JOBS_POLL_SECONDS", 30.0)
+        while not self._stop.is_set():
+            self._wake.clear()
+            if not self.enabled():
+                self._wake.wait(poll)  # switched off after start: leave the queue to cron
+                continue
+            try:
+                run_due()
+            except Exception:
+                pass  # a locked or missing database must not kill the worker; try again next poll
+            self._wake.wait(poll)
+
+
+worker = Worker()
+
+
+def stats() -> dict:
+    with _counters_lock:
+        out = dict(_counters)
+    if _store is not None:
+        try:
+            out.update(_store.counts())
+        except sqlite3.Error:
+            pass
+    return out
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run or inspect the background job queue.")
+    parser.add_argument("command", choices=["run-due", "stats"])
+    parser.add_argument("--db", default=JOBS_DB)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args(argv)
+    store = JobStore(args.db)
+    if args.command == "stats":
+        print(json.dumps(store.counts()))
+        return 0
+    # Handlers register themselves on import; importing backend.app is not needed
+    from backend import outbox  # noqa: F401
+    print(json.dumps(run_due(store, args.max_batches)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
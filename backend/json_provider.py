@@ -0,0 +1,65 @@
+"""
+Pluggable JSON provider for the Flask app.
+
+``orjson`` (optional) serializes straight to bytes several times faster
+than the standard library; ``install`` uses it when available and falls
+back to Flask's default provider otherwise.  Output is compact in both
+cases; orjson keeps insertion order instead of sorting keys.
+
+Tunables (environment)
+----------------------
+JSON_PROVIDER   auto | orjson | default                      (default auto)
+"""
+
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """``jsonify`` via orjson; anything orjson can't encode goes through Flask's ``default``."""
+
+    _OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def _encode(self, obj) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:  # indent/sort_keys etc. are stdlib-only
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj) + b"\n", mimetype=self.mimetype)
+
+
+PROVIDERS = {"default": DefaultJSONProvider, "orjson": OrjsonProvider}
+
+
+def provider_name(choice: str | None = None) -> str:
+    choice = (choice or os.getenv("JSON_PROVIDER", "auto")).lower()
+    if choice == "auto":
+        return "orjson" if orjson is not None else "default"
+    if choice == "orjson" and orjson is None:
+        return "default"
+    return choice if choice in PROVIDERS else "default"
+
+
+def install(app, choice: str | None = None) -> str:
+    """Set ``app.json`` to the chosen provider; returns the name actually used."""
+    name = provider_name(choice)
+    app.json = PROVIDERS[name](app)
+    return name
@@ -0,0 +1,277 @@
+"""
+Upstream timing metrics, Server-Timing support and Prometheus text output.
+
+* Every upstream call records into a latency histogram keyed on
+  (upstream, endpoint template) — numeric ids become ``{id}`` —
+  plus error counters by kind (timeout, connection, http_4xx, http_5xx).
+* Each Flask request gets a ``RequestTimings`` accumulator in a contextvar;
+  upstream time is added to it and rendered as a ``Server-Timing`` header.
+  Work handed to other threads must carry the context along (``bind``).
+* Other modules expose their counters through ``register_collector``;
+  ``render()`` produces the Prometheus text exposition format.
+"""
+
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_ENDPOINTS_PER_UPSTREAM = 200
+
+# Numeric path segments, except a leading API version such as TMDB's "/3"
+_NUMERIC_SEGMENT = re.compile(r"(?<=.)/\d+(?=/|$)")
+
+_HOST_NAMES = {
+    "api.themoviedb.org": "tmdb",
+    "api.jikan.moe": "jikan",
+    "api.groq.com": "groq",
+}
+_HOST_SUFFIXES = ((".supabase.co", "supabase"),)
+
+
+def register_host(url: str, name: str):
+    """Name an upstream host (e.g. a self-hosted Supabase or a local stand-in)."""
+    _HOST_NAMES[urlsplit(url).netloc] = name
+
+
+def upstream_name(url: str) -> str:
+    host = urlsplit(url).netloc
+    name = _HOST_NAMES.get(host)
+    if name:
+        return name
+    for suffix, suffix_name in _HOST_SUFFIXES:
+        if host.endswith(suffix):
+            return suffix_name
+    return host
+
+
+def endpoint_template(url_or_path: str) -> str:
+    path = urlsplit(url_or_path).path or "/"
+    return _NUMERIC_SEGMENT.sub("/{id}", path)
+
+
+# ── histograms ────────────────────────────────────────────────────────────────
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.upstream: dict[tuple[str, str], Histogram] = {}
+        self.errors: dict[tuple[str, str, str], int] = {}
+        self.routes: dict[str, Histogram] = {}
+        self._endpoints: dict[str, set] = {}
+        self._collectors: list = []
+
+    def _endpoint(self, upstream: str, endpoint: str) -> str:
+        seen = self._endpoints.setdefault(upstream, set())
+        if endpoint in seen:
+            return endpoint
+        if len(seen) >= MAX_ENDPOINTS_PER_UPSTREAM:
+            return "other"
+        seen.add(endpoint)
+        return endpoint
+
+    def observe_upstream(self, upstream: str, endpoint: str, seconds: float, error: str | None = None):
+        with self._lock:
+            endpoint = self._endpoint(upstream, endpoint)
+            self.upstream.setdefault((upstream, endpoint), Histogram()).observe(seconds)
+            if error:
+                key = (upstream, endpoint, error)
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def observe_route(self, route: str, seconds: float):
+        with self._lock:
+            self.routes.setdefault(route, Histogram()).observe(seconds)
+
+    def register_collector(self, fn):
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            upstream = {k: (list(h.counts), h.total, h.count) for k, h in self.upstream.items()}
+            errors = dict(self.errors)
+            routes = {k: (list(h.counts), h.total, h.count) for k, h in self.routes.items()}
+
+        _render_histograms(
+            lines, "watchnext_upstream_request_duration_seconds",
+            "Latency of upstream API calls.", upstream, ("upstream", "endpoint"),
+        )
+        lines.append("# HELP watchnext_upstream_errors_total Failed upstream API calls by kind.")
+        lines.append("# TYPE watchnext_upstream_errors_total counter")
+        for (up, ep, kind), value in sorted(errors.items()):
+            lines.append(f"watchnext_upstream_errors_total{_labels(upstream=up, endpoint=ep, kind=kind)} {value}")
+        _render_histograms(
+            lines, "watchnext_http_request_duration_seconds",
+            "Latency of Flask requests by endpoint.", {(k,): v for k, v in routes.items()}, ("endpoint",),
+        )
+        for collector in list(self._collectors):
+            try:
+                families = collector()
+            except Exception:
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(**labels)} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _num(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _render_histograms(lines, name, help_text, series, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, (counts, total, count) in sorted(series.items()):
+        base = dict(zip(label_names, key))
+        running = 0
+        for bound, c in zip(BUCKETS, counts):
+            running += c
+            lines.append(f"{name}_bucket{_labels(**base, le=repr(bound))} {running}")
+        lines.append(f"{name}_bucket{_labels(**base, le='+Inf')} {count}")
+        lines.append(f"{name}_sum{_labels(**base)} {total!r}")
+        lines.append(f"{name}_count{_labels(**base)} {count}")
+
+
+registry = Registry()
+
+
+def register_collector(fn):
+    """*fn* returns [(name, "gauge"|"counter", help, [(labels_dict, value), ...]), ...]."""
+    registry.register_collector(fn)
+
+
+def families_from_stats(prefix: str, stats: dict, help_text: str, label: str | None = None) -> list:
+    """
+    Turn a module's ``stats()`` dict into metric families.  Flat dicts become
+    ``{prefix}_{field}``; with *label*, ``{label_value: {field: n}}`` dicts
+    become ``{prefix}_{field}{label="label_value"}``.
+    """
+    fields: dict[str, list] = {}
+    if label is None:
+        for field, value in stats.items():
+            if isinstance(value, (int, float)):
+                fields.setdefault(field, []).append(({}, value))
+    else:
+        for label_value, sub in stats.items():
+            for field, value in (sub or {}).items():
+                if isinstance(value, (int, float)):
+                    fields.setdefault(field, []).append(({label: label_value}, value))
+    return [(f"{prefix}_{field}", "gauge", f"{help_text} ({field}).", samples)
+            for field, samples in fields.items()]
+
+
+def render() -> str:
+    return registry.render()
+
+
+# ── per-request timings ───────────────────────────────────────────────────────
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.upstream: dict[str, list] = {}
+
+    def add(self, upstream: str, seconds: float):
+        with self._lock:
+            slot = self.upstream.setdefault(upstream, [0.0, 0])
+            slot[0] += seconds
+            slot[1] += 1
+
+    def server_timing(self) -> str:
+        parts = []
+        with self._lock:
+            items = sorted(self.upstream.items())
+        for name, (seconds, calls) in items:
+            token = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+            parts.append(f'{token};dur={seconds * 1000:.1f};desc="{calls} call{"s" if calls != 1 else ""}"')
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("watchnext_request_timings", default=None)
+
+
+def begin_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+def end_request():
+    _current.set(None)
+
+
+def add_request_time(upstream: str, seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(upstream, seconds)
+
+
+def bind(fn):
+    """Run *fn* in a copy of the caller's context (for thread pool submissions)."""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+
+    return run
+
+
+@contextmanager
+def timed(upstream: str, endpoint: str):
+    """Time a non-HTTP upstream call (e.g. an SDK client) like any other."""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception:
+        error = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe_upstream(upstream, endpoint, elapsed, error)
+        add_request_time(upstream, elapsed)
@@ -0,0 +1,149 @@
+"""
+Email outbox: one pooled SMTP sender, plus a queue for mail sent later.
+
+``send_now`` delivers straight away (the welcome mail, whose route reports
+the outcome).  ``enqueue`` stores the rendered message as an ``email`` job
+on the durable queue (backend/jobs.py) for delayed mail such as check-ins;
+the worker drains due jobs in batches.  Both go through one ``Sender``,
+which keeps a single authenticated connection open between messages
+instead of repeating connect/STARTTLS/login for each one:
+
+* a connection idle longer than ``SMTP_IDLE_SECONDS`` is closed and
+  reopened before the next message;
+* a dropped connection is reopened and the message retried once; other
+  failures raise so the job queue retries with backoff.
+
+Tunables (environment)
+----------------------
+SMTP_HOST / SMTP_PORT   server                                (default smtp.gmail.com:587)
+SMTP_USER / SMTP_PASS   login and From address; unset disables email
+SMTP_STARTTLS           upgrade the connection with STARTTLS  (default 1)
+SMTP_TIMEOUT            socket timeout in seconds              (default 10)
+SMTP_IDLE_SECONDS       reuse a connection idle at most this  (default 60)
+"""
+
+import os
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from backend import jobs
+
+JOB_KIND = "email"
+
+# Errors that mean the connection, not the message, is the problem
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.1, float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def configured() -> bool:
+    return bool(os.getenv("SMTP_USER") and os.getenv("SMTP_PASS"))
+
+
+class Sender:
+    """One pooled SMTP connection, shared by whichever thread is delivering."""
+
+    def __init__(self):
+        self._conn: smtplib.SMTP | None = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"sent": 0, "failed": 0, "connections": 0, "reconnects": 0}
+
+    def _connect(self) -> smtplib.SMTP:
+        host = os.getenv("SMTP_HOST", "smtp.gmail.com")
+        port = int(os.getenv("SMTP_PORT", "587"))
+        conn = smtplib.SMTP(host, port, timeout=_env_float("SMTP_TIMEOUT", 10.0))
+        try:
+            if os.getenv("SMTP_STARTTLS", "1") != "0":
+                conn.starttls()
+            conn.login(os.getenv("SMTP_USER", ""), os.getenv("SMTP_PASS", ""))
+        except Exception:
+            conn.close()
+            raise
+        self._counters["connections"] += 1
+        return conn
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.quit()
+            except Exception:
+                conn.close()
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._conn is not None and time.monotonic() - self._last_used > _env_float("SMTP_IDLE_SECONDS", 60.0):
+            self._close()
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def send(self, to_email: str, subject: str, html: str):
+        sender = os.getenv("SMTP_USER", "")
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From']    = sender
+        msg['To']      = to_email
+        msg.attach(MIMEText(html, 'html'))
+        body = msg.as_string()
+
+        with self._lock:
+            try:
+                for attempt in range(2):
+                    try:
+                        self._connection().sendmail(sender, to_email, body)
+                        break
+                    except _CONNECTION_ERRORS:
+                        self._close()
+                        if attempt:
+                            raise
+                        self._counters["reconnects"] += 1
+            except Exception:
+                self._counters["failed"] += 1
+                raise
+            self._counters["sent"] += 1
+            self._last_used = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["open"] = int(self._conn is not None)
+        return out
+
+
+sender = Sender()
+
+
+def _deliver(to_email: str, subject: str, html: str):
+    if not configured():
+        return  # email was switched off after the message was queued
+    sender.send(to_email, subject, html)
+
+
+jobs.register(JOB_KIND, _deliver)
+
+
+def send_now(to_email: str, subject: str, html: str):
+    """Deliver a message during the request through the pooled connection; raises on failure."""
+    sender.send(to_email, subject, html)
+
+
+def enqueue(to_email: str, subject: str, html: str, delay: float = 0.0) -> int:
+    """Queue a message for delivery *delay* seconds from now; returns the job id."""
+    return jobs.enqueue(JOB_KIND, {"to_email": to_email, "subject": subject, "html": html}, delay=delay)
+
+
+def stats() -> dict:
+    return sender.stats()
@@ -0,0 +1,101 @@
+"""
+Field projection for catalog list responses.
+
+List endpoints return the compact ``card`` profile by default — just what
+a poster card renders (title, poster, year, rating, genres) — instead of
+whole TMDB/Jikan objects.  ``?fields=`` overrides it:
+
+    fields=card                      the default profile
+    fields=full                      unprojected upstream objects
+    fields=id,title,images.jpg.image_url
+
+Dotted paths reach into nested objects; when a step hits a list, the rest
+of the path is applied to each element (``genres.name``).  ``media_type``
+is always kept so mixed lists stay renderable.
+"""
+
+import re
+
+MAX_FIELDS = 50
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+CARD = "card"
+
+CARD_FIELDS = {
+    "movie": (
+        "id", "title", "poster_path", "backdrop_path", "release_date",
+        "vote_average", "vote_count", "genre_ids",
+    ),
+    "tv": (
+        "id", "name", "poster_path", "backdrop_path", "first_air_date",
+        "vote_average", "vote_count", "genre_ids",
+    ),
+    "anime": (
+        "mal_id", "title", "images.jpg.image_url", "images.jpg.large_image_url",
+        "score", "aired.from", "episodes", "genres.mal_id", "genres.name",
+    ),
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _tree(fields) -> dict:
+    tree: dict = {"media_type": True}
+    for field in fields:
+        node = tree
+        *parents, leaf = field.split(".")
+        for part in parents:
+            child = node.get(part)
+            if child is True:
+                break  # an ancestor is already selected whole
+            node = node.setdefault(part, {})
+        else:
+            node[leaf] = True
+    return tree
+
+
+_CARD_TREES = {kind: _tree(fields) for kind, fields in CARD_FIELDS.items()}
+
+
+def parse(fields_arg: str | None):
+    """
+    ``CARD`` for the default profile, ``None`` for no projection, otherwise a
+    field tree.  Raises ``InvalidFields`` for malformed input.
+    """
+    fields_arg = (fields_arg or "").strip()
+    if not fields_arg or fields_arg == CARD:
+        return CARD
+    if fields_arg == "full":
+        return None
+    fields = [f.strip() for f in fields_arg.split(",") if f.strip()]
+    if len(fields) > MAX_FIELDS or not all(_FIELD_RE.match(f) for f in fields):
+        raise InvalidFields("fields must be 'card', 'full' or a comma-separated list of field paths.")
+    return _tree(fields)
+
+
+def _select(value, tree: dict):
+    if isinstance(value, list):
+        return [_select(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return value
+    out = {}
+    for key, sub in tree.items():
+        if key not in value:
+            continue
+        out[key] = value[key] if sub is True else _select(value[key], sub)
+    return out
+
+
+def apply(items: list, spec, kind: str | None = None) -> list:
+    """Project *items*; with ``CARD``, each item's profile comes from *kind* or its ``media_type``."""
+    if spec is None:
+        return items
+    if spec != CARD:
+        return [_select(item, spec) for item in items]
+    out = []
+    for item in items:
+        tree = _CARD_TREES.get(kind or item.get("media_type"))
+        out.append(item if tree is None else _select(item, tree))
+    return out
@@ -0,0 +1,90 @@
+"""
+Materialized per-user recommendation lists.
+
+``recommend_for_user`` is expensive (history read, one TMDB call per seed,
+scoring).  The ranked list for (user_id, media_type) is stored together
+with a fingerprint of the user's history; later pages and repeat visits
+are sliced out of the stored list.  Any change to the history (a new row
+in ``watched``, a changed rating) changes the fingerprint and the entry is
+rebuilt on the next request.
+
+Pages are addressed with an opaque cursor (base64url JSON of the offset
+and the fingerprint the list was built from).  A cursor minted before the
+history changed no longer matches and is rejected, instead of silently
+shifting or repeating items across pages.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+
+from backend.cache import CacheEntry, MemoryLRU
+
+STORE_TTL = int(os.getenv("RECS_STORE_TTL", str(6 * 3600)))
+STORE_SIZE = int(os.getenv("RECS_STORE_SIZE", "1024"))
+
+
+def history_fingerprint(history: list[dict], media_type: str) -> str:
+    rows = sorted(
+        (int(w.get("media_id") or 0), w.get("rating") or 0)
+        for w in history
+        if w.get("media_type") == media_type
+    )
+    return hashlib.sha1(json.dumps(rows).encode()).hexdigest()[:16]
+
+
+class RecommendationStore:
+    def __init__(self, maxsize: int = STORE_SIZE, ttl: int = STORE_TTL):
+        self.ttl = ttl
+        self._lru = MemoryLRU(maxsize)
+
+    @staticmethod
+    def _key(user_id: str, media_type: str) -> str:
+        return f"{user_id}:{media_type}"
+
+    def get(self, user_id: str, media_type: str, fingerprint: str):
+        """Return the stored list if it was built from the same history, else None."""
+        entry = self._lru.get(self._key(user_id, media_type))
+        if entry is None or not entry.is_fresh(time.time()):
+            return None
+        stored = json.loads(entry.value)
+        if stored["fingerprint"] != fingerprint:
+            return None
+        return stored["results"]
+
+    def put(self, user_id: str, media_type: str, fingerprint: str, results: list[dict]):
+        now = time.time()
+        body = json.dumps({"fingerprint": fingerprint, "results": results}).encode()
+        self._lru.set(self._key(user_id, media_type), CacheEntry(body, 200, now + self.ttl, now + self.ttl))
+
+    def invalidate(self, user_id: str, media_type: str):
+        self._lru.delete(self._key(user_id, media_type))
+
+
+store = RecommendationStore()
+
+
+# ── cursors ───────────────────────────────────────────────────────────────────
+
+def encode_cursor(offset: int, fingerprint: str | None = None) -> str:
+    data = {"o": offset}
+    if fingerprint:
+        data["f"] = fingerprint
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return the (offset, fingerprint) encoded in *cursor*, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+        fingerprint = data.get("f")
+        if offset < 0 or not isinstance(fingerprint, (str, type(None))):
+            return None
+        return offset, fingerprint
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
@@ -5,38 +5,77 @@ Strategy
 --------
 1. Fetch user's watched items + ratings from Supabase (up to 50 most recent).
 2. Split into seeds: rated (sorted by rating desc) then unrated, capped at 8 seeds.
-3. For each seed fetch TMDB /recommendations + /similar in parallel (max 4 workers).
+3. For each seed fetch TMDB details with append_to_response=recommendations,similar
+   in parallel on the shared worker pool (backend/workers.py) — one round trip
+   yields genres, recs and similar.
 4. Score every candidate that appears across seeds:
      freq_score   = how many seeds surfaced it  (0–1)
      weight_score = avg of seed ratings normalised to 0–1
      genre_score  = genre overlap with user's preferred genres  (0–1)
      quality      = TMDB vote_average × capped vote_count  (0–1)
      final = 0.40·freq + 0.25·weight + 0.25·genre + 0.10·quality
+   Seeds present in the local similarity index (backend/similarity_index.py)
+   are answered from it without any TMDB call.
+   Scoring is columnar (NumPy): features for every candidate are computed as
+   arrays and weighted in one matrix-vector product; top-N via argpartition.
 5. Remove already-watched items, return top-N sorted by final score.
 
 Falls back to pure TMDB passthrough when no history exists.
 """
 
 import os
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from backend import similarity_index, tmdb, upstream, workers
+from backend.rec_store import history_fingerprint
 
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
 _TIMEOUT = 8
+# Candidate pool depth: items kept per list, and pages of /recommendations
+# and /similar per seed (page 1 arrives with the seed's append_to_response call)
+# (default 12, the original per-list cut, so rankings match the pre-columnar scorer)
+_PER_LIST = int(os.getenv("RECS_PER_LIST", "12"))
+_SEED_PAGES = max(1, int(os.getenv("RECS_SEED_PAGES", "1")))
+# freq, weight, genre, quality
+_SCORE_WEIGHTS = np.array([0.40, 0.25, 0.25, 0.10])
 
 
 # ── helpers ───────────────────────────────────────────────────────────────────
 
 def _tmdb(path: str, api_key: str, **params) -> dict:
-    params["api_key"] = api_key
     try:
-        r = requests.get(f"{TMDB_BASE_URL}{path}", params=params, timeout=_TIMEOUT)
-        r.raise_for_status()
-        return r.json()
+        return tmdb.fetch(path, api_key, timeout=_TIMEOUT, **params)
     except Exception:
         return {}
 
 
+def _fetch_seed(media_type: str, media_id: int, api_key: str) -> dict:
+    """Details + page 1 of /recommendations and /similar in a single round trip."""
+    return _tmdb(
+        f"/{media_type}/{media_id}",
+        api_key,
+        append_to_response="recommendations,similar",
+    )
+
+
+def _seed_payload(media_type: str, media_id: int, api_key: str) -> tuple[dict, bool]:
+    """
+    Seed genres + neighbour lists, shaped like the TMDB append_to_response body.
+    The local similarity index answers first; TMDB only on a miss, and those
+    responses are logged so the next index build covers this seed.
+    Returns (payload, served_locally).
+    """
+    neighbours = similarity_index.index.neighbours(media_type, media_id)
+    seed = similarity_index.index.item(media_type, media_id) if neighbours else None
+    if neighbours and seed is not None:
+        genres = [{"id": g} for g in seed.get("genre_ids", [])]
+        return {"genres": genres, "recommendations": {"results": neighbours}}, True
+    detail = _fetch_seed(media_type, media_id, api_key)
+    similarity_index.record_tmdb(media_type, media_id, detail)
+    return detail, False
+
+
 def _supa_fetch(table: str, supa_url: str, supa_key: str, **filters) -> list:
     """Read rows from a Supabase table via the REST API."""
     headers = {
@@ -45,7 +84,7 @@ def _supa_fetch(table: str, supa_url: str, supa_key: str, **filters) -> list:
     }
     params = {k: v for k, v in filters.items()}
     try:
-        r = requests.get(
+        r = upstream.get(
             f"{supa_url}/rest/v1/{table}",
             headers=headers,
             params=params,
@@ -84,15 +123,37 @@ def recommend_for_user(
     supa_url: str,
     supa_key: str,
     limit: int = 24,
-) -> list[dict]:
+    store=None,
+    with_fingerprint: bool = False,
+):
     """
     Build personalised recommendations for *user_id* filtered to *media_type*.
     Returns a ranked list of TMDB item dicts (with media_type injected).
     Returns [] if the user has no relevant history — caller should fall back.
+
+    With a *store* (see backend/rec_store.py) the ranked list is reused for
+    as long as the user's history fingerprint is unchanged.  With
+    *with_fingerprint* the result is ``(results, fingerprint)`` so pages can
+    be tied to the history they were cut from (fingerprint None without history).
     """
     history = get_user_history(user_id, supa_url, supa_key)
     if not history:
-        return []
+        return ([], None) if with_fingerprint else []
+
+    fingerprint = history_fingerprint(history, media_type)
+    if store is None:
+        results = _rank_history(history, media_type, api_key, limit)
+    else:
+        results = store.get(user_id, media_type, fingerprint)
+        if results is None:
+            results = _rank_history(history, media_type, api_key, limit)
+            if results:
+                store.put(user_id, media_type, fingerprint, results)
+        results = results[:limit]
+    return (results, fingerprint) if with_fingerprint else results
+
+
+def _rank_history(history: list[dict], media_type: str, api_key: str, limit: int) -> list[dict]:
 
     # Build set of already-watched IDs so we can exclude them
     watched_ids: set[int] = {
@@ -108,80 +169,114 @@ def recommend_for_user(
     unrated = [s for s in seeds if not s.get("rating")]
     ordered_seeds = (rated + unrated)[:8]
 
-    # Fetch genre preferences from top-rated seeds (quick parallel TMDB calls)
+    # One TMDB call per seed returns details (genres) + recommendations + similar
     preferred_genres: dict[int, float] = {}
+    seed_results: list[tuple[list[dict], float]] = []
+    genre_seed_count = min(len(rated), 5)
 
-    def _fetch_genres(seed: dict):
-        detail = _tmdb(f"/{media_type}/{seed['media_id']}", api_key)
-        weight = (seed.get("rating") or 3) / 5.0
-        return [(g["id"], weight) for g in detail.get("genres", [])]
-
-    with ThreadPoolExecutor(max_workers=4) as ex:
-        for genre_list in ex.map(_fetch_genres, rated[:5]):
-            for gid, w in genre_list:
-                preferred_genres[gid] = preferred_genres.get(gid, 0.0) + w
-
-    max_genre_val = max(preferred_genres.values(), default=1.0)
-
-    # Fetch TMDB recs + similar for each seed
-    candidate_map: dict[int, dict] = {}
-
-    def _fetch_seed_recs(seed: dict):
+    def _fetch_seed_recs(index: int, seed: dict):
         rating_weight = (seed.get("rating") or 3) / 5.0
+        detail, local = _seed_payload(media_type, seed["media_id"], api_key)
+        genres = []
+        if index < genre_seed_count:
+            genres = [(g["id"], rating_weight) for g in detail.get("genres", [])]
+        pages = {endpoint: [detail.get(endpoint) or {}] for endpoint in ("recommendations", "similar")}
+        for page in range(2, 1 if local else _SEED_PAGES + 1):
+            for endpoint in pages:
+                pages[endpoint].append(
+                    _tmdb(f"/{media_type}/{seed['media_id']}/{endpoint}", api_key, page=page)
+                )
         items = []
-        for endpoint in ("recommendations", "similar"):
-            data = _tmdb(f"/{media_type}/{seed['media_id']}/{endpoint}", api_key, page=1)
-            for item in data.get("results", [])[:12]:
-                item["media_type"] = media_type
+        for endpoint, payloads in pages.items():
+            for payload in payloads:
+                for item in payload.get("results", [])[:_PER_LIST]:
+                    item["media_type"] = media_type
+                    items.append(item)
+        return items, genres, rating_weight
+
+    # Seeds another instance already fetched come back from the shared cache tier in one read
+    tmdb.warm([(f"/{media_type}/{s['media_id']}", {"append_to_response": "recommendations,similar"})
+               for s in ordered_seeds])
+    futures = workers.submit_all("recommendations", _fetch_seed_recs, enumerate(ordered_seeds))
+    for future in as_completed(futures):
+        try:
+            recs, genres, rating_weight = future.result()
+        except Exception:
+            continue
+        for gid, w in genres:
+            preferred_genres[gid] = preferred_genres.get(gid, 0.0) + w
+        seed_results.append((recs, rating_weight))
+
+    return _score_candidates(seed_results, watched_ids, preferred_genres, limit)
+
+
+def _score_candidates(
+    seed_results: list[tuple[list[dict], float]],
+    watched_ids: set[int],
+    preferred_genres: dict[int, float],
+    limit: int,
+) -> list[dict]:
+    """
+    Columnar scoring: one row per distinct candidate, features in NumPy
+    arrays, final score as a single matrix-vector product.  Ties keep
+    first-seen order, exactly like the stable sort this replaced.
+    """
+    index_of: dict[int, int] = {}
+    items: list[dict] = []
+    occ_idx: list[int] = []
+    occ_weight: list[float] = []
+    for recs, rating_weight in seed_results:
+        for item in recs:
+            iid = item.get("id")
+            if not iid or iid in watched_ids:
+                continue
+            row = index_of.get(iid)
+            if row is None:
+                row = index_of[iid] = len(items)
                 items.append(item)
-        return items, rating_weight
-
-    with ThreadPoolExecutor(max_workers=4) as ex:
-        futures = {ex.submit(_fetch_seed_recs, seed): seed for seed in ordered_seeds}
-        for future in as_completed(futures):
-            try:
-                recs, rating_weight = future.result()
-                for item in recs:
-                    iid = item.get("id")
-                    if not iid or iid in watched_ids:
-                        continue
-                    if iid not in candidate_map:
-                        candidate_map[iid] = {
-                            "item": item,
-                            "freq": 0,
-                            "weight_sum": 0.0,
-                            "count": 0,
-                        }
-                    candidate_map[iid]["freq"]       += 1
-                    candidate_map[iid]["weight_sum"] += rating_weight
-                    candidate_map[iid]["count"]      += 1
-            except Exception:
-                pass
-
-    if not candidate_map:
-        return []
-
-    max_freq = max(c["freq"] for c in candidate_map.values())
-
-    scored: list[tuple[float, dict]] = []
-    for data in candidate_map.values():
-        item = data["item"]
+            occ_idx.append(row)
+            occ_weight.append(rating_weight)
 
-        freq_score  = data["freq"] / max_freq
-        avg_weight  = data["weight_sum"] / data["count"]
-
-        vote_avg    = item.get("vote_average", 0) / 10.0
-        vote_cnt    = min(item.get("vote_count", 0), 1000) / 1000.0
-        quality     = vote_avg * vote_cnt
-
-        genre_raw   = sum(preferred_genres.get(g, 0.0) for g in item.get("genre_ids", []))
-        genre_score = min(genre_raw / (max_genre_val * 3), 1.0)
-
-        final = freq_score * 0.40 + avg_weight * 0.25 + genre_score * 0.25 + quality * 0.10
-        scored.append((final, item))
+    n = len(items)
+    if not n:
+        return []
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [item for _, item in scored[:limit]]
+    occ = np.asarray(occ_idx, dtype=np.intp)
+    freq = np.bincount(occ, minlength=n).astype(np.float64)
+    weight_sum = np.bincount(occ, weights=occ_weight, minlength=n)
+
+    vote_avg = np.fromiter((it.get("vote_average", 0) for it in items), np.float64, n) / 10.0
+    vote_cnt = np.minimum(np.fromiter((it.get("vote_count", 0) for it in items), np.float64, n), 1000) / 1000.0
+
+    # Candidate × preferred-genre overlap matrix
+    genre_col = {gid: j for j, gid in enumerate(preferred_genres)}
+    pref = np.fromiter(preferred_genres.values(), np.float64, len(genre_col))
+    overlap = np.zeros((n, len(genre_col)), dtype=np.float64)
+    rows, cols = [], []
+    for row, item in enumerate(items):
+        for g in item.get("genre_ids", []):
+            col = genre_col.get(g)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    np.add.at(overlap, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    max_genre_val = pref.max() if len(pref) else 1.0
+
+    features = np.column_stack((
+        freq / freq.max(),                                           # freq_score
+        weight_sum / freq,                                           # avg seed weight
+        np.minimum(overlap @ pref / (max_genre_val * 3), 1.0),       # genre_score
+        vote_avg * vote_cnt,                                         # quality
+    ))
+    scores = features @ _SCORE_WEIGHTS
+
+    if n > limit:
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        keep = np.flatnonzero(scores >= scores[top].min())  # include boundary ties
+    else:
+        keep = np.arange(n)
+    order = keep[np.lexsort((keep, -scores[keep]))][:limit]
+    return [items[i] for i in order]
 
 
 def recommend_content_based(
@@ -198,9 +293,9 @@ def recommend_content_based(
     seen: set[int] = set()
     results: list[dict] = []
 
+    detail, _ = _seed_payload(media_type, media_id, api_key)
     for endpoint in ("recommendations", "similar"):
-        data = _tmdb(f"/{media_type}/{media_id}/{endpoint}", api_key, page=1)
-        for item in data.get("results", []):
+        for item in (detail.get(endpoint) or {}).get("results", []):
             iid = item.get("id")
             if iid and iid not in seen:
                 seen.add(iid)
@@ -0,0 +1,145 @@
+"""
+Shared Redis-protocol backend for state that must agree across serverless
+instances: the rate limiter's counters and the response caches' second tier.
+
+With ``REDIS_URL`` (or Vercel's ``KV_URL``) set and the optional ``redis``
+package installed:
+
+* ``limiter_storage_uri()`` points flask-limiter at the store; the limiter
+  keeps an in-memory fallback for when it is unreachable.
+* ``RedisStore`` is a ``TieredCache`` second tier (see backend/cache.py),
+  so a cold instance starts from what the others already fetched.
+  ``get_many`` reads a batch of keys in one MGET round trip.
+
+An unreachable store never fails a request: calls are skipped for
+``REDIS_RETRY_SECONDS`` after a connection error and caches act as
+memory-only in the meantime.
+
+Tunables (environment)
+----------------------
+REDIS_URL               redis:// or rediss:// URL              (default: off)
+RATELIMIT_STORAGE_URI   overrides the limiter's storage          (default: REDIS_URL)
+REDIS_TIMEOUT           socket timeout in seconds                (default 0.25)
+REDIS_RETRY_SECONDS     back-off after a connection error        (default 30)
+"""
+
+import os
+import struct
+import threading
+import time
+
+from backend.cache import CacheEntry
+
+try:
+    import redis
+except ImportError:  # optional
+    redis = None
+
+REDIS_URL = os.getenv("REDIS_URL") or os.getenv("KV_URL")
+
+# status, fresh_until, stale_until, then the body
+_HEADER = struct.Struct("!Hdd")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.01, float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def limiter_storage_uri() -> str:
+    uri = os.getenv("RATELIMIT_STORAGE_URI") or REDIS_URL
+    if not uri or (uri.startswith(("redis://", "rediss://")) and redis is None):
+        return "memory://"
+    return uri
+
+
+def encode_entry(entry: CacheEntry) -> bytes:
+    return _HEADER.pack(entry.status, entry.fresh_until, entry.stale_until) + entry.value
+
+
+def decode_entry(raw: bytes) -> CacheEntry:
+    status, fresh_until, stale_until = _HEADER.unpack_from(raw)
+    return CacheEntry(raw[_HEADER.size:], status, fresh_until, stale_until)
+
+
+class RedisStore:
+    """Second cache tier in a Redis-protocol store.  Keys expire with the entry."""
+
+    def __init__(self, client, prefix: str, retry_seconds: float = 30.0):
+        self.client = client
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        self.evictions = 0
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"reads": 0, "batched_reads": 0, "writes": 0, "errors": 0, "skipped": 0}
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str) -> "RedisStore":
+        timeout = _env_float("REDIS_TIMEOUT", 0.25)
+        client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        return cls(client, prefix, retry_seconds=_env_float("REDIS_RETRY_SECONDS", 30.0))
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def available(self) -> bool:
+        if time.monotonic() < self._down_until:
+            self._count("skipped")
+            return False
+        return True
+
+    def _failed(self):
+        self._count("errors")
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def _call(self, fn, default):
+        if not self.available():
+            return default
+        try:
+            return fn()
+        except Exception:
+            self._failed()
+            return default
+
+    def get(self, key: str):
+        self._count("reads")
+        raw = self._call(lambda: self.client.get(self.prefix + key), None)
+        return decode_entry(raw) if raw else None
+
+    def get_many(self, keys: list[str]) -> dict:
+        """One MGET for all *keys*; returns ``{key: CacheEntry}`` for the hits."""
+        if not keys:
+            return {}
+        self._count("batched_reads")
+        raws = self._call(lambda: self.client.mget([self.prefix + k for k in keys]), None) or []
+        return {key: decode_entry(raw) for key, raw in zip(keys, raws) if raw}
+
+    def set(self, key: str, entry: CacheEntry):
+        ttl_ms = int((entry.stale_until - time.time()) * 1000)
+        if ttl_ms <= 0:
+            return
+        self._count("writes")
+        self._call(lambda: self.client.set(self.prefix + key, encode_entry(entry), px=ttl_ms), None)
+
+    def delete(self, key: str):
+        self._call(lambda: self.client.delete(self.prefix + key), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+        out["up"] = time.monotonic() >= self._down_until
+        return out
+
+
+def cache_store(prefix: str):
+    """A ``RedisStore`` under *prefix* when a shared store is configured, else None."""
+    if not REDIS_URL or redis is None:
+        return None
+    try:
+        return RedisStore.from_url(REDIS_URL, f"watchnext:{prefix}:")
+    except Exception:
+        return None
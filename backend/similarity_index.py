@@ -0,0 +1,353 @@
+"""
+Local item-to-item similarity index.
+
+Neighbour lists are stored per media type as CSR-style NumPy arrays and
+opened with ``mmap_mode="r"``, so a lookup is a binary search plus a slice
+— no upstream calls.  Files in SIMILARITY_INDEX_DIR (default data/similarity):
+
+    {type}.keys.npy        int64   sorted source item ids
+    {type}.indptr.npy      int64   row offsets into neighbours/weights
+    {type}.neighbors.npy   int64   neighbour ids, each row sorted by weight desc
+    {type}.weights.npy     float32 neighbour weights
+    {type}.items.json      card metadata for every id that appears above
+
+Edges come from two sources:
+
+* TMDB /recommendations + /similar payloads the recommender already fetches.
+  They are appended to ``observations.jsonl`` as they are seen (only once
+  the index directory exists — create it to start collecting).  A build
+  first renames that log aside, so lines appended while it runs go to a
+  fresh log, and compacts what it read into ``observations.base.jsonl``.
+* Co-occurrence in the Supabase ``watched`` table (items watched by the same
+  user), read at build time.
+
+Build offline (cron / deploy step):
+
+    python -m backend.similarity_index build
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_DIR = Path(os.getenv("SIMILARITY_INDEX_DIR", str(ROOT / "data" / "similarity")))
+MEDIA_TYPES = ("movie", "tv")
+MAX_NEIGHBOURS = 50
+OBSERVATION_LOG = "observations.jsonl"
+OBSERVATION_BASE = "observations.base.jsonl"
+RELOAD_CHECK_SECONDS = 60
+
+# Card fields kept for neighbours — enough to render a grid tile and score it
+CARD_FIELDS = (
+    "id", "title", "name", "poster_path", "backdrop_path", "overview",
+    "release_date", "first_air_date", "vote_average", "vote_count",
+    "popularity", "genre_ids", "original_language",
+)
+
+TMDB_EDGE_WEIGHTS = {"recommendations": 1.0, "similar": 0.5}
+COOCCURRENCE_WEIGHT = 1.0
+
+
+def _card(item: dict) -> dict:
+    return {k: item[k] for k in CARD_FIELDS if k in item}
+
+
+# ── read side ─────────────────────────────────────────────────────────────────
+
+class SimilarityIndex:
+    """Read-only view over the memory-mapped index files; reloads when rebuilt."""
+
+    def __init__(self, path: Path = INDEX_DIR):
+        self.path = Path(path)
+        self._tables: dict[str, tuple] = {}
+        self._items: dict[str, dict] = {}
+        self._loaded_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _stamp(self):
+        try:
+            return max((self.path / f"{mt}.keys.npy").stat().st_mtime for mt in MEDIA_TYPES
+                       if (self.path / f"{mt}.keys.npy").exists())
+        except ValueError:
+            return None
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_SECONDS and self._checked_at:
+            return
+        with self._lock:
+            self._checked_at = now
+            stamp = self._stamp()
+            if stamp == self._loaded_mtime:
+                return
+            tables, items = {}, {}
+            for mt in MEDIA_TYPES:
+                try:
+                    tables[mt] = tuple(
+                        np.load(self.path / f"{mt}.{name}.npy", mmap_mode="r")
+                        for name in ("keys", "indptr", "neighbors", "weights")
+                    )
+                    with open(self.path / f"{mt}.items.json", encoding="utf-8") as fh:
+                        items[mt] = json.load(fh)
+                except (OSError, ValueError):
+                    continue
+            self._tables, self._items, self._loaded_mtime = tables, items, stamp
+
+    def item(self, media_type: str, media_id: int):
+        self._maybe_reload()
+        card = self._items.get(media_type, {}).get(str(media_id))
+        return dict(card, media_type=media_type) if card else None
+
+    def neighbours(self, media_type: str, media_id: int, limit: int = MAX_NEIGHBOURS):
+        """Neighbour item dicts (fresh copies, best first), or None on a miss."""
+        self._maybe_reload()
+        table = self._tables.get(media_type)
+        if table is None:
+            self.misses += 1
+            return None
+        keys, indptr, neighbors, _ = table
+        row = int(np.searchsorted(keys, media_id))
+        if row >= len(keys) or keys[row] != media_id:
+            self.misses += 1
+            return None
+        cards = self._items.get(media_type, {})
+        out = []
+        for nid in neighbors[indptr[row]:indptr[row + 1]]:
+            card = cards.get(str(int(nid)))
+            if card:
+                out.append(dict(card, media_type=media_type))
+                if len(out) >= limit:
+                    break
+        if not out:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rows": {mt: int(len(t[0])) for mt, t in self._tables.items()},
+        }
+
+
+index = SimilarityIndex()
+
+
+# ── observation log ───────────────────────────────────────────────────────────
+
+_log_lock = threading.Lock()
+_recorded: set[tuple[str, int]] = set()
+_RECORDED_MAX = 10_000
+
+
+def record_tmdb(media_type: str, media_id: int, detail: dict):
+    """
+    Append the recommendations/similar lists from a seed fetch to the
+    observation log.  Best effort: read-only filesystems are ignored.
+    """
+    if media_type not in MEDIA_TYPES or not detail or not INDEX_DIR.is_dir():
+        return
+    key = (media_type, int(media_id))
+    with _log_lock:
+        if key in _recorded:
+            return
+        if len(_recorded) >= _RECORDED_MAX:
+            _recorded.clear()
+        _recorded.add(key)
+    seed = dict(_card(detail), genre_ids=[g["id"] for g in detail.get("genres", []) if "id" in g])
+    entry = {"t": media_type, "id": int(media_id), "seed": seed}
+    for endpoint in TMDB_EDGE_WEIGHTS:
+        entry[endpoint] = [_card(i) for i in (detail.get(endpoint) or {}).get("results", []) if i.get("id")]
+    if not entry["recommendations"] and not entry["similar"]:
+        return
+    line = json.dumps(entry, separators=(",", ":")) + "\n"
+    try:
+        with _log_lock:
+            with open(INDEX_DIR / OBSERVATION_LOG, "a", encoding="utf-8") as fh:
+                fh.write(line)
+    except OSError:
+        pass
+
+
+# ── build side ────────────────────────────────────────────────────────────────
+
+class IndexBuilder:
+    def __init__(self):
+        self.edges = {mt: defaultdict(lambda: defaultdict(float)) for mt in MEDIA_TYPES}
+        self.items: dict[str, dict] = {mt: {} for mt in MEDIA_TYPES}
+
+    def add_tmdb(self, media_type: str, media_id: int, lists: dict, seed: dict | None = None):
+        """*lists* maps "recommendations"/"similar" to lists of TMDB items."""
+        if seed:
+            self.items[media_type][str(media_id)] = _card(seed)
+        row = self.edges[media_type][int(media_id)]
+        for endpoint, base in TMDB_EDGE_WEIGHTS.items():
+            results = lists.get(endpoint) or []
+            for rank, item in enumerate(results):
+                nid = item.get("id")
+                if not nid or nid == media_id:
+                    continue
+                # Earlier positions are stronger signals
+                row[int(nid)] += base * (1.0 - 0.5 * rank / max(len(results), 1))
+                self.items[media_type].setdefault(str(nid), _card(item))
+
+    def add_cooccurrence(self, rows: list[dict]):
+        """*rows* are ``watched`` rows: {user_id, media_id, media_type}."""
+        per_user = defaultdict(lambda: defaultdict(set))
+        for r in rows:
+            if r.get("media_type") in MEDIA_TYPES and r.get("media_id"):
+                per_user[r["user_id"]][r["media_type"]].add(int(r["media_id"]))
+        for by_type in per_user.values():
+            for mt, ids in by_type.items():
+                if len(ids) < 2:
+                    continue
+                # Damp heavy users so one binge-watcher doesn't dominate
+                w = COOCCURRENCE_WEIGHT / math.log2(len(ids) + 1)
+                for a, b in combinations(sorted(ids), 2):
+                    self.edges[mt][a][b] += w
+                    self.edges[mt][b][a] += w
+
+    def write(self, path: Path = INDEX_DIR) -> dict:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        summary = {}
+        for mt in MEDIA_TYPES:
+            cards = self.items[mt]
+            keys, indptr, neighbors, weights = [], [0], [], []
+            for src in sorted(self.edges[mt]):
+                # Only neighbours we can render are useful at serve time
+                row = [(w, n) for n, w in self.edges[mt][src].items() if str(n) in cards]
+                if not row:
+                    continue
+                row.sort(key=lambda x: (-x[0], x[1]))
+                row = row[:MAX_NEIGHBOURS]
+                keys.append(src)
+                neighbors.extend(n for _, n in row)
+                weights.extend(w for w, _ in row)
+                indptr.append(len(neighbors))
+            arrays = {
+                "keys": np.asarray(keys, dtype=np.int64),
+                "indptr": np.asarray(indptr, dtype=np.int64),
+                "neighbors": np.asarray(neighbors, dtype=np.int64),
+                "weights": np.asarray(weights, dtype=np.float32),
+            }
+            # Write everything to temp names first, then swap into place
+            for name, arr in arrays.items():
+                with open(path / f"{mt}.{name}.npy.tmp", "wb") as fh:
+                    np.save(fh, arr)
+            with open(path / f"{mt}.items.json.tmp", "w", encoding="utf-8") as fh:
+                json.dump(cards, fh, separators=(",", ":"))
+            for name in ("indptr", "neighbors", "weights"):
+                os.replace(path / f"{mt}.{name}.npy.tmp", path / f"{mt}.{name}.npy")
+            os.replace(path / f"{mt}.items.json.tmp", path / f"{mt}.items.json")
+            os.replace(path / f"{mt}.keys.npy.tmp", path / f"{mt}.keys.npy")
+            summary[mt] = {"rows": len(keys), "edges": len(neighbors)}
+        return summary
+
+
+def _rotated_logs(path: Path) -> list[Path]:
+    # Logs set aside by builds, oldest first (one left behind by a failed build is kept)
+    return sorted(Path(path).glob(f"{OBSERVATION_LOG}.*.rotated"))
+
+
+def _rotate_log(path: Path) -> list[Path]:
+    """Move the live log aside so appends during a build start a fresh one."""
+    live = Path(path) / OBSERVATION_LOG
+    if live.exists():
+        os.replace(live, Path(path) / f"{OBSERVATION_LOG}.{time.time_ns()}.rotated")
+    return _rotated_logs(path)
+
+
+def load_observations(path: Path = INDEX_DIR) -> dict:
+    """Latest observation per (media_type, id): compacted base, then rotated logs, then the live log."""
+    latest = {}
+    path = Path(path)
+    for log in [path / OBSERVATION_BASE, *_rotated_logs(path), path / OBSERVATION_LOG]:
+        if not log.exists():
+            continue
+        with open(log, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                    latest[(entry["t"], entry["id"])] = entry
+                except (ValueError, KeyError):
+                    continue
+    return latest
+
+
+def _fetch_watched_rows(supa_url: str, supa_key: str, page_size: int = 1000) -> list[dict]:
+    from backend import upstream
+
+    headers = {"apikey": supa_key, "Authorization": f"Bearer {supa_key}"}
+    rows, offset = [], 0
+    while True:
+        r = upstream.get(
+            f"{supa_url}/rest/v1/watched",
+            headers=headers,
+            params={"select": "user_id,media_id,media_type", "order": "id",
+                    "limit": str(page_size), "offset": str(offset)},
+            timeout=30,
+        )
+        r.raise_for_status()
+        batch = r.json() or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        offset += page_size
+
+
+def build(path: Path = INDEX_DIR, include_watched: bool = True) -> dict:
+    builder = IndexBuilder()
+    rotated = _rotate_log(path)
+    observations = load_observations(path)
+    for (mt, mid), entry in observations.items():
+        builder.add_tmdb(mt, mid, entry, seed=entry.get("seed"))
+    if include_watched:
+        supa_url = os.getenv("SUPABASE_URL", "https://lqlqurgthkdknxwwgygx.supabase.co")
+        supa_key = os.getenv("SUPABASE_SERVICE_KEY", "")
+        if supa_key:
+            builder.add_cooccurrence(_fetch_watched_rows(supa_url, supa_key))
+    summary = builder.write(path)
+
+    # Compact what was read down to the latest observation per seed.  Writers only
+    # ever append to the live log, so nothing they add during the build is replaced.
+    if observations:
+        tmp = Path(path) / f"{OBSERVATION_BASE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for entry in observations.values():
+                fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(tmp, Path(path) / OBSERVATION_BASE)
+    for log in rotated:
+        log.unlink(missing_ok=True)
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the local item-item similarity index.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--dir", default=str(INDEX_DIR))
+    parser.add_argument("--no-watched", action="store_true",
+                        help="skip co-occurrence from the Supabase watched table")
+    args = parser.parse_args(argv)
+    summary = build(Path(args.dir), include_watched=not args.no_watched)
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
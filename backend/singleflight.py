@@ -0,0 +1,113 @@
+"""
+Request coalescing ("singleflight").
+
+Concurrent callers asking for the same key share one in-flight call: the
+first caller (the leader) runs it, everyone else waits for its result or
+re-raises its exception.  Nothing is remembered once the call finishes —
+that is the cache's job.
+
+A follower waits at most *wait* seconds (pass the caller's own timeout);
+if the leader has not finished by then it stops waiting and runs the call
+itself, so one hung leader cannot hold every coalesced thread.
+
+``submit`` is the non-blocking form: the call runs on an executor and every
+concurrent caller gets the same Future, to wait on with its own timeout.
+"""
+
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self):
+        self._calls: dict = {}
+        self._shared: dict = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "collapsed": 0, "wait_timeouts": 0}
+
+    def do(self, key, fn, *args, wait: float | None = None, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["collapsed"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["leaders"] += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(wait):
+                with self._lock:
+                    self._counters["wait_timeouts"] += 1
+                return fn(*args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def submit(self, key, executor, fn, *args, **kwargs):
+        with self._lock:
+            future = self._shared.get(key)
+            if future is not None:
+                self._counters["collapsed"] += 1
+                return future
+            self._counters["leaders"] += 1
+            future = executor.submit(fn, *args, **kwargs)
+            self._shared[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._shared.get(key) is future:
+                del self._shared[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._shared)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["in_flight"] = len(self._calls) + len(self._shared)
+        return out
+
+
+def request_key(method: str, url: str, params=None, headers=None) -> tuple:
+    """
+    (method, host, path, normalized params, auth fingerprint).
+    Query-string params and ``params=`` are merged and sorted so that
+    equivalent spellings of the same request collapse together.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        query.extend((str(k), str(v)) for k, v in items)
+    auth = None
+    if headers:
+        auth = (headers.get("apikey"), headers.get("Authorization"))
+    return (method, parts.netloc, parts.path, tuple(sorted(query)), hash(auth))
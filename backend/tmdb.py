@@ -0,0 +1,186 @@
+"""
+Cached TMDB fetch shared by ``app.tmdb_get`` and ``recommender._tmdb``.
+
+Every path is mapped to a TTL class (genres barely change, search results
+churn).  Within ``fresh`` seconds an entry is served as-is; for a further
+``swr`` seconds it is served stale while one background refresh runs, so
+hot keys never wait on TMDB.  404s are cached briefly as negative entries.
+While TMDB's circuit breaker is open (backend/breaker.py) a miss is
+answered with the last copy held, however old, when there is one.
+
+Tunables (environment)
+----------------------
+TMDB_BASE_URL     override the API root (used by local stand-ins)
+TMDB_CACHE_SIZE   in-process LRU entries                   (default 2048)
+TMDB_CACHE_DB     SQLite file for the persistent tier      (default: off;
+                  ignored when REDIS_URL provides a shared tier)
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+from backend import shared_store, upstream
+from backend.breaker import CircuitOpen
+from backend.cache import CacheEntry, MemoryLRU, SQLiteStore, TieredCache
+
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# (name, pattern, fresh seconds, stale-while-revalidate seconds) — first match wins
+TTL_CLASSES = [
+    ("genres",    re.compile(r"^/genre/"),                                        7 * DAY,  DAY),
+    ("search",    re.compile(r"^/search/"),                                       10 * MINUTE, 10 * MINUTE),
+    ("trending",  re.compile(r"^/trending/"),                                     HOUR,     HOUR),
+    ("lists",     re.compile(r"^/(movie|tv)/(popular|top_rated|upcoming|now_playing|on_the_air|airing_today)$"),
+                                                                                  HOUR,     6 * HOUR),
+    ("discover",  re.compile(r"^/discover/"),                                     HOUR,     HOUR),
+    ("related",   re.compile(r"^/(movie|tv)/\d+/(recommendations|similar)$"),     6 * HOUR, DAY),
+    ("providers", re.compile(r"^/(movie|tv)/\d+/watch/providers$"),               6 * HOUR, DAY),
+    ("reviews",   re.compile(r"^/(movie|tv)/\d+/reviews$"),                       6 * HOUR, DAY),
+    ("details",   re.compile(r"^/(movie|tv|person)/\d+(/[a-z_]+)?$"),             DAY,      DAY),
+]
+DEFAULT_TTL = ("default", None, 15 * MINUTE, 15 * MINUTE)
+NEGATIVE_TTL = 10 * MINUTE
+
+
+def ttl_class(path: str) -> tuple:
+    for cls in TTL_CLASSES:
+        if cls[1].search(path):
+            return cls
+    return DEFAULT_TTL
+
+
+def cache_key(path: str, params: dict) -> str:
+    """Stable key: path plus sorted params, never including the API key."""
+    items = sorted((k, str(v)) for k, v in params.items() if k != "api_key")
+    return path + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+
+def _build_cache() -> TieredCache:
+    try:
+        size = max(16, int(os.getenv("TMDB_CACHE_SIZE", "2048")))
+    except ValueError:
+        size = 2048
+    second = shared_store.cache_store("tmdb")
+    db_path = os.getenv("TMDB_CACHE_DB")
+    if second is None and db_path:
+        try:
+            second = SQLiteStore(db_path)
+        except Exception:
+            second = None
+    return TieredCache(MemoryLRU(size), second)
+
+
+cache = _build_cache()
+
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+# ── fetch ─────────────────────────────────────────────────────────────────────
+
+def _fetch_upstream(key: str, path: str, params: dict, timeout) -> CacheEntry:
+    response = upstream.get(f"{TMDB_BASE_URL}{path}", params=params, timeout=timeout)
+    now = time.time()
+    if response.status_code == 404:
+        entry = CacheEntry(b"", 404, now + NEGATIVE_TTL, now + NEGATIVE_TTL)
+        cache.set(key, entry)
+        response.raise_for_status()
+    response.raise_for_status()
+    content_type = response.headers.get("Content-Type", "")
+    if content_type and "json" not in content_type:
+        # Raw bodies are served to clients as-is (``fetch_raw``); never cache anything else
+        raise requests.exceptions.InvalidJSONError(f"Unexpected content type {content_type!r} for {path}")
+    _, _, fresh, swr = ttl_class(path)
+    entry = CacheEntry(response.content, response.status_code, now + fresh, now + fresh + swr)
+    cache.set(key, entry)
+    return entry
+
+
+def _refresh(key: str, path: str, params: dict, timeout):
+    try:
+        _fetch_upstream(key, path, params, timeout)
+    except Exception:
+        pass  # keep serving the stale copy until it expires
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key: str, path: str, params: dict, timeout):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh, args=(key, path, params, timeout), daemon=True).start()
+
+
+def _decode(path: str, entry: CacheEntry):
+    if entry.status == 404:
+        raise requests.exceptions.HTTPError(f"404 Not Found (cached) for {path}")
+    return json.loads(entry.value)
+
+
+def _entry(path: str, api_key: str, timeout, params: dict) -> CacheEntry:
+    params["api_key"] = api_key
+    key = cache_key(path, params)
+    now = time.time()
+
+    entry = cache.get(key, now)
+    if entry is not None:
+        if entry.status == 404:
+            cache.count("negative_hits")
+        elif entry.is_fresh(now):
+            cache.count("hits")
+        else:
+            cache.count("stale_hits")
+            _schedule_refresh(key, path, dict(params), timeout)
+        return entry
+
+    cache.count("misses")
+    try:
+        return _fetch_upstream(key, path, params, timeout)
+    except CircuitOpen:
+        # TMDB is failing: an expired copy beats an error
+        entry = cache.last_known(key)
+        if entry is None:
+            raise
+        cache.count("served_while_open")
+        return entry
+
+
+def fetch(path: str, api_key: str, timeout=None, **params) -> dict:
+    """
+    Return the decoded JSON body for *path*.  Raises the same
+    ``requests`` exceptions as a direct call would.
+    """
+    return _decode(path, _entry(path, api_key, timeout, params))
+
+
+def fetch_raw(path: str, api_key: str, timeout=None, **params) -> bytes:
+    """Like ``fetch`` but returns the upstream JSON bytes untouched, for pass-through routes."""
+    entry = _entry(path, api_key, timeout, params)
+    if entry.status == 404:
+        raise requests.exceptions.HTTPError(f"404 Not Found (cached) for {path}")
+    return entry.value
+
+
+def warm(lookups: list[tuple[str, dict]]) -> int:
+    """
+    Pull any of these (path, params) requests that the second tier already
+    holds into memory with one batched read, ahead of a fan-out.  Returns
+    how many are now cached.
+    """
+    return len(cache.get_many([cache_key(path, params) for path, params in lookups]))
+
+
+def cache_stats() -> dict:
+    return cache.stats()
@@ -0,0 +1,417 @@
+"""
+Shared HTTP client for every upstream call (TMDB, Jikan, Supabase).
+
+Each upstream host gets its own ``requests.Session`` with a sized urllib3
+connection pool, so TCP+TLS handshakes are paid once per pooled connection
+instead of once per call.  Sessions are created lazily and reused for the
+lifetime of the process (or the warm serverless instance).
+
+Identical concurrent GETs (same host, path, params and credentials) are
+coalesced into one in-flight request via ``backend.singleflight``; pass
+``coalesce=False`` to opt out.
+
+Every call is timed into ``backend.metrics`` (histograms per upstream and
+endpoint template, error counters, and the current request's Server-Timing).
+
+Failing fast:
+
+* each host has a circuit breaker (``backend.breaker``); while it is open
+  calls raise ``CircuitOpen`` without touching the network;
+* ``set_deadline`` gives the current request (and the worker-pool tasks it
+  submits) an overall upstream budget: every call's timeout is cut to what
+  is left of it, and once it is spent calls raise ``DeadlineExceeded``, so
+  sequential calls cannot add up to several full timeouts.  A coalesced GET
+  is fetched once with the plain client timeout and each caller waits on it
+  only for what is left of its own budget, so one caller's nearly spent
+  budget never becomes the timeout of the requests sharing its fetch;
+* idempotent GETs to upstreams listed in ``UPSTREAM_HEDGE_AFTER_<NAME>`` are
+  hedged: if no answer arrived after that many seconds an identical second
+  request is sent and whichever answers first wins.
+
+Tunables (environment)
+----------------------
+UPSTREAM_POOL_CONNECTIONS   distinct pools kept per session      (default 4)
+UPSTREAM_POOL_MAXSIZE       keep-alive connections per host      (default 16)
+UPSTREAM_CONNECT_TIMEOUT    seconds to establish a connection    (default 3.05)
+UPSTREAM_READ_TIMEOUT       seconds to wait for a response       (default 10)
+UPSTREAM_REQUEST_BUDGET     upstream seconds per incoming request (default 12)
+UPSTREAM_HEDGE_AFTER_<NAME> hedge GETs to that upstream after this many
+                            seconds, e.g. UPSTREAM_HEDGE_AFTER_TMDB=0.8 (default: off;
+                            leave Jikan off, a hedge spends a second quota token)
+UPSTREAM_HEDGE_WORKERS      threads for hedged GETs              (default 8)
+
+Callers may still pass ``timeout=`` per call; it overrides the defaults
+(but never the request budget).  Breaker settings: see backend/breaker.py.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend import metrics
+from backend.breaker import CircuitBreaker
+from backend.singleflight import Group, request_key
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("watchnext_upstream_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The current request's upstream budget is spent; the call was not attempted."""
+
+
+def set_deadline(seconds: float | None):
+    """Give upstream calls made from this context *seconds* in total (None clears it)."""
+    _deadline.set(None if seconds is None else time.monotonic() + seconds)
+
+
+def remaining() -> float | None:
+    give_up = _deadline.get()
+    return None if give_up is None else give_up - time.monotonic()
+
+
+def _bounded(timeout, left: float | None):
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Upstream budget for this request is spent.")
+    if isinstance(timeout, tuple):
+        return tuple(min(t, left) for t in timeout)
+    return min(timeout, left)
+
+
+def _total(timeout) -> float:
+    return sum(timeout) if isinstance(timeout, tuple) else timeout
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.1, float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class UpstreamClient:
+    """Per-host pooled sessions plus simple request/error counters."""
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self._sessions: dict[str, requests.Session] = {}
+        self._adapters: dict[str, HTTPAdapter] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.flights = Group()
+        self.hedge_after: dict[str, float] = {}
+        self.hedge_workers = 8
+        self._hedge_pool: ThreadPoolExecutor | None = None
+        self._flight_pool: ThreadPoolExecutor | None = None
+        self._hedge_slots = threading.BoundedSemaphore(self.hedge_workers // 2)
+        self._hedge_counters = {"hedged": 0, "hedge_wins": 0, "hedge_skipped": 0}
+
+    @classmethod
+    def from_env(cls) -> "UpstreamClient":
+        client = cls(
+            pool_connections=_env_int("UPSTREAM_POOL_CONNECTIONS", 4),
+            pool_maxsize=_env_int("UPSTREAM_POOL_MAXSIZE", 16),
+            connect_timeout=_env_float("UPSTREAM_CONNECT_TIMEOUT", 3.05),
+            read_timeout=_env_float("UPSTREAM_READ_TIMEOUT", 10.0),
+        )
+        client.set_hedging({
+            name[len("UPSTREAM_HEDGE_AFTER_"):].lower(): _env_float(name, 1.0)
+            for name in os.environ if name.startswith("UPSTREAM_HEDGE_AFTER_")
+        }, _env_int("UPSTREAM_HEDGE_WORKERS", 8))
+        return client
+
+    def set_hedging(self, hedge_after: dict[str, float], workers: int = 8):
+        """Hedge GETs to the named upstreams (see ``metrics.upstream_name``) after the given delays."""
+        self.hedge_after = dict(hedge_after)
+        self.hedge_workers = max(2, workers)
+        self._hedge_slots = threading.BoundedSemaphore(self.hedge_workers // 2)
+
+    # ── sessions ──────────────────────────────────────────────────────────────
+
+    def session_for(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=False,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._adapters[host] = adapter
+                self._counters[host] = {"requests": 0, "errors": 0}
+        return session
+
+    def _count(self, host: str, key: str):
+        with self._lock:
+            self._counters.setdefault(host, {"requests": 0, "errors": 0})[key] += 1
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(host, CircuitBreaker.from_env(host))
+        return breaker
+
+    # ── requests ──────────────────────────────────────────────────────────────
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs["timeout"] = _bounded(kwargs.get("timeout") or self.timeout, remaining())
+        host = urlsplit(url).netloc
+        breaker = self.breaker_for(host)
+        breaker.before_call()
+        session = self.session_for(url)
+        self._count(host, "requests")
+        name = metrics.upstream_name(url)
+        endpoint = metrics.endpoint_template(url)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.Timeout:
+            self._count(host, "errors")
+            elapsed = time.perf_counter() - start
+            breaker.record(False, elapsed)
+            metrics.registry.observe_upstream(name, endpoint, elapsed, "timeout")
+            raise
+        except requests.exceptions.RequestException:
+            self._count(host, "errors")
+            elapsed = time.perf_counter() - start
+            breaker.record(False, elapsed)
+            metrics.registry.observe_upstream(name, endpoint, elapsed, "connection")
+            raise
+        except BaseException:
+            breaker.record(False, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        error = None
+        if response.status_code >= 500:
+            error = "http_5xx"
+        elif response.status_code >= 400:
+            error = "http_4xx"
+        breaker.record(response.status_code < 500 and response.status_code != 429, elapsed)
+        metrics.registry.observe_upstream(name, endpoint, elapsed, error)
+        return response
+
+    def get(self, url: str, coalesce: bool = True, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            if kwargs.get("stream"):
+                return self.request("GET", url, **kwargs)
+            if not coalesce:
+                return self._get_once(url, **kwargs)
+            key = request_key("GET", url, kwargs.get("params"), kwargs.get("headers"))
+            left = remaining()
+            if left is not None:
+                return self._get_within(key, left, url, **kwargs)
+            wait = _total(kwargs.get("timeout") or self.timeout)
+            return self.flights.do(key, self._get_shared, url, wait=wait, **kwargs)
+        finally:
+            # Coalesced followers wait on the leader; that wait is still upstream time
+            metrics.add_request_time(metrics.upstream_name(url), time.perf_counter() - start)
+
+    def _get_within(self, key, left: float, url: str, **kwargs) -> requests.Response:
+        """Share the GET with concurrent callers, waiting only for what is left of this request's budget."""
+        if left <= 0:
+            raise DeadlineExceeded("Upstream budget for this request is spent.")
+        with self._lock:
+            if self._flight_pool is None:
+                self._flight_pool = ThreadPoolExecutor(self.pool_maxsize, thread_name_prefix="upstream-flight")
+            pool = self._flight_pool
+        future = self.flights.submit(key, pool, metrics.bind(self._get_unbudgeted), url, **kwargs)
+        try:
+            return future.result(timeout=left)
+        except FuturesTimeout:
+            raise DeadlineExceeded("Upstream budget for this request ran out waiting for a shared GET.") from None
+
+    def _get_unbudgeted(self, url: str, **kwargs) -> requests.Response:
+        _deadline.set(None)  # runs in its own context copy; the fetch belongs to no single caller
+        return self._get_shared(url, **kwargs)
+
+    def _get_shared(self, url: str, **kwargs) -> requests.Response:
+        response = self._get_once(url, **kwargs)
+        response.content  # load the body before followers read it concurrently
+        return response
+
+    def _get_once(self, url: str, **kwargs) -> requests.Response:
+        delay = self.hedge_after.get(metrics.upstream_name(url))
+        if delay is None:
+            return self.request("GET", url, **kwargs)
+        return self._get_hedged(url, delay, **kwargs)
+
+    # ── hedging ───────────────────────────────────────────────────────────────
+
+    def _hedge_count(self, key: str):
+        with self._lock:
+            self._hedge_counters[key] += 1
+
+    def _get_hedged(self, url: str, delay: float, **kwargs) -> requests.Response:
+        """Send the GET; if it has not answered after *delay*, race an identical one against it."""
+        slots = self._hedge_slots
+        if not slots.acquire(blocking=False):
+            self._hedge_count("hedge_skipped")
+            return self.request("GET", url, **kwargs)
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(self.hedge_workers, thread_name_prefix="upstream-hedge")
+            pool = self._hedge_pool
+
+        attempts = [pool.submit(metrics.bind(self._load), url, **kwargs)]
+        try:
+            attempts[0].result(timeout=delay)
+        except FuturesTimeout:
+            self._hedge_count("hedged")
+            attempts.append(pool.submit(metrics.bind(self._load), url, **kwargs))
+        except Exception:
+            pass  # failed fast; re-raised below
+        finally:
+            # The slot is free once every attempt has finished, winner or not
+            outstanding = [len(attempts)]
+            lock = threading.Lock()
+
+            def release(_):
+                with lock:
+                    outstanding[0] -= 1
+                    if outstanding[0] == 0:
+                        slots.release()
+            for attempt in list(attempts):
+                attempt.add_done_callback(release)
+
+        winner = attempts[0]
+        for attempt in as_completed(attempts):
+            if attempt.exception() is None:
+                winner = attempt
+                break
+        if winner is not attempts[0]:
+            self._hedge_count("hedge_wins")
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.add_done_callback(_close_response)
+        return winner.result()
+
+    def _load(self, url: str, **kwargs) -> requests.Response:
+        response = self.request("GET", url, **kwargs)
+        response.content
+        return response
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            return self.request("POST", url, **kwargs)
+        finally:
+            metrics.add_request_time(metrics.upstream_name(url), time.perf_counter() - start)
+
+    # ── stats ─────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """
+        Per-host snapshot: request/error counters plus urllib3 pool figures.
+        ``connections_opened`` vs ``requests`` shows how well keep-alive works.
+        """
+        out = {}
+        with self._lock:
+            hosts = list(self._adapters.items())
+            counters = {h: dict(c) for h, c in self._counters.items()}
+        for host, adapter in hosts:
+            opened = 0
+            served = 0
+            idle = 0
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                served += pool.num_requests
+                idle += pool.pool.qsize() if pool.pool is not None else 0
+            out[host] = {
+                **counters.get(host, {}),
+                "connections_opened": opened,
+                "pooled_requests": served,
+                "idle_connections": idle,
+                "pool_maxsize": self.pool_maxsize,
+            }
+        return out
+
+    def breaker_stats(self) -> dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.stats() for host, breaker in breakers.items()}
+
+    def hedge_stats(self) -> dict:
+        with self._lock:
+            return dict(self._hedge_counters)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._adapters.clear()
+            pools = [self._hedge_pool, self._flight_pool]
+            self._hedge_pool = self._flight_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+client = UpstreamClient.from_env()
+REQUEST_BUDGET = _env_float("UPSTREAM_REQUEST_BUDGET", 12.0)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return client.get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return client.post(url, **kwargs)
+
+
+def stats() -> dict:
+    return client.stats()
+
+
+def coalescing_stats() -> dict:
+    return client.flights.stats()
+
+
+def breaker_stats() -> dict:
+    return client.breaker_stats()
+
+
+def hedge_stats() -> dict:
+    return client.hedge_stats()
@@ -0,0 +1,218 @@
+"""
+App-wide bounded worker pool for upstream fan-out.
+
+One ``ThreadPoolExecutor`` is shared by every route that runs upstream calls
+in parallel (search sources, recommendation seeds, detail-page comments,
+/api/batch lookups),
+so thread count is fixed for the life of the process instead of growing
+with request concurrency.
+
+Admission is checked at submit time and never blocks:
+
+* the pool as a whole accepts ``max_workers + max_queue`` outstanding tasks
+  (running + queued);
+* each route may hold at most its quota of outstanding tasks, so one busy
+  route cannot starve the others.
+
+Past either limit ``submit`` raises ``Saturated`` straight away; the app
+turns that into a 503 with ``Retry-After``.  ``submit_all`` admits a whole
+fan-out or none of it.
+
+Submitted callables run in a copy of the caller's context (see
+``metrics.bind``), so upstream time still lands on the right request.
+
+Tunables (environment)
+----------------------
+WORKER_POOL_SIZE        threads in the shared pool                 (default 32)
+WORKER_QUEUE_DEPTH      tasks allowed to wait for a thread          (default 64)
+WORKER_QUOTA_<ROUTE>    outstanding tasks per route, e.g.
+                        WORKER_QUOTA_SEARCH=24     (default: pool size)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from backend import metrics
+
+DEFAULT_QUOTAS = {"search": 24, "recommendations": 16, "detail": 8, "batch": 16}
+
+
+class Saturated(RuntimeError):
+    """The pool (or the route's quota) has no room for more work."""
+
+    def __init__(self, route: str, reason: str):
+        super().__init__(f"Worker pool saturated for {route!r} ({reason}).")
+        self.route = route
+        self.reason = reason
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class _RouteStats:
+    __slots__ = ("submitted", "rejected", "completed", "queued", "running",
+                 "wait_seconds_total", "wait_seconds_max")
+
+    def __init__(self):
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.queued = 0
+        self.running = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def as_dict(self, quota: int) -> dict:
+        return {
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "queued": self.queued,
+            "running": self.running,
+            "quota": quota,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+class WorkerPool:
+    def __init__(self, max_workers: int = 32, max_queue: int = 64, quotas: dict | None = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.quotas = dict(quotas or {})
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._routes: dict[str, _RouteStats] = {}
+        self._outstanding = 0
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        size = _env_int("WORKER_POOL_SIZE", 32)
+        quotas = {
+            route: _env_int(f"WORKER_QUOTA_{route.upper()}", min(default, size))
+            for route, default in DEFAULT_QUOTAS.items()
+        }
+        return cls(max_workers=size, max_queue=_env_int("WORKER_QUEUE_DEPTH", 64), quotas=quotas)
+
+    def quota(self, route: str) -> int:
+        return self.quotas.get(route, self.max_workers)
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="upstream")
+        return self._executor
+
+    # ── submission ────────────────────────────────────────────────────────────
+
+    def _admit(self, route: str, count: int) -> _RouteStats:
+        """Reserve *count* slots for *route* or raise ``Saturated``.  Caller holds the lock."""
+        stats = self._routes.setdefault(route, _RouteStats())
+        in_use = stats.queued + stats.running
+        # An idle route always admits one fan-out, even one larger than its quota
+        if in_use and in_use + count > self.quota(route):
+            stats.rejected += count
+            raise Saturated(route, "route quota")
+        if self._outstanding + count > self.max_workers + self.max_queue:
+            stats.rejected += count
+            raise Saturated(route, "queue full")
+        stats.submitted += count
+        stats.queued += count
+        self._outstanding += count
+        return stats
+
+    def _wrap(self, stats: _RouteStats, fn):
+        bound = metrics.bind(fn)
+        enqueued = time.perf_counter()
+
+        def run(*args, **kwargs):
+            waited = time.perf_counter() - enqueued
+            with self._lock:
+                stats.queued -= 1
+                stats.running += 1
+                stats.wait_seconds_total += waited
+                stats.wait_seconds_max = max(stats.wait_seconds_max, waited)
+            try:
+                return bound(*args, **kwargs)
+            finally:
+                with self._lock:
+                    stats.running -= 1
+                    stats.completed += 1
+                    self._outstanding -= 1
+
+        return run
+
+    def _release_unstarted(self, stats: _RouteStats, future: Future):
+        # A task cancelled before it ran never reaches ``run``'s bookkeeping
+        if future.cancelled():
+            with self._lock:
+                stats.queued -= 1
+                self._outstanding -= 1
+
+    def submit(self, route: str, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            stats = self._admit(route, 1)
+            executor = self._ensure_executor()
+        future = executor.submit(self._wrap(stats, fn), *args, **kwargs)
+        future.add_done_callback(lambda f: self._release_unstarted(stats, f))
+        return future
+
+    def submit_all(self, route: str, fn, arg_tuples) -> list[Future]:
+        """Submit ``fn(*args)`` for each tuple, admitting all of them or none."""
+        arg_tuples = list(arg_tuples)
+        if not arg_tuples:
+            return []
+        with self._lock:
+            stats = self._admit(route, len(arg_tuples))
+            executor = self._ensure_executor()
+        futures = []
+        for args in arg_tuples:
+            future = executor.submit(self._wrap(stats, fn), *args)
+            future.add_done_callback(lambda f: self._release_unstarted(stats, f))
+            futures.append(future)
+        return futures
+
+    # ── stats ─────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """Per-route counters: queue depth, running tasks, rejections and wait time."""
+        with self._lock:
+            return {route: s.as_dict(self.quota(route)) for route, s in self._routes.items()}
+
+    def pool_stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "outstanding": self._outstanding,
+            }
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+pool = WorkerPool.from_env()
+
+
+def submit(route: str, fn, *args, **kwargs) -> Future:
+    return pool.submit(route, fn, *args, **kwargs)
+
+
+def submit_all(route: str, fn, arg_tuples) -> list[Future]:
+    return pool.submit_all(route, fn, arg_tuples)
+
+
+def stats() -> dict:
+    return pool.stats()
+
+
+def pool_stats() -> dict:
+    return pool.pool_stats()
@@ -0,0 +1,165 @@
+"""
+Local stand-in for a Redis-protocol store (Redis, Valkey, Upstash, Vercel KV).
+
+Speaks RESP2 over TCP and implements only the commands the app uses, with
+key expiry: the shared cache tier (GET/SET/MGET/DEL), flask-limiter's
+fixed-window counters (INCR/INCRBY/EXPIRE/TTL, plus SCRIPT LOAD/EVALSHA
+for the ``limits`` incr-and-expire script, emulated in Python since
+there is no Lua here) and connection handshakes.  Commands are counted by
+name so tests can check batching.
+"""
+
+import hashlib
+import socketserver
+import threading
+import time
+from collections import Counter
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()  # inline command
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        store: FakeRedis = self.server.store
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if not command:
+                return
+            reply = store.execute(command)
+            try:
+                self.wfile.write(reply)
+                self.wfile.flush()
+            except ConnectionError:
+                return
+
+
+def _bulk(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n"
+
+
+def _int(value: int) -> bytes:
+    return b":" + str(value).encode() + b"\r\n"
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.scripts: dict[bytes, bytes] = {}  # sha1 hex -> source
+        self.commands = Counter()
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.store = self
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self._server.server_address[1]}/0"
+
+    def _get(self, key: bytes):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def _incrby(self, key: bytes, amount: int) -> int:
+        value = int(self._get(key) or 0) + amount
+        expires = self.data[key][1] if key in self.data else None
+        self.data[key] = (str(value).encode(), expires)
+        return value
+
+    def _expire(self, key: bytes, seconds: float) -> int:
+        if self._get(key) is None:
+            return 0
+        self.data[key] = (self.data[key][0], time.time() + seconds)
+        return 1
+
+    def _run_script(self, source: bytes, keys: list, argv: list) -> bytes:
+        # Only the limits package's incr_expire.lua is understood
+        if b'"incrby"' in source and b'"expire"' in source:
+            amount = int(argv[1])
+            current = self._incrby(keys[0], amount)
+            if current == amount:
+                self._expire(keys[0], int(argv[0]))
+            return _int(current)
+        return b"-ERR script not supported by FakeRedis\r\n"
+
+    def execute(self, args: list) -> bytes:
+        name = args[0].decode().upper()
+        with self._lock:
+            self.commands[name] += 1
+            if name in ("PING",):
+                return b"+PONG\r\n"
+            if name in ("CLIENT", "SELECT", "FLUSHDB", "FLUSHALL"):
+                if name.startswith("FLUSH"):
+                    self.data.clear()
+                return b"+OK\r\n"
+            if name == "GET":
+                return _bulk(self._get(args[1]))
+            if name == "MGET":
+                return b"*" + str(len(args) - 1).encode() + b"\r\n" + b"".join(_bulk(self._get(k)) for k in args[1:])
+            if name == "SET":
+                expires = None
+                options = [a.upper() for a in args[3:]]
+                for i, option in enumerate(options):
+                    if option == b"EX":
+                        expires = time.time() + int(args[4 + i])
+                    elif option == b"PX":
+                        expires = time.time() + int(args[4 + i]) / 1000.0
+                if b"NX" in options and self._get(args[1]) is not None:
+                    return b"$-1\r\n"
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if name in ("INCR", "INCRBY"):
+                return _int(self._incrby(args[1], int(args[2]) if name == "INCRBY" else 1))
+            if name == "EXPIRE":
+                return _int(self._expire(args[1], int(args[2])))
+            if name == "TTL":
+                if self._get(args[1]) is None:
+                    return _int(-2)
+                expires = self.data[args[1]][1]
+                return _int(-1 if expires is None else max(0, round(expires - time.time())))
+            if name == "SCRIPT" and args[1].upper() == b"LOAD":
+                sha = hashlib.sha1(args[2]).hexdigest().encode()
+                self.scripts[sha] = args[2]
+                return _bulk(sha)
+            if name in ("EVAL", "EVALSHA"):
+                source = args[1] if name == "EVAL" else self.scripts.get(args[1].lower())
+                if source is None:
+                    return b"-NOSCRIPT No matching script. Please use EVAL.\r\n"
+                count = int(args[2])
+                return self._run_script(source, args[3:3 + count], args[3 + count:])
+            if name == "DEL":
+                removed = sum(1 for k in args[1:] if self.data.pop(k, None) is not None)
+                return b":" + str(removed).encode() + b"\r\n"
+        return b"-ERR unknown command '" + args[0] + b"'\r\n"
+
+    def start(self) -> "FakeRedis":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.commands)
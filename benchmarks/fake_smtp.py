@@ -0,0 +1,114 @@
+"""
+Local SMTP sink for the email outbox.
+
+Speaks enough ESMTP for ``smtplib`` (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT) over plain TCP and keeps every accepted message.
+Connections, logins and messages are counted so tests can check reuse.
+No STARTTLS: point the app at it with ``SMTP_STARTTLS=0``.
+"""
+
+import socketserver
+import threading
+from collections import Counter
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+        self.wfile.flush()
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+    def handle(self):
+        sink: FakeSMTP = self.server.sink
+        sink.count("connections")
+        self._reply("220 fake-smtp ready")
+        envelope = {"from": None, "to": []}
+        while True:
+            try:
+                line = self.rfile.readline()
+            except ConnectionError:
+                return
+            if not line:
+                return
+            verb, _, arg = line.decode(errors="replace").strip().partition(" ")
+            verb = verb.upper()
+            if sink.drop_next:
+                sink.drop_next = False
+                return  # hang up mid-session, like an idle timeout on the server
+            if verb in ("EHLO", "HELO"):
+                self._reply("250-fake-smtp")
+                self._reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                mechanism = arg.split(" ")[0].upper()
+                if mechanism == "LOGIN":
+                    if " " not in arg:  # no initial response: prompt for the username first
+                        self._reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif mechanism == "PLAIN" and " " not in arg:
+                    self._reply("334 ")
+                    self.rfile.readline()
+                sink.count("logins")
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                envelope = {"from": arg.partition(":")[2].strip("<> "), "to": []}
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(arg.partition(":")[2].strip("<> "))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                sink.accept(envelope, self._read_data())
+                self._reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class FakeSMTP:
+    def __init__(self):
+        self.messages: list[dict] = []
+        self.counts = Counter()
+        self.drop_next = False
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def accept(self, envelope: dict, data: bytes):
+        with self._lock:
+            self.counts["messages"] += 1
+            self.messages.append({"from": envelope["from"], "to": list(envelope["to"]), "data": data})
+
+    def start(self) -> "FakeSMTP":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
@@ -0,0 +1,247 @@
+"""
+Local stand-ins for TMDB, Jikan and Supabase PostgREST.
+
+Each stand-in is a threaded HTTP/1.1 server (keep-alive, like the real
+APIs) that answers with deterministic synthetic payloads after a
+configurable latency + jitter, and counts calls per endpoint template.
+Only the endpoints the Flask app actually calls are implemented.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_NUMERIC_SEGMENT = re.compile(r"(?<=.)/\d+(?=/|$)")
+
+
+def template_of(path: str) -> str:
+    return _NUMERIC_SEGMENT.sub("/{id}", path)
+
+
+def _rng(*parts) -> random.Random:
+    seed = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return random.Random(int(seed[:12], 16))
+
+
+# ── synthetic payloads ────────────────────────────────────────────────────────
+
+def _tmdb_item(iid: int, media_type: str = "movie") -> dict:
+    r = _rng("item", media_type, iid)
+    title_key = "title" if media_type == "movie" else "name"
+    date_key = "release_date" if media_type == "movie" else "first_air_date"
+    return {
+        "id": iid,
+        title_key: f"{media_type.title()} {iid}",
+        "original_language": "en",
+        "overview": "Lorem ipsum dolor sit amet, " * r.randint(3, 12),
+        "poster_path": f"/p{iid}.jpg",
+        "backdrop_path": f"/b{iid}.jpg",
+        date_key: f"{r.randint(1970, 2026)}-0{r.randint(1, 9)}-1{r.randint(0, 9)}",
+        "genre_ids": r.sample([12, 14, 16, 18, 27, 28, 35, 53, 80, 99, 878, 10749], 3),
+        "popularity": round(r.uniform(1, 500), 3),
+        "vote_average": round(r.uniform(4, 9), 1),
+        "vote_count": r.randint(0, 20000),
+        "adult": False,
+        "video": False,
+    }
+
+
+def _tmdb_page(seed, media_type: str = "movie", size: int = 20) -> dict:
+    r = _rng("page", seed)
+    return {
+        "page": 1,
+        "results": [_tmdb_item(r.randint(1, 50_000), media_type) for _ in range(size)],
+        "total_pages": 500,
+        "total_results": 10_000,
+    }
+
+
+def tmdb_payload(path: str, query: dict):
+    parts = path.strip("/").split("/")
+    if parts and parts[0] == "3":
+        parts = parts[1:]
+    page = query.get("page", ["1"])[0]
+    if parts[:1] == ["search"]:
+        mt = parts[1] if len(parts) > 1 and parts[1] in ("movie", "tv") else "movie"
+        body = _tmdb_page(("search", parts[1], query.get("query", [""])[0], page), mt)
+        if parts[1] == "multi":
+            for i, item in enumerate(body["results"]):
+                item["media_type"] = ("movie", "tv", "person")[i % 3]
+                if item["media_type"] == "person":
+                    item["name"] = f"Person {item['id']}"
+                    item["known_for_department"] = "Acting"
+        return 200, body
+    if parts[:1] == ["genre"]:
+        return 200, {"genres": [{"id": g, "name": f"Genre {g}"} for g in (12, 14, 16, 18, 28, 35, 53, 878)]}
+    if parts[:1] in (["trending"], ["discover"]) or (len(parts) == 2 and not parts[1].isdigit()):
+        mt = "tv" if "tv" in parts else "movie"
+        return 200, _tmdb_page(("list", path, page), mt)
+    if len(parts) >= 2 and parts[1].isdigit():
+        mt, iid = parts[0], int(parts[1])
+        if mt == "person":
+            return 200, {"id": iid, "name": f"Person {iid}", "biography": "Bio " * 50}
+        if len(parts) == 2:
+            detail = _tmdb_item(iid, mt)
+            detail["genres"] = [{"id": g, "name": f"Genre {g}"} for g in detail.pop("genre_ids")]
+            detail["runtime"] = 120
+            for extra in query.get("append_to_response", [""])[0].split(","):
+                if extra in ("recommendations", "similar"):
+                    detail[extra] = _tmdb_page((extra, mt, iid), mt)
+                elif extra == "credits":
+                    detail[extra] = {"cast": [{"id": i, "name": f"Actor {i}", "character": "Role",
+                                               "profile_path": None, "popularity": 1.0} for i in range(15)]}
+                elif extra == "videos":
+                    detail[extra] = {"results": [{"type": "Trailer", "site": "YouTube", "key": f"yt{iid}"}]}
+                elif extra == "reviews":
+                    detail[extra] = {"results": [{"author": "a", "content": "Great " * 40,
+                                                  "author_details": {"rating": 8},
+                                                  "created_at": "2024-01-01T00:00:00Z"}]}
+                elif extra == "watch/providers":
+                    detail[extra] = {"results": {"US": {"flatrate": [{"provider_name": "X"}]}}}
+            return 200, detail
+        sub = parts[2]
+        if sub in ("recommendations", "similar"):
+            return 200, _tmdb_page((sub, mt, iid, page), mt)
+        if sub == "credits":
+            return 200, {"cast": [{"id": i, "name": f"Actor {i}", "character": "Role",
+                                   "profile_path": None, "popularity": 1.0} for i in range(15)]}
+        if sub == "videos":
+            return 200, {"results": [{"type": "Trailer", "site": "YouTube", "key": f"yt{iid}"}]}
+        if sub == "reviews":
+            return 200, {"results": []}
+        if sub == "watch":
+            return 200, {"results": {}}
+        if sub == "combined_credits":
+            return 200, {"cast": [dict(_tmdb_item(i), media_type="movie") for i in range(30)]}
+    return 404, {"status_message": "The resource you requested could not be found."}
+
+
+def _anime(mal_id: int) -> dict:
+    r = _rng("anime", mal_id)
+    return {
+        "mal_id": mal_id,
+        "title": f"Anime {mal_id}",
+        "images": {"jpg": {"image_url": f"https://cdn/a{mal_id}.jpg",
+                           "small_image_url": f"https://cdn/a{mal_id}s.jpg",
+                           "large_image_url": f"https://cdn/a{mal_id}l.jpg"}},
+        "trailer": {"youtube_id": None, "url": None, "embed_url": None},
+        "synopsis": "Synopsis " * r.randint(20, 80),
+        "score": round(r.uniform(5, 9.5), 2),
+        "year": r.randint(1990, 2026),
+        "producers": [{"mal_id": i, "name": f"Studio {i}"} for i in range(r.randint(1, 6))],
+        "genres": [{"mal_id": g, "name": f"Genre {g}"} for g in r.sample(range(1, 40), 3)],
+    }
+
+
+def jikan_payload(path: str, query: dict):
+    parts = path.strip("/").split("/")
+    if parts and parts[0] == "v4":
+        parts = parts[1:]
+    page = query.get("page", ["1"])[0]
+    if parts in (["anime"], ["top", "anime"]):
+        r = _rng("jikan", parts, query.get("q", [""])[0], page)
+        return 200, {"data": [_anime(r.randint(1, 60_000)) for _ in range(25)],
+                     "pagination": {"has_next_page": True}}
+    if len(parts) >= 2 and parts[0] == "anime" and parts[1].isdigit():
+        mal_id = int(parts[1])
+        if parts[2:] == ["recommendations"]:
+            r = _rng("jikan-recs", mal_id)
+            return 200, {"data": [{"entry": _anime(r.randint(1, 60_000))} for _ in range(20)]}
+        return 200, {"data": _anime(mal_id)}
+    return 404, {"status": 404, "message": "Not Found"}
+
+
+def supabase_payload(path: str, query: dict):
+    table = path.rstrip("/").rsplit("/", 1)[-1]
+    if table == "watched":
+        user = query.get("user_id", ["eq."])[0]
+        r = _rng("watched", user)
+        rows = [{"media_id": r.randint(1, 50_000), "media_type": "movie",
+                 "rating": r.choice([None, 3, 4, 5]), "title": "t"} for _ in range(r.randint(5, 30))]
+        return 200, rows
+    if table == "comments":
+        return 200, [{"id": i, "username": "u", "content": "Nice!", "created_at": "2024-01-01T00:00:00Z"}
+                     for i in range(10)]
+    return 200, []
+
+
+# ── server ────────────────────────────────────────────────────────────────────
+
+class FakeUpstream:
+    """One stand-in API on 127.0.0.1:<ephemeral port>."""
+
+    def __init__(self, name: str, payload_fn, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.name = name
+        self.payload_fn = payload_fn
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                parts = urlsplit(self.path)
+                with upstream._lock:
+                    upstream.calls[template_of(parts.path)] += 1
+                delay = upstream.latency_ms + random.uniform(-1, 1) * upstream.jitter_ms
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+                if self.command == "POST":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    row = json.loads(self.rfile.read(length) or b"{}")
+                    status, body = 201, [dict(row, id=1, created_at="2024-01-01T00:00:00Z")]
+                else:
+                    status, body = upstream.payload_fn(parts.path, parse_qs(parts.query))
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeUpstream":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.calls)
+
+
+def start_all(latency_ms: float = 0.0, jitter_ms: float = 0.0) -> dict:
+    return {
+        "tmdb": FakeUpstream("tmdb", tmdb_payload, latency_ms, jitter_ms).start(),
+        "jikan": FakeUpstream("jikan", jikan_payload, latency_ms, jitter_ms).start(),
+        "supabase": FakeUpstream("supabase", supabase_payload, latency_ms, jitter_ms).start(),
+    }
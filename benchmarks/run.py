@@ -0,0 +1,287 @@
+"""
+Offline load benchmark for the Flask app.
+
+Starts local stand-ins for TMDB, Jikan and Supabase (see fake_upstreams.py),
+points the app at them, serves the app on a real threaded WSGI server and
+drives each route at increasing concurrency.  For every (route, level) it
+reports p50/p95/p99 latency, throughput, error count and upstream calls per
+request, and can compare against a previous run.
+
+    python -m benchmarks.run --routes recommendations,search,autocomplete \\
+        --concurrency 1,8,32 --requests 300 --latency 40 --jitter 15 \\
+        --out bench.json --baseline bench-main.json
+
+Key variety is controlled with --keys: each route cycles through that many
+distinct queries/users so caches see a realistic mix of hits and misses.
+Pass --cold to empty in-process caches before every level.
+
+Serialization can be compared on the same routes: --json-provider picks the
+app's JSON provider (default, orjson) and --no-passthrough makes proxy
+routes decode and re-encode TMDB bodies; cpu/req shows the difference.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from benchmarks.fake_upstreams import start_all  # noqa: E402
+
+_WORDS = ["star", "dark", "love", "war", "night", "king", "lost", "blue", "ghost", "city",
+          "dragon", "space", "dead", "girl", "house", "time", "fire", "moon", "road", "iron"]
+
+
+def _user(i: int) -> str:
+    return str(uuid.UUID(int=i + 1, version=4))
+
+
+ROUTES = {
+    "recommendations": lambda i: f"/api/recommendations?media_type=movie&media_id={100 + i}&user_id={_user(i)}",
+    "recommendations_anon": lambda i: f"/api/recommendations?media_type=movie&media_id={100 + i}",
+    "search": lambda i: f"/api/search?query={_WORDS[i % len(_WORDS)]}{i // len(_WORDS) or ''}",
+    "autocomplete": lambda i: f"/api/autocomplete?query={_WORDS[i % len(_WORDS)][:2 + i % 3]}",
+    "movies": lambda i: f"/api/movies?category=popular&page={1 + i % 5}",
+    "movie_detail": lambda i: f"/api/movie/{500 + i}",
+    "movie_detail_full": lambda i: f"/api/movie/{500 + i}/full",
+    "tv_detail": lambda i: f"/api/tv/{600 + i}",
+    "person": lambda i: f"/api/person/{700 + i}",
+}
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+@contextmanager
+def pointed_at(fakes: dict, json_provider: str | None = None, passthrough: bool | None = None):
+    """Point the already-imported app modules at the stand-ins, then restore."""
+    from backend import app as app_module
+    from backend import jikan, metrics, tmdb
+    from backend import json_provider as providers
+
+    saved = (tmdb.TMDB_BASE_URL, jikan.JIKAN_BASE_URL, jikan.scheduler, app_module.SUPABASE_URL,
+             app_module.TMDB_API_KEY, app_module.limiter.enabled, app_module.app.json,
+             app_module.PROXY_PASSTHROUGH, dict(os.environ))
+    if json_provider:
+        providers.install(app_module.app, json_provider)
+    if passthrough is not None:
+        app_module.PROXY_PASSTHROUGH = passthrough
+    tmdb.TMDB_BASE_URL = fakes["tmdb"].base_url + "/3"
+    jikan.JIKAN_BASE_URL = fakes["jikan"].base_url + "/v4"
+    # The stand-in has no quota; keep the benchmark measuring the app, not the bucket
+    jikan.scheduler = jikan.Scheduler([])
+    app_module.SUPABASE_URL = fakes["supabase"].base_url
+    app_module.TMDB_API_KEY = "bench"
+    app_module.limiter.enabled = False
+    os.environ["SUPABASE_URL"] = fakes["supabase"].base_url
+    for name, fake in fakes.items():
+        metrics.register_host(fake.base_url, name)
+    try:
+        yield app_module.app
+    finally:
+        (tmdb.TMDB_BASE_URL, jikan.JIKAN_BASE_URL, jikan.scheduler, app_module.SUPABASE_URL,
+         app_module.TMDB_API_KEY, app_module.limiter.enabled, app_module.app.json,
+         app_module.PROXY_PASSTHROUGH, env) = saved
+        os.environ.clear()
+        os.environ.update(env)
+
+
+def reset_caches():
+    from backend import jikan, rec_store, tmdb
+    from backend.cache import MemoryLRU
+
+    tmdb.cache.memory = MemoryLRU(tmdb.cache.memory.maxsize)
+    jikan.cache.memory = MemoryLRU(jikan.cache.memory.maxsize)
+    rec_store.store = rec_store.RecommendationStore()
+
+
+def _drive(base_url: str, route: str, concurrency: int, total: int, keys: int) -> dict:
+    make_path = ROUTES[route]
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(i: int):
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + make_path(i % keys), timeout=60).status_code < 500
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000.0
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(one, range(total)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "throughput_rps": round(total / wall, 1) if wall else 0.0,
+        # Whole-process CPU (app + driver + stand-ins); compare runs, not absolutes
+        "cpu_ms_per_request": round(cpu * 1000.0 / total, 3) if total else 0.0,
+    }
+
+
+def run_benchmark(routes, levels, total: int, keys: int, latency_ms: float,
+                  jitter_ms: float, cold: bool = False, json_provider: str | None = None,
+                  passthrough: bool | None = None) -> dict:
+    fakes = start_all(latency_ms, jitter_ms)
+    results: dict = {}
+    try:
+        with pointed_at(fakes, json_provider, passthrough) as app:
+            provider_used = type(app.json).__name__
+            passthrough_used = sys.modules["backend.app"].PROXY_PASSTHROUGH
+            server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_port}"
+            try:
+                for route in routes:
+                    results[route] = {}
+                    for level in levels:
+                        if cold:
+                            reset_caches()
+                        before = {name: f.snapshot() for name, f in fakes.items()}
+                        stats = _drive(base_url, route, level, total, keys)
+                        calls = {}
+                        for name, fake in fakes.items():
+                            delta = fake.snapshot() - before[name]
+                            if delta:
+                                calls[name] = {
+                                    "per_request": round(sum(delta.values()) / total, 3),
+                                    "by_endpoint": dict(delta.most_common()),
+                                }
+                        stats["upstream_calls"] = calls
+                        results[route][str(level)] = stats
+            finally:
+                server.shutdown()
+    finally:
+        for fake in fakes.values():
+            fake.stop()
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "requests_per_level": total,
+            "keys": keys,
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "cold": cold,
+            "json_provider": provider_used,
+            "passthrough": passthrough_used,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    lines = []
+    for route, levels in current["results"].items():
+        for level, stats in levels.items():
+            base = baseline.get("results", {}).get(route, {}).get(level)
+            if not base:
+                continue
+            parts = []
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "cpu_ms_per_request"):
+                if base.get(key):
+                    change = (stats[key] - base[key]) / base[key] * 100.0
+                    parts.append(f"{key} {change:+.1f}%")
+            lines.append(f"{route:>22} c={level:<4} " + "  ".join(parts))
+    return lines
+
+
+def _print_table(report: dict):
+    header = (f"{'route':>22} {'conc':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>8} {'cpu/req':>9} "
+              f"{'err':>5}  upstream/req")
+    print(header)
+    print("-" * len(header))
+    for route, levels in report["results"].items():
+        for level, s in levels.items():
+            per_req = ", ".join(f"{n}={c['per_request']}" for n, c in s["upstream_calls"].items())
+            print(f"{route:>22} {level:>5} {s['p50_ms']:>8.1f}ms {s['p95_ms']:>8.1f}ms "
+                  f"{s['p99_ms']:>8.1f}ms {s['throughput_rps']:>8.1f} {s['cpu_ms_per_request']:>7.2f}ms "
+                  f"{s['errors']:>5}  {per_req}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--routes", default="recommendations,search,autocomplete",
+                        help=f"comma-separated subset of: {', '.join(ROUTES)}")
+    parser.add_argument("--concurrency", default="1,4,16,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--keys", type=int, default=50, help="distinct queries/users per route")
+    parser.add_argument("--latency", type=float, default=40.0, help="stand-in latency (ms)")
+    parser.add_argument("--jitter", type=float, default=15.0, help="± jitter on latency (ms)")
+    parser.add_argument("--cold", action="store_true", help="reset in-process caches before each level")
+    parser.add_argument("--json-provider", choices=("default", "orjson"),
+                        help="JSON provider for the app (default: JSON_PROVIDER / auto)")
+    parser.add_argument("--no-passthrough", action="store_true",
+                        help="decode and re-encode proxied TMDB bodies instead of relaying them")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    unknown = [r for r in routes if r not in ROUTES]
+    if unknown:
+        parser.error(f"unknown route(s): {', '.join(unknown)}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    report = run_benchmark(routes, levels, args.requests, max(1, args.keys),
+                           args.latency, args.jitter, cold=args.cold,
+                           json_provider=args.json_provider,
+                           passthrough=False if args.no_passthrough else None)
+    _print_table(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        print("\nvs baseline:")
+        for line in compare(report, baseline):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
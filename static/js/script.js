@@ -379,14 +379,73 @@ async function fetchTvShows(page) {
   return response.json();
 }
 
-async function fetchGlobalSearch(page) {
-  const params = new URLSearchParams({ query: state.currentQuery, page: String(page) });
+// Streams NDJSON events ({source, results} per source, then {done}) as each source answers
+async function streamGlobalSearch(page, onEvent) {
+  const params = new URLSearchParams({ query: state.currentQuery, page: String(page), stream: "1" });
   const response = await fetch(`/api/search?${params.toString()}`);
   if (!response.ok) {
     const payload = await response.json().catch(() => ({}));
     throw new Error(payload.error || `HTTP ${response.status}`);
   }
-  return response.json();
+  const emit = (line) => { if (line.trim()) onEvent(JSON.parse(line)); };
+  if (!response.body || !window.TextDecoder) {
+    (await response.text()).split("\n").forEach(emit);
+    return;
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    lines.forEach(emit);
+  }
+  emit(buffer + decoder.decode());
+}
+
+// Relays /api/chat Server-Sent Events: onToken(text) per token; resolves with the full answer.
+async function streamChat(body, onToken) {
+  const response = await fetch("/api/chat?stream=1", {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify(body),
+  });
+  const type = response.headers.get("Content-Type") || "";
+  if (!response.ok || !type.startsWith("text/event-stream")) {
+    const payload = await response.json().catch(() => ({}));
+    throw new Error(payload.error || `HTTP ${response.status}`);
+  }
+  let answer = "";
+  let failure = null;
+  const emit = (frame) => {
+    const event = (frame.match(/^event: (.*)$/m) || [])[1];
+    const data = (frame.match(/^data: (.*)$/m) || [])[1];
+    if (!event || !data) return;
+    const payload = JSON.parse(data);
+    if (event === "token") {
+      answer += payload.text;
+      onToken(payload.text, answer);
+    } else if (event === "error") {
+      failure = payload.error;
+    }
+  };
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const frames = buffer.split("\n\n");
+    buffer = frames.pop();
+    frames.forEach(emit);
+  }
+  emit(buffer + decoder.decode());
+  if (failure && !answer) throw new Error(failure);
+  return answer;
 }
 
 async function fetchAnime(page) {
@@ -419,18 +478,19 @@ async function loadContent({ page, replace = false } = {}) {
     let items = [];
 
     if (state.isGlobalSearch) {
-      const data = await fetchGlobalSearch(page);
-      items = data.results || [];
       if (replace) container.innerHTML = "";
-      if (!items.length) {
-        state.hasMore = false;
-        if (loading) loading.textContent = "No results found.";
-      } else {
-        items.forEach((item) => {
+      await streamGlobalSearch(page, (event) => {
+        const batch = event.results || [];
+        batch.forEach((item) => {
           const card = renderMixedCard(item);
           if (card) container.appendChild(card);
         });
-        if (loading) loading.style.display = "none";
+        items = items.concat(batch);
+        if (items.length && loading) loading.style.display = "none";
+      });
+      if (!items.length) {
+        state.hasMore = false;
+        if (loading) loading.textContent = "No results found.";
       }
     } else if (state.currentContentType === "movies") {
       const data = await fetchMovies(page);
@@ -694,35 +754,32 @@ async function loadSuggestions() {
   const recentNonAnime = watchedItems.filter((i) => i.media_type !== "anime").slice(-4).reverse();
   const recentAnime    = watchedItems.filter((i) => i.media_type === "anime").slice(-2).reverse();
 
-  for (const item of recentNonAnime) {
+  // One batched request resolves every "Because you watched" row
+  const recentItems = [...recentNonAnime, ...recentAnime];
+  let batched = {};
+  if (recentItems.length) {
     try {
-      const uid = session?.user?.id ? `&user_id=${encodeURIComponent(session.user.id)}` : "";
-      const res = await fetch(`/api/recommendations?media_type=${item.media_type}&media_id=${item.media_id}${uid}`);
-      if (!res.ok) continue;
-      const { results = [] } = await res.json();
-      if (!results.length) continue;
-      const sec = makeFySection(`Because you watched <em>${item.title || "this"}</em>`);
-      const row = document.createElement("div");
-      row.className = "more-like-grid";
-      results.slice(0, 12).forEach((r) => row.appendChild(makeRecCard(r, item.media_type)));
-      sec.appendChild(row);
-      page.appendChild(sec);
+      const res = await fetch("/api/batch", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          items: recentItems.map((i) => ({ media_type: i.media_type, id: Number(i.media_id), facets: ["recommendations"] })),
+        }),
+      });
+      if (res.ok) batched = (await res.json()).results || {};
     } catch {}
   }
 
-  for (const item of recentAnime) {
-    try {
-      const res = await fetch(`/api/anime/${item.media_id}/recommendations`);
-      if (!res.ok) continue;
-      const { results = [] } = await res.json();
-      if (!results.length) continue;
-      const sec = makeFySection(`Because you watched <em>${item.title || "this anime"}</em>`);
-      const row = document.createElement("div");
-      row.className = "more-like-grid";
-      results.forEach((r) => row.appendChild(makeRecCard(r, "anime")));
-      sec.appendChild(row);
-      page.appendChild(sec);
-    } catch {}
+  for (const item of recentItems) {
+    const results = batched[`${item.media_type}:${item.media_id}`]?.recommendations?.results || [];
+    if (!results.length) continue;
+    const fallback = item.media_type === "anime" ? "this anime" : "this";
+    const sec = makeFySection(`Because you watched <em>${item.title || fallback}</em>`);
+    const row = document.createElement("div");
+    row.className = "more-like-grid";
+    results.slice(0, 12).forEach((r) => row.appendChild(makeRecCard(r, item.media_type)));
+    sec.appendChild(row);
+    page.appendChild(sec);
   }
 
   // Empty state if nothing
@@ -835,6 +892,16 @@ async function triggerAutocomplete(query) {
   } catch {}
 }
 
+function recordAutocompleteClick(item) {
+  // Fire-and-forget: teaches the server-side suggestion index what people pick
+  const body = JSON.stringify({ media_type: item.media_type, id: item.id });
+  if (navigator.sendBeacon) {
+    navigator.sendBeacon("/api/autocomplete/click", new Blob([body], { type: "application/json" }));
+  } else {
+    fetch("/api/autocomplete/click", { method: "POST", headers: { "Content-Type": "application/json" }, body, keepalive: true }).catch(() => {});
+  }
+}
+
 function showDropdown(results, query) {
   if (!searchDropdown) return;
   searchDropdown.innerHTML = "";
@@ -882,6 +949,7 @@ function showDropdown(results, query) {
         </div>
         <span class="search-dropdown-badge ${badgeCls}">${typeLabel}</span>`;
     }
+    a.addEventListener("click", () => recordAutocompleteClick(item));
     searchDropdown.appendChild(a);
   });
 
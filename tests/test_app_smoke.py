@@ -74,6 +74,43 @@ class AppSmokeTests(unittest.TestCase):
             {"results": [], "error": "Missing TMDB_API_KEY."},
         )
 
+    def test_movie_full_uses_one_tmdb_call(self):
+        detail = {
+            "id": 7, "title": "Seven",
+            "credits": {"cast": [{"id": i, "name": f"A{i}", "popularity": 1.0} for i in range(12)]},
+            "videos": {"results": [{"type": "Trailer", "site": "YouTube", "key": "abc"}]},
+            "watch/providers": {"results": {"US": {"flatrate": []}}},
+            "reviews": {"results": [{"author": "r", "content": "ok", "created_at": "2024-01-01T00:00:00Z"}]},
+        }
+        comments = [{"id": 1, "username": "u", "content": "hi", "created_at": "2024-01-01"}]
+        with patch("backend.app.TMDB_API_KEY", "tmdb-test"), \
+                patch("backend.app.tmdb_get", return_value=(detail, None)) as mock_tmdb:
+            with patch("backend.app._fetch_comments", return_value=comments):
+                response = self.client.get("/api/movie/7/full")
+
+        mock_tmdb.assert_called_once_with(
+            "/movie/7", append_to_response="credits,videos,watch/providers,reviews",
+        )
+        body = response.get_json()
+        self.assertEqual(body["details"], {"id": 7, "title": "Seven"})
+        self.assertEqual(len(body["credits"]["cast"]), 8)
+        self.assertEqual(body["trailer"], {"key": "abc"})
+        self.assertEqual(body["providers"], {"US": {"flatrate": []}})
+        self.assertEqual(body["reviews"]["results"][0]["created_at"], "2024-01-01")
+        self.assertEqual(body["comments"], {"results": comments})
+
+    def test_full_detail_include_selects_sections(self):
+        with patch("backend.app.TMDB_API_KEY", "tmdb-test"), \
+                patch("backend.app.tmdb_get", return_value=({"id": 3, "name": "S"}, None)) as mock_tmdb:
+            with patch("backend.app._fetch_comments") as mock_comments:
+                response = self.client.get("/api/tv/3/full?include=details,trailer")
+                bad = self.client.get("/api/tv/3/full?include=details,bogus")
+
+        mock_tmdb.assert_called_once_with("/tv/3", append_to_response="videos")
+        mock_comments.assert_not_called()
+        self.assertEqual(response.get_json(), {"details": {"id": 3, "name": "S"}, "trailer": {"key": None}})
+        self.assertEqual(bad.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch
+
+from backend.app import app
+from backend.autocomplete_index import PrefixIndex, normalize
+
+
+def _movie(iid, title, popularity=10.0):
+    return {"id": iid, "title": title, "popularity": popularity, "release_date": "2008-07-18"}
+
+
+class PrefixIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.add_many([
+            _movie(1, "The Dark Knight", 90),
+            _movie(2, "Dark City", 20),
+            _movie(3, "Knight and Day", 50),
+            _movie(4, "Amélie", 30),
+        ], "movie")
+        self.index.add({"id": 9, "name": "Darkwing Person", "popularity": 5}, "person")
+
+    def test_matches_title_and_word_prefixes_by_popularity(self):
+        self.assertEqual([r["id"] for r in self.index.lookup("dark")], [1, 2, 9])
+        # A whole-title prefix match (3) outweighs a slightly more popular mid-title match (1)
+        self.assertEqual([r["id"] for r in self.index.lookup("kni")], [3, 1])
+        self.assertEqual(self.index.lookup("dar")[0]["year"], "2008")
+
+    def test_normalization_folds_accents_and_punctuation(self):
+        self.assertEqual(normalize("  Amélie: Part-II "), "amelie part ii")
+        self.assertEqual([r["id"] for r in self.index.lookup("AME")], [4])
+
+    def test_clicks_boost_ranking(self):
+        for _ in range(3):
+            self.index.click("movie", 2)
+        self.assertEqual(self.index.lookup("dark")[0]["id"], 2)
+        self.assertFalse(self.index.click("movie", 404))
+
+    def test_eviction_drops_the_least_popular_title(self):
+        small = PrefixIndex(max_items=2)
+        small.add_many([_movie(1, "Alpha", 5), _movie(2, "Beta", 50), _movie(3, "Gamma", 10)], "movie")
+        self.assertEqual(small.lookup("alpha"), [])
+        self.assertEqual(len(small), 2)
+        self.assertEqual(small.stats()["keys"], 2)
+
+    def test_eviction_follows_clicks_and_popularity_updates(self):
+        small = PrefixIndex(max_items=3)
+        small.add_many([_movie(1, "Alpha", 5), _movie(2, "Beta", 6), _movie(3, "Gamma", 7)], "movie")
+        small.click("movie", 1)                      # 5 + click boost
+        small.add(_movie(2, "Beta", 90), "movie")    # popularity rose
+        small.add(_movie(4, "Delta", 8), "movie")
+        self.assertEqual(small.lookup("gamma"), [])
+        small.add(_movie(5, "Epsilon", 9), "movie")
+        self.assertEqual(small.lookup("delta"), [])
+        self.assertEqual(small.stats()["evictions"], 2)
+        self.assertEqual({r["id"] for r in small.lookup("alpha") + small.lookup("beta")}, {1, 2})
+
+
+class AutocompleteRouteTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.index = PrefixIndex()
+        patches = [
+            patch("backend.autocomplete_index.index", self.index),
+            patch("backend.autocomplete_index.ensure_seeded"),
+            patch("backend.autocomplete_index.MIN_LOCAL_HITS", 2),
+            patch("backend.app.TMDB_API_KEY", "k"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_answers_locally_when_index_has_enough_hits(self):
+        self.index.add_many([_movie(1, "Star Wars"), _movie(2, "Stardust")], "movie")
+        with patch("backend.app.tmdb_get") as mock_tmdb:
+            body = self.client.get("/api/autocomplete?query=sta").get_json()
+
+        mock_tmdb.assert_not_called()
+        self.assertEqual({r["id"] for r in body["results"]}, {1, 2})
+
+    def test_falls_through_to_tmdb_and_learns(self):
+        remote = {"results": [dict(_movie(5, "Starship Troopers"), media_type="movie")]}
+        with patch("backend.app.tmdb_get", return_value=(remote, None)) as mock_tmdb:
+            first = self.client.get("/api/autocomplete?query=starship").get_json()
+        self.assertEqual(mock_tmdb.call_count, 1)
+        self.assertEqual(first["results"][0]["title"], "Starship Troopers")
+        self.assertEqual(self.index.lookup("starsh")[0]["id"], 5)
+
+    def test_click_boosts_known_and_learns_unknown_titles(self):
+        self.index.add(_movie(1, "Heat"), "movie")
+        self.assertEqual(self.client.post("/api/autocomplete/click", json={"media_type": "movie", "id": 1}).status_code, 200)
+
+        with patch("backend.app.tmdb_get", return_value=({"id": 7, "name": "Heat Wave"}, None)):
+            self.client.post("/api/autocomplete/click", json={"media_type": "tv", "id": 7})
+        self.assertEqual([r["id"] for r in self.index.lookup("heat")], [1, 7])
+
+        bad = self.client.post("/api/autocomplete/click", json={"media_type": "game", "id": 1})
+        self.assertEqual(bad.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
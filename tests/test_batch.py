@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+
+from backend.app import app
+
+
+class BatchLookupTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_duplicates_merge_into_one_tmdb_call_per_title(self):
+        detail = {
+            "id": 550, "title": "Fight Club",
+            "credits": {"cast": [{"id": 1, "name": "A", "popularity": 2.0}]},
+            "watch/providers": {"results": {"US": {"flatrate": []}}},
+        }
+        items = [
+            {"media_type": "movie", "id": 550, "facets": ["details"]},
+            {"media_type": "movie", "id": 550, "facets": ["credits", "providers"]},
+            {"media_type": "movie", "id": 550, "facets": ["details"]},
+        ]
+        with patch("backend.app.tmdb_get", return_value=(detail, None)) as mock_get:
+            response = self.client.post("/api/batch", json={"items": items})
+
+        mock_get.assert_called_once_with("/movie/550", append_to_response="credits,watch/providers")
+        body = response.get_json()["results"]["movie:550"]
+        self.assertEqual(body["details"], {"id": 550, "title": "Fight Club"})
+        self.assertEqual(body["credits"]["cast"][0]["name"], "A")
+        self.assertEqual(body["providers"], {"US": {"flatrate": []}})
+
+    def test_mixed_items_report_errors_per_facet(self):
+        jikan_recs = {"data": [{"entry": {"mal_id": 2, "title": "B", "images": {}}}]}
+        items = [
+            {"media_type": "tv", "id": 7, "facets": ["recommendations"]},
+            {"media_type": "anime", "id": 1, "facets": ["recommendations"]},
+            {"media_type": "movie", "id": 9},
+        ]
+        with patch("backend.app.TMDB_API_KEY", "k"), \
+                patch("backend.recommender.recommend_content_based", return_value=[{"id": 8}]), \
+                patch("backend.jikan.fetch", return_value=jikan_recs), \
+                patch("backend.app.tmdb_get", return_value=(None, "Upstream service unavailable.")):
+            response = self.client.post("/api/batch", json={"items": items})
+
+        results = response.get_json()["results"]
+        self.assertEqual(results["tv:7"], {"recommendations": {"results": [{"id": 8}]}})
+        self.assertEqual(results["anime:1"]["recommendations"]["results"][0]["mal_id"], 2)
+        self.assertEqual(results["movie:9"], {"details": {"error": "Upstream service unavailable."}})
+
+    def test_rejects_unknown_facets_and_oversized_batches(self):
+        bad_facet = self.client.post("/api/batch", json={"items": [{"media_type": "anime", "id": 1, "facets": ["credits"]}]})
+        too_many = self.client.post("/api/batch", json={"items": [{"media_type": "movie", "id": i} for i in range(1, 200)]})
+
+        self.assertEqual(bad_facet.status_code, 400)
+        self.assertEqual(too_many.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
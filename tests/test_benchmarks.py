@@ -0,0 +1,19 @@
+import unittest
+
+from benchmarks.run import run_benchmark
+
+
+class BenchmarkHarnessTests(unittest.TestCase):
+    def test_small_run_reports_latency_and_upstream_calls(self):
+        report = run_benchmark(["movies", "search"], [2], total=6, keys=3,
+                               latency_ms=0, jitter_ms=0, cold=True)
+
+        movies = report["results"]["movies"]["2"]
+        self.assertEqual(movies["errors"], 0)
+        self.assertGreater(movies["p50_ms"], 0)
+        self.assertIn("tmdb", movies["upstream_calls"])
+        self.assertIn("jikan", report["results"]["search"]["2"]["upstream_calls"])
+
+
+if __name__ == "__main__":
+    unittest.main()
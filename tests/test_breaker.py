@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from backend import tmdb, upstream
+from backend.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from backend.cache import CacheEntry, MemoryLRU, TieredCache
+from backend.upstream import DeadlineExceeded, UpstreamClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits += 1
+        status = 500 if self.path.startswith("/fail") else 200
+        if self.path.startswith("/slow") or (self.path.startswith("/tail") and cls.hits == 1):
+            time.sleep(0.4)
+        body = json.dumps({"path": self.path, "hit": cls.hits}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def _breaker(self, **kwargs):
+        options = dict(window=10, min_calls=4, failure_ratio=0.5, slow_seconds=1.0, open_seconds=0.05)
+        options.update(kwargs)
+        return CircuitBreaker("test", **options)
+
+    def test_trips_on_failure_ratio_and_rejects_while_open(self):
+        breaker = self._breaker()
+        for ok in (True, False, True, False):
+            breaker.before_call()
+            breaker.record(ok, 0.01)
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.before_call()
+        self.assertEqual(breaker.stats()["rejected"], 1)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = self._breaker()
+        for _ in range(4):
+            breaker.before_call()
+            breaker.record(True, 2.0)
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = self._breaker(min_calls=1)
+        breaker.before_call()
+        breaker.record(False, 0.01)
+        time.sleep(0.06)
+
+        breaker.before_call()  # the probe
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.before_call()
+        breaker.record(True, 0.01)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_failed_probe_reopens(self):
+        breaker = self._breaker(min_calls=1)
+        breaker.before_call()
+        breaker.record(False, 0.01)
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record(False, 0.01)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.stats()["opened"], 2)
+
+
+class UpstreamFailFastTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.hits = 0
+        self.client = UpstreamClient()
+        self.addCleanup(self.client.close)
+        self.addCleanup(upstream.set_deadline, None)
+
+    def test_open_breaker_fails_without_touching_the_network(self):
+        with patch.dict("os.environ", {"BREAKER_MIN_CALLS": "3"}):
+            for _ in range(3):
+                self.assertEqual(self.client.get(f"{self.base}/fail", coalesce=False).status_code, 500)
+        with self.assertRaises(CircuitOpen):
+            self.client.get(f"{self.base}/ok")
+        self.assertEqual(_Handler.hits, 3)
+        host = f"127.0.0.1:{self.server.server_port}"
+        self.assertEqual(self.client.breaker_stats()[host]["state"], 2)
+
+    def test_request_budget_caps_sequential_calls(self):
+        upstream.set_deadline(0.3)
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.client.get(f"{self.base}/slow", timeout=10)
+        with self.assertRaises(DeadlineExceeded):
+            self.client.get(f"{self.base}/ok")
+        self.assertEqual(_Handler.hits, 1)
+
+    def test_coalesced_callers_keep_their_own_budget(self):
+        results = {}
+        start = threading.Barrier(2)
+
+        def call(name, budget):
+            upstream.set_deadline(budget)
+            start.wait()
+            if name == "patient":
+                time.sleep(0.05)  # join the short-budget caller's flight
+            try:
+                results[name] = self.client.get(f"{self.base}/slow").json()["hit"]
+            except DeadlineExceeded:
+                results[name] = "deadline"
+
+        threads = [threading.Thread(target=call, args=args) for args in (("hurried", 0.1), ("patient", 5))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {"hurried": "deadline", "patient": 1})
+        self.assertEqual(_Handler.hits, 1)
+        self.assertEqual(self.client.flights.stats()["collapsed"], 1)
+
+    def test_slow_tail_is_hedged(self):
+        self.client.set_hedging({f"127.0.0.1:{self.server.server_port}": 0.1})
+        started = time.perf_counter()
+        response = self.client.get(f"{self.base}/tail")
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.json()["hit"], 2)
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual(self.client.hedge_stats()["hedge_wins"], 1)
+
+
+class StaleWhileOpenTests(unittest.TestCase):
+    def test_tmdb_serves_the_last_copy_while_the_breaker_is_open(self):
+        cache = TieredCache(MemoryLRU(8))
+        key = tmdb.cache_key("/movie/1", {"api_key": "k"})
+        cache.set(key, CacheEntry(b'{"id": 1}', 200, 0, 1))  # long expired
+
+        with patch("backend.tmdb.cache", cache), \
+                patch("backend.tmdb.upstream.get", side_effect=CircuitOpen("tmdb", 5)):
+            self.assertEqual(tmdb.fetch("/movie/1", "k"), {"id": 1})
+            with self.assertRaises(CircuitOpen):
+                tmdb.fetch("/movie/2", "k")
+        self.assertEqual(cache.stats()["served_while_open"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from backend import chat
+from backend.app import app, limiter
+from backend.cache import MemoryLRU, TieredCache
+
+
+class _FakeGroq:
+    def __init__(self, answer="It is.", finish_reason="stop"):
+        self.calls = 0
+        self.answer = answer
+        self.finish_reason = finish_reason
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if kwargs.get("stream"):
+            delta = SimpleNamespace(content=self.answer)
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=self.finish_reason)])])
+        message = SimpleNamespace(content=self.answer)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=self.finish_reason)])
+
+
+class ChatCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.groq = _FakeGroq()
+        for p in (patch.object(limiter, "enabled", False),
+                  patch("backend.chat.cache", TieredCache(MemoryLRU(16))),
+                  patch("backend.app.groq_client", self.groq)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app.test_client()
+
+    def _ask(self, message, title="Inception", **kwargs):
+        body = {"movie_title": title, "movie_overview": "Dreams within dreams.", "message": message}
+        return self.client.post("/api/chat", json=body, **kwargs)
+
+    def test_normalized_repeat_questions_share_one_llm_call(self):
+        first = self._ask("Is this worth watching?")
+        second = self._ask("  is THIS worth   watching ")
+
+        self.assertEqual(self.groq.calls, 1)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual((first.headers["X-Chat-Cache"], second.headers["X-Chat-Cache"]), ("miss", "hit"))
+        self.assertEqual(chat.cache_stats()["hit_ratio"], 0.5)
+
+    def test_different_titles_or_questions_miss(self):
+        self._ask("Explain the ending")
+        self._ask("Explain the ending", title="Tenet")
+        self._ask("Who is the villain?")
+        self.assertEqual(self.groq.calls, 3)
+
+    def test_streamed_answers_are_cached_and_replayed(self):
+        self._ask("Explain the ending", query_string={"stream": "1"}).get_data()
+        replay = self._ask("explain the ending", query_string={"stream": "1"})
+
+        self.assertEqual(self.groq.calls, 1)
+        self.assertEqual(replay.headers["X-Chat-Cache"], "hit")
+        frames = [f.split("\n") for f in replay.get_data(as_text=True).strip().split("\n\n")]
+        self.assertEqual(json.loads(frames[0][1].removeprefix("data: ")), {"text": "It is."})
+        self.assertEqual(self._ask("Explain the ending").get_json(), {"response": "It is."})
+
+    def test_truncated_answers_are_not_cached(self):
+        self.groq.finish_reason = "length"
+        self._ask("Summarise every scene")
+        self._ask("Summarise every scene", query_string={"stream": "1"}).get_data()
+        self._ask("Summarise every scene")
+
+        self.assertEqual(self.groq.calls, 3)
+        self.assertEqual(chat.cache_stats()["hits"], 0)
+
+    def test_answers_expire_after_the_ttl(self):
+        with patch.dict("os.environ", {"CHAT_CACHE_TTL": "1"}):
+            chat.store_answer("k", "old")
+        self.assertEqual(chat.cached_answer("k"), "old")
+        with patch("backend.cache.time.time", return_value=time.time() + 2):
+            self.assertIsNone(chat.cached_answer("k"))
+
+
+if __name__ == "__main__":
+    unittest.main()
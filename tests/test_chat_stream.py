@@ -0,0 +1,110 @@
+import json
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from backend import chat
+from backend.app import app, limiter
+from backend.cache import MemoryLRU, TieredCache
+
+
+def _chunk(text=None, finish_reason=None):
+    delta = SimpleNamespace(content=text)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class _FakeStream:
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if self.closed:
+                return
+            time.sleep(self.delay)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeGroq:
+    def __init__(self, stream):
+        self.stream = stream
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.stream
+
+
+def _frames(body: str) -> list:
+    out = []
+    for frame in body.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        out.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return out
+
+
+class ChatStreamTests(unittest.TestCase):
+    def setUp(self):
+        for p in (patch.object(limiter, "enabled", False),
+                  patch("backend.chat.cache", TieredCache(MemoryLRU(16)))):
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app.test_client()
+
+    def test_tokens_are_relayed_as_server_sent_events(self):
+        fake = _FakeGroq(_FakeStream([_chunk("Fight "), _chunk("Club"), _chunk(None, "stop")]))
+        with patch("backend.app.groq_client", fake):
+            response = self.client.post("/api/chat?stream=1", json={"movie_title": "Fight Club", "message": "hi"})
+            body = response.get_data(as_text=True)
+
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertEqual(_frames(body), [
+            ("token", {"text": "Fight "}),
+            ("token", {"text": "Club"}),
+            ("done", {"finish_reason": "stop"}),
+        ])
+        self.assertTrue(fake.calls[0]["stream"])
+        self.assertIn("Fight Club", fake.calls[0]["messages"][0]["content"])
+
+    def test_deadline_ends_the_stream_and_closes_upstream(self):
+        stream = _FakeStream([_chunk("a"), _chunk("b"), _chunk("c")], delay=0.05)
+        events = list(chat.stream_events(_FakeGroq(stream), [], limit=0.07))
+
+        self.assertEqual(events[-1], chat.sse("error", {"error": "timeout"}))
+        self.assertTrue(stream.closed)
+
+    def test_client_disconnect_closes_upstream(self):
+        stream = _FakeStream([_chunk("a"), _chunk("b"), _chunk("c")])
+        before = chat.stats()["cancelled"]
+        events = chat.stream_events(_FakeGroq(stream), [])
+        next(events)
+        events.close()  # what the WSGI server does when the browser goes away
+
+        self.assertTrue(stream.closed)
+        self.assertEqual(chat.stats()["cancelled"], before + 1)
+
+    def test_upstream_failure_becomes_an_error_event(self):
+        class _Broken:
+            chat = SimpleNamespace(completions=SimpleNamespace(create=lambda **_: 1 / 0))
+        events = list(chat.stream_events(_Broken(), []))
+        self.assertEqual(events, [chat.sse("error", {"error": "unavailable"})])
+
+    def test_non_streaming_mode_is_unchanged(self):
+        completion = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Hello"),
+                                                              finish_reason="stop")])
+        fake = _FakeGroq(completion)
+        with patch("backend.app.groq_client", fake):
+            response = self.client.post("/api/chat", json={"message": "hi"})
+        self.assertEqual(response.get_json(), {"response": "Hello"})
+        self.assertNotIn("stream", fake.calls[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import urllib.parse
+from unittest.mock import MagicMock, patch
+
+from backend import comment_store
+from backend.app import app, limiter
+from backend.cache import MemoryLRU, TieredCache
+from backend.comment_store import CommentCache
+
+USER_ID = "00000000-0000-4000-8000-000000000001"
+
+
+def _row(i: int) -> dict:
+    # Newest first: higher i is newer
+    return {"id": i, "username": "u", "content": f"c{i}", "created_at": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z"}
+
+
+def _response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    response.raise_for_status.return_value = None
+    return response
+
+
+def _query(url: str) -> dict:
+    return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+
+
+class _FakeSupabase:
+    """Answers comment SELECTs from an in-memory table the way PostgREST would."""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=comment_store.sort_key, reverse=True)
+        self.queries = []
+
+    def get(self, url, **_):
+        query = _query(url)
+        self.queries.append(query)
+        rows = self.rows
+        if "or" in query:
+            created_at = query["or"].split('"')[1]
+            row_id = int(query["or"].rsplit("id.lt.", 1)[1].rstrip("))"))
+            rows = [r for r in rows if comment_store.sort_key(r) < (created_at, row_id)]
+        return _response(rows[:int(query["limit"])])
+
+
+class CommentPageTests(unittest.TestCase):
+    def setUp(self):
+        for p in (patch.object(limiter, "enabled", False),
+                  patch("backend.comment_store.cache", CommentCache(TieredCache(MemoryLRU(16)), rows=5, ttl=60))):
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app.test_client()
+
+    def _get(self, fake, **params):
+        with patch("backend.app.upstream.get", side_effect=fake.get):
+            return self.client.get("/api/comments", query_string={"media_id": 7, "media_type": "movie", **params})
+
+    def test_head_is_served_from_cache_after_the_first_read(self):
+        fake = _FakeSupabase([_row(i) for i in range(3)])
+        first = self._get(fake).get_json()
+        second = self._get(fake).get_json()
+
+        self.assertEqual(first, second)
+        self.assertEqual([r["id"] for r in first["results"]], [2, 1, 0])
+        self.assertIsNone(first["next_cursor"])
+        self.assertEqual(len(fake.queries), 1)
+        self.assertEqual(fake.queries[0]["order"], "created_at.desc,id.desc")
+        self.assertEqual(comment_store.cache.stats()["hits"], 1)
+
+    def test_cursor_walks_every_row_once(self):
+        fake = _FakeSupabase([_row(i) for i in range(12)])
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, **({"before": cursor} if cursor else {})}
+            body = self._get(fake, **params).get_json()
+            seen += [r["id"] for r in body["results"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, list(range(11, -1, -1)))
+        # Pages past the cached head are keyset queries
+        self.assertTrue(any("or" in q for q in fake.queries))
+
+    def test_deep_pages_of_a_short_thread_come_from_cache(self):
+        fake = _FakeSupabase([_row(i) for i in range(4)])
+        head = self._get(fake, limit=2).get_json()
+        tail = self._get(fake, limit=2, before=head["next_cursor"]).get_json()
+
+        self.assertEqual([r["id"] for r in tail["results"]], [1, 0])
+        self.assertIsNone(tail["next_cursor"])
+        self.assertEqual(len(fake.queries), 1)
+
+    def test_malformed_cursor_is_rejected(self):
+        fake = _FakeSupabase([])
+        injected = comment_store.encode_cursor({"created_at": '2024",id.gt.0', "id": 1})
+        for cursor in ("not-a-cursor", injected):
+            response = self._get(fake, before=cursor)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(fake.queries, [])
+
+    def test_post_is_written_through_to_the_cached_thread(self):
+        fake = _FakeSupabase([_row(i) for i in range(2)])
+        self._get(fake)
+        new = _row(30)
+        with patch("backend.app.upstream.post", return_value=_response([new])):
+            posted = self.client.post("/api/comments", json={
+                "content": "nice", "media_id": 7, "media_type": "movie", "user_id": USER_ID,
+            })
+        body = self._get(fake).get_json()
+
+        self.assertEqual(posted.get_json()["comment"], new)
+        self.assertEqual([r["id"] for r in body["results"]], [30, 1, 0])
+        self.assertEqual(len(fake.queries), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
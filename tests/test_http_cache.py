@@ -0,0 +1,68 @@
+import gzip
+import unittest
+from unittest.mock import patch
+
+from backend import http_cache
+from backend.app import app
+
+_GENRES = {"genres": [{"id": i, "name": f"Genre {i}"} for i in range(80)]}
+
+
+class HttpCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        patches = [
+            patch("backend.app.TMDB_API_KEY", "k"),
+            patch("backend.app.tmdb_get", return_value=(_GENRES, None)),
+            patch("backend.http_cache.brotli", None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_catalog_routes_get_cdn_cache_control_and_etag(self):
+        response = self.client.get("/api/genres?type=movie")
+
+        self.assertEqual(
+            response.headers["Cache-Control"],
+            "public, max-age=3600, s-maxage=86400, stale-while-revalidate=604800",
+        )
+        self.assertTrue(response.headers["ETag"].startswith('"'))
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+    def test_matching_if_none_match_returns_304(self):
+        etag = self.client.get("/api/genres?type=movie").headers["ETag"]
+        response = self.client.get("/api/genres?type=movie", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+
+    def test_large_bodies_are_gzipped_and_revalidate_across_codings(self):
+        response = self.client.get("/api/genres?type=movie", headers={"Accept-Encoding": "gzip, deflate"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.get_data()), self.client.get("/api/genres?type=movie").get_data())
+        plain = self.client.get("/api/genres?type=movie", headers={"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(plain.status_code, 304)
+
+    def test_error_payloads_are_not_publicly_cached(self):
+        with patch("backend.app.tmdb_get", return_value=(None, "Missing TMDB_API_KEY.")):
+            response = self.client.get("/api/autocomplete?query=zzqx")
+
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+
+    def test_full_detail_is_cdn_cached_only_without_comments(self):
+        with patch("backend.app._fetch_comments", return_value=[]):
+            with_comments = self.client.get("/api/movie/7/full")
+            without = self.client.get("/api/movie/7/full?include=details,credits")
+
+        self.assertEqual(with_comments.headers["Cache-Control"], "no-cache")
+        self.assertTrue(with_comments.headers["ETag"])
+        self.assertEqual(without.headers["Cache-Control"], http_cache.cache_control("detail"))
+
+    def test_personalised_recommendations_are_private(self):
+        self.assertEqual(http_cache.cache_control("live", private=True), "private, no-cache")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from backend import jikan
+from backend.cache import MemoryLRU, TieredCache
+
+
+class _FakeResponse:
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(payload or {}).encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+
+class JikanSchedulerTests(unittest.TestCase):
+    def test_burst_queues_instead_of_failing(self):
+        scheduler = jikan.Scheduler([jikan.TokenBucket(rate=20, capacity=2)])
+        start = time.monotonic()
+        for _ in range(4):
+            scheduler.acquire(deadline=1)
+
+        # Two tokens up front, two more at 20/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(scheduler.stats()["granted"], 4)
+
+    def test_unreachable_deadline_fails_fast(self):
+        scheduler = jikan.Scheduler([jikan.TokenBucket(rate=0.1, capacity=1)])
+        scheduler.acquire()
+        start = time.monotonic()
+
+        with self.assertRaises(jikan.RateLimited):
+            scheduler.acquire(deadline=1)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_interactive_lane_goes_first(self):
+        scheduler = jikan.Scheduler([jikan.TokenBucket(rate=10, capacity=1)])
+        scheduler.acquire()
+        order = []
+
+        def take(lane):
+            scheduler.acquire(lane, deadline=2)
+            order.append(lane)
+
+        background = threading.Thread(target=take, args=("background",))
+        background.start()
+        time.sleep(0.02)
+        interactive = threading.Thread(target=take, args=("interactive",))
+        interactive.start()
+        background.join()
+        interactive.join()
+
+        self.assertEqual(order, ["interactive", "background"])
+
+
+class JikanFetchTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = TieredCache(MemoryLRU(8))
+        for target, value in (("backend.jikan.cache", self.cache), ("backend.jikan.scheduler", jikan.Scheduler([]))):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_full_details_are_cached(self):
+        with patch("backend.jikan.upstream.get", return_value=_FakeResponse(payload={"data": {"mal_id": 1}})) as mock_get:
+            jikan.fetch("/anime/1/full")
+            data = jikan.fetch("/anime/1/full")
+
+        self.assertEqual(data, {"data": {"mal_id": 1}})
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(jikan.ttl_class("/anime/1/full")[0], "details")
+        self.assertEqual(jikan.ttl_class("/top/anime")[0], "top")
+
+    def test_retry_after_is_honoured(self):
+        responses = [_FakeResponse(429, headers={"Retry-After": "0.05"}), _FakeResponse(payload={"data": []})]
+        with patch("backend.jikan.upstream.get", side_effect=responses) as mock_get:
+            start = time.monotonic()
+            data = jikan.fetch("/top/anime", page=1)
+
+        self.assertEqual(data, {"data": []})
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(jikan.scheduler.stats()["throttled"], 1)
+
+    def test_retry_after_past_deadline_surfaces_429(self):
+        with patch("backend.jikan.upstream.get", return_value=_FakeResponse(429, headers={"Retry-After": "30"})):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                jikan.fetch("/anime", lane="background", deadline=1, q="x")
+
+
+if __name__ == "__main__":
+    unittest.main()
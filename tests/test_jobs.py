@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from backend import jobs
+from backend.app import app, limiter
+
+
+class JobStoreTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "jobs.sqlite3")
+        self.store = jobs.JobStore(self.path)
+        handlers = patch.dict(jobs.HANDLERS, clear=True)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def test_only_due_jobs_run_and_survive_a_restart(self):
+        calls = []
+        jobs.register("note", lambda text: calls.append(text))
+        self.store.enqueue("note", {"text": "now"})
+        later = self.store.enqueue("note", {"text": "later"}, run_at=time.time() + 3600)
+
+        reopened = jobs.JobStore(self.path)
+        summary = jobs.run_due(reopened)
+
+        self.assertEqual(calls, ["now"])
+        self.assertEqual(summary["ran"], 1)
+        self.assertEqual(reopened.get(later)["status"], "pending")
+
+    def test_claims_in_batches(self):
+        jobs.register("noop", lambda: None)
+        for _ in range(5):
+            self.store.enqueue("noop", {})
+        with patch.dict("os.environ", {"JOBS_BATCH_SIZE": "2"}):
+            summary = jobs.run_due(self.store)
+        self.assertEqual((summary["ran"], summary["batches"], summary["done"]), (5, 3, 5))
+
+    def test_failures_back_off_then_park_as_dead(self):
+        def boom():
+            raise OSError("smtp down")
+        jobs.register("flaky", boom)
+        job_id = self.store.enqueue("flaky", {})
+
+        with patch.dict("os.environ", {"JOBS_MAX_ATTEMPTS": "2", "JOBS_BACKOFF_SECONDS": "60"}):
+            jobs.run_due(self.store)
+            row = self.store.get(job_id)
+            self.assertEqual((row["status"], row["attempts"]), ("pending", 1))
+            self.assertGreater(row["run_at"], time.time() + 50)
+
+            self.store.claim(10, 300, now=row["run_at"])  # pretend the backoff elapsed
+            self.store.fail(job_id, "OSError: smtp down", None)
+        row = self.store.get(job_id)
+        self.assertEqual(row["status"], "dead")
+        self.assertIn("smtp down", row["last_error"])
+
+    def test_expired_lease_is_reclaimed(self):
+        job_id = self.store.enqueue("note", {"text": "x"})
+        first = self.store.claim(10, lease=30)
+        self.assertEqual([job.id for job in first], [job_id])
+        self.assertEqual(self.store.claim(10, lease=30), [])
+        again = self.store.claim(10, lease=30, now=time.time() + 31)
+        self.assertEqual([(job.id, job.attempts) for job in again], [(job_id, 2)])
+
+    def test_backoff_doubles_and_caps(self):
+        self.assertEqual([jobs.backoff(n, 60) for n in (1, 2, 3)], [60, 120, 240])
+        self.assertEqual(jobs.backoff(30, 60), jobs.MAX_BACKOFF)
+
+    def test_cli_drains_only_the_given_queue_without_a_worker(self):
+        from backend import outbox
+        jobs.register(outbox.JOB_KIND, outbox._deliver)  # setUp cleared the handlers outbox registered
+        jobs.JobStore(self.path).enqueue("email", {"to_email": "a@example.com", "subject": "s", "html": "h"})
+        with patch.dict("os.environ", {"SMTP_USER": "u", "SMTP_PASS": "p"}), \
+                patch("backend.outbox.sender.send") as send, patch("builtins.print"):
+            self.assertEqual(jobs.main(["run-due", "--db", self.path]), 0)
+
+        send.assert_called_once_with("a@example.com", "s", "h")
+        self.assertEqual(jobs.JobStore(self.path).counts()["done"], 1)
+        # Importing backend.app (done by this module) must not have started a worker either
+        self.assertIsNone(jobs.worker._thread)
+
+    def test_default_db_moves_to_the_temp_dir_on_a_read_only_tree(self):
+        with patch("backend.jobs.os.access", return_value=False):
+            self.assertTrue(jobs._default_db().startswith(tempfile.gettempdir()))
+        with patch("backend.jobs.os.access", return_value=True):
+            self.assertEqual(jobs._default_db(), str(jobs.ROOT / "data" / "jobs.sqlite3"))
+
+
+class CheckinSchedulingTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = jobs.JobStore(os.path.join(tmp.name, "jobs.sqlite3"))
+        patches = [
+            patch("backend.jobs._store", self.store),
+            patch.dict("os.environ", {"SMTP_USER": "u", "SMTP_PASS": "p", "JOBS_WORKER": "0",
+                                      "CRON_SECRET": "s3cret"}),
+            patch.object(limiter, "enabled", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app.test_client()
+
+    def test_signups_enqueue_jobs_without_spawning_threads(self):
+        before = threading.active_count()
+        for i in range(20):
+            response = self.client.post("/api/schedule-checkin-email",
+                                        json={"email": f"user{i}@example.com", "title": "Dune"})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(threading.active_count(), before)
+        self.assertEqual(self.store.counts()["pending"], 20)
+        self.assertEqual(self.store.claim(50, 300), [])  # all 1–5 hours out
+
+    def test_unwritable_queue_is_a_clean_error(self):
+        with patch("backend.outbox.enqueue", side_effect=sqlite3.OperationalError("unable to open database file")):
+            response = self.client.post("/api/schedule-checkin-email",
+                                        json={"email": "user@example.com", "title": "Dune"})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()["success"], False)
+
+    def test_cron_route_requires_the_secret(self):
+        self.assertEqual(self.client.post("/api/jobs/run").status_code, 401)
+        with patch("backend.outbox.sender.send") as send:
+            response = self.client.get("/api/jobs/run", headers={"Authorization": "Bearer s3cret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["ran"], 0)
+        send.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from backend import metrics
+from backend.app import app
+
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_endpoint_templates_collapse_ids(self):
+        self.assertEqual(metrics.endpoint_template("https://api.themoviedb.org/3/movie/550/credits"),
+                         "/3/movie/{id}/credits")
+        self.assertEqual(metrics.upstream_name("https://abc.supabase.co/rest/v1/comments"), "supabase")
+
+    def test_responses_carry_server_timing(self):
+        response = self.client.get("/api/health")
+
+        self.assertIn("app;dur=", response.headers["Server-Timing"])
+
+    def test_upstream_time_is_attributed_to_the_request(self):
+        timings = metrics.begin_request()
+        metrics.bind(metrics.add_request_time)("tmdb", 0.05)
+        metrics.end_request()
+
+        self.assertTrue(timings.server_timing().startswith('tmdb;dur=50.0;desc="1 call"'))
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        metrics.registry.observe_upstream("tmdb", "/3/movie/{id}", 0.03, error="http_5xx")
+        response = self.client.get("/metrics")
+
+        body = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('watchnext_upstream_request_duration_seconds_bucket{upstream="tmdb",'
+                      'endpoint="/3/movie/{id}",le="0.05"}', body)
+        self.assertIn('watchnext_upstream_errors_total{upstream="tmdb",endpoint="/3/movie/{id}",'
+                      'kind="http_5xx"}', body)
+        self.assertIn("watchnext_tmdb_cache_hits", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
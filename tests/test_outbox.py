@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from backend import jobs, outbox
+from backend.app import app, limiter
+from benchmarks.fake_smtp import FakeSMTP
+
+
+class OutboxTests(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeSMTP().start()
+        self.addCleanup(self.server.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = jobs.JobStore(os.path.join(tmp.name, "jobs.sqlite3"))
+        self.sender = outbox.Sender()
+        self.addCleanup(self.sender.close)
+        patches = [
+            patch("backend.jobs._store", self.store),
+            patch("backend.outbox.sender", self.sender),
+            patch.dict("os.environ", {
+                "SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(self.server.port), "SMTP_STARTTLS": "0",
+                "SMTP_USER": "noreply@example.com", "SMTP_PASS": "p", "JOBS_WORKER": "0",
+            }),
+            patch.object(limiter, "enabled", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app.test_client()
+
+    def test_welcome_mail_is_sent_during_the_request_over_the_pool(self):
+        for address in ("new@example.com", "other@example.com"):
+            response = self.client.post("/api/send-welcome-email", json={"email": address})
+            self.assertEqual(response.get_json(), {"success": True})
+
+        self.assertEqual(self.store.counts()["pending"], 0)
+        self.assertEqual([m["to"] for m in self.server.messages], [["new@example.com"], ["other@example.com"]])
+        self.assertIn(b"Welcome_to_WatchNextAI", self.server.messages[0]["data"])  # encoded subject
+        self.assertEqual(self.server.snapshot()["connections"], 1)
+
+    def test_failed_welcome_mail_is_reported(self):
+        self.server.stop()
+        response = self.client.post("/api/send-welcome-email", json={"email": "new@example.com"})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()["success"], False)
+
+    def test_a_batch_shares_one_authenticated_connection(self):
+        for i in range(5):
+            outbox.enqueue(f"user{i}@example.com", "Hi", "<p>hi</p>")
+        summary = jobs.run_due(self.store)
+
+        self.assertEqual(summary["done"], 5)
+        counts = self.server.snapshot()
+        self.assertEqual((counts["messages"], counts["connections"], counts["logins"]), (5, 1, 1))
+
+    def test_dropped_connection_is_reopened_once(self):
+        self.sender.send("a@example.com", "Hi", "<p>1</p>")
+        self.server.drop_next = True
+        self.sender.send("b@example.com", "Hi", "<p>2</p>")
+
+        self.assertEqual(self.server.snapshot()["messages"], 2)
+        self.assertEqual(self.sender.stats()["reconnects"], 1)
+        self.assertEqual(self.server.snapshot()["connections"], 2)
+
+    def test_idle_connection_is_replaced(self):
+        with patch.dict("os.environ", {"SMTP_IDLE_SECONDS": "0.1"}):
+            self.sender.send("a@example.com", "Hi", "<p>1</p>")
+            time.sleep(0.2)
+            self.sender.send("b@example.com", "Hi", "<p>2</p>")
+        self.assertEqual(self.server.snapshot()["connections"], 2)
+        self.assertEqual(self.sender.stats()["reconnects"], 0)
+
+    def test_unreachable_server_leaves_the_message_queued_for_retry(self):
+        job_id = outbox.enqueue("a@example.com", "Hi", "<p>hi</p>")
+        self.server.stop()
+        jobs.run_due(self.store)
+
+        row = self.store.get(job_id)
+        self.assertEqual((row["status"], row["attempts"]), ("pending", 1))
+        self.assertEqual(self.sender.stats()["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch
+
+import requests
+from flask import Flask
+
+from backend import json_provider, tmdb
+from backend.app import app
+from backend.cache import MemoryLRU, TieredCache
+
+
+class _FakeResponse:
+    def __init__(self, content: bytes, content_type: str = "application/json;charset=utf-8"):
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type}
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class PassthroughTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        patches = [
+            patch("backend.app.TMDB_API_KEY", "k"),
+            patch("backend.tmdb.cache", TieredCache(MemoryLRU(8))),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_detail_bytes_are_relayed_without_decoding(self):
+        body = b'{"id": 550, "title": "Fight Club"}'
+        with patch("backend.tmdb.upstream.get", return_value=_FakeResponse(body)), \
+                patch("backend.tmdb.json.loads") as mock_loads:
+            response = self.client.get("/api/movie/550")
+
+        mock_loads.assert_not_called()
+        self.assertEqual(response.get_data(), body)
+        self.assertEqual(response.mimetype, "application/json")
+
+    def test_non_json_upstream_bodies_are_rejected(self):
+        with patch("backend.tmdb.upstream.get", return_value=_FakeResponse(b"<html>", "text/html")):
+            with self.assertRaises(requests.exceptions.InvalidJSONError):
+                tmdb.fetch_raw("/person/1", "k")
+            response = self.client.get("/api/person/1")
+
+        self.assertEqual(response.status_code, 502)
+
+
+class JsonProviderTests(unittest.TestCase):
+    def test_providers_produce_equivalent_json(self):
+        payload = {"results": [{"id": 1, "title": "é"}], "genres": {28: "Action"}}
+        outputs = {}
+        for name in json_provider.PROVIDERS:
+            if name == "orjson" and json_provider.orjson is None:
+                continue
+            flask_app = Flask(__name__)
+            json_provider.install(flask_app, name)
+            with flask_app.app_context():
+                outputs[name] = flask_app.json.loads(flask_app.json.response(payload).get_data())
+
+        for output in outputs.values():
+            self.assertEqual(output, {"results": [{"id": 1, "title": "é"}], "genres": {"28": "Action"}})
+
+    def test_unavailable_provider_falls_back_to_default(self):
+        with patch("backend.json_provider.orjson", None):
+            self.assertEqual(json_provider.provider_name("orjson"), "default")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+
+from backend import projection
+from backend.app import app
+
+_ANIME = {
+    "mal_id": 5, "title": "Bebop", "score": 8.8, "episodes": 26,
+    "images": {"jpg": {"image_url": "a.jpg", "large_image_url": "b.jpg", "small_image_url": "c.jpg"},
+               "webp": {"image_url": "a.webp"}},
+    "aired": {"from": "1998-04-03", "to": "1999-04-24", "prop": {"from": {"day": 3}}},
+    "genres": [{"mal_id": 1, "name": "Action", "url": "https://example"}],
+    "trailer": {"youtube_id": "x", "embed_url": "y"},
+    "producers": [{"mal_id": 23, "name": "Bandai"}],
+    "synopsis": "A long synopsis " * 50,
+}
+
+
+class ProjectionTests(unittest.TestCase):
+    def test_card_profile_keeps_only_what_cards_render(self):
+        [card] = projection.apply([_ANIME], projection.CARD, "anime")
+
+        self.assertEqual(card, {
+            "mal_id": 5, "title": "Bebop", "score": 8.8, "episodes": 26,
+            "images": {"jpg": {"image_url": "a.jpg", "large_image_url": "b.jpg"}},
+            "aired": {"from": "1998-04-03"},
+            "genres": [{"mal_id": 1, "name": "Action"}],
+        })
+
+    def test_custom_fields_and_full(self):
+        spec = projection.parse("title,images.webp")
+
+        self.assertEqual(projection.apply([_ANIME], spec),
+                         [{"title": "Bebop", "images": {"webp": {"image_url": "a.webp"}}}])
+        self.assertIsNone(projection.parse("full"))
+        with self.assertRaises(projection.InvalidFields):
+            projection.parse("title,../x")
+
+    def test_anime_route_returns_cards_by_default(self):
+        with patch("backend.jikan.fetch", return_value={"data": [_ANIME]}):
+            client = app.test_client()
+            default = client.get("/api/anime?category=top").get_json()["anime"][0]
+            full = client.get("/api/anime?category=top&fields=full").get_json()["anime"][0]
+            invalid = client.get("/api/anime?category=top&fields=a..b")
+
+        self.assertNotIn("synopsis", default)
+        self.assertIn("synopsis", full)
+        self.assertEqual(invalid.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from backend import recommender
+from backend.rec_store import RecommendationStore, decode_cursor, encode_cursor
+
+USER_ID = "00000000-0000-4000-8000-000000000001"
+
+
+def _item(iid, genre_ids=(), vote_average=7.0, vote_count=500):
+    return {"id": iid, "genre_ids": list(genre_ids), "vote_average": vote_average, "vote_count": vote_count}
+
+
+SEED_PAYLOADS = {
+    "/movie/1": {
+        "genres": [{"id": 28}],
+        "recommendations": {"results": [_item(10, [28]), _item(11, [35])]},
+        "similar": {"results": [_item(12, [28])]},
+    },
+    "/movie/2": {
+        "genres": [{"id": 35}],
+        "recommendations": {"results": [_item(10, [28]), _item(1)]},
+        "similar": {"results": [_item(13, [18], vote_average=9.0, vote_count=2000)]},
+    },
+}
+
+
+def _fake_tmdb(path, api_key, **params):
+    return SEED_PAYLOADS.get(path, {})
+
+
+def _reference_scores(seed_results, watched_ids, preferred_genres):
+    """The original per-candidate loop, kept to pin the vectorized formula."""
+    candidate_map = {}
+    for recs, rating_weight in seed_results:
+        for item in recs:
+            iid = item.get("id")
+            if not iid or iid in watched_ids:
+                continue
+            data = candidate_map.setdefault(iid, {"item": item, "freq": 0, "weight_sum": 0.0})
+            data["freq"] += 1
+            data["weight_sum"] += rating_weight
+    max_freq = max(c["freq"] for c in candidate_map.values())
+    max_genre_val = max(preferred_genres.values(), default=1.0)
+    scores = {}
+    for iid, data in candidate_map.items():
+        item = data["item"]
+        quality = item.get("vote_average", 0) / 10.0 * min(item.get("vote_count", 0), 1000) / 1000.0
+        genre_raw = sum(preferred_genres.get(g, 0.0) for g in item.get("genre_ids", []))
+        genre_score = min(genre_raw / (max_genre_val * 3), 1.0)
+        scores[iid] = (data["freq"] / max_freq * 0.40 + data["weight_sum"] / data["freq"] * 0.25
+                       + genre_score * 0.25 + quality * 0.10)
+    return scores
+
+
+class RecommenderTests(unittest.TestCase):
+    def test_one_append_to_response_call_per_seed(self):
+        history = [
+            {"media_id": 1, "media_type": "movie", "rating": 5, "title": "A"},
+            {"media_id": 2, "media_type": "movie", "rating": 4, "title": "B"},
+        ]
+        with patch("backend.recommender.get_user_history", return_value=history):
+            with patch("backend.recommender._tmdb", side_effect=_fake_tmdb) as mock_tmdb:
+                results = recommender.recommend_for_user(USER_ID, "movie", "k", "u", "s")
+
+        self.assertEqual(mock_tmdb.call_count, 2)
+        for call in mock_tmdb.call_args_list:
+            self.assertEqual(call.kwargs["append_to_response"], "recommendations,similar")
+        ids = [r["id"] for r in results]
+        self.assertEqual(ids[0], 10)  # surfaced by both seeds
+        self.assertNotIn(1, ids)       # already watched
+        self.assertEqual(set(ids), {10, 11, 12, 13})
+
+    def test_candidate_pool_keeps_the_original_twelve_per_list(self):
+        payloads = {"/movie/1": {
+            "recommendations": {"results": [_item(100 + i) for i in range(20)]},
+            "similar": {"results": [_item(200 + i) for i in range(20)]},
+        }}
+        history = [{"media_id": 1, "media_type": "movie", "rating": 5, "title": "A"}]
+        with patch("backend.recommender.get_user_history", return_value=history), \
+                patch("backend.recommender._tmdb", side_effect=lambda path, *_, **__: payloads.get(path, {})):
+            results = recommender.recommend_for_user(USER_ID, "movie", "k", "u", "s", limit=100)
+
+        ids = {r["id"] for r in results}
+        self.assertEqual(ids, {100 + i for i in range(12)} | {200 + i for i in range(12)})
+
+    def test_content_based_merges_recommendations_and_similar(self):
+        with patch("backend.recommender._tmdb", side_effect=_fake_tmdb) as mock_tmdb:
+            results = recommender.recommend_content_based("movie", 2, "k")
+
+        mock_tmdb.assert_called_once()
+        self.assertEqual([r["id"] for r in results], [13, 10, 1])
+        self.assertTrue(all(r["media_type"] == "movie" for r in results))
+
+    def test_store_reuses_ranking_until_history_changes(self):
+        store = RecommendationStore()
+        history = [{"media_id": 1, "media_type": "movie", "rating": 5, "title": "A"}]
+        with patch("backend.recommender._tmdb", side_effect=_fake_tmdb) as mock_tmdb:
+            with patch("backend.recommender.get_user_history", return_value=history):
+                first = recommender.recommend_for_user(USER_ID, "movie", "k", "u", "s", store=store)
+                again = recommender.recommend_for_user(USER_ID, "movie", "k", "u", "s", store=store)
+            self.assertEqual(mock_tmdb.call_count, 1)
+            self.assertEqual(first, again)
+
+            history = history + [{"media_id": 2, "media_type": "movie", "rating": 4, "title": "B"}]
+            with patch("backend.recommender.get_user_history", return_value=history):
+                recommender.recommend_for_user(USER_ID, "movie", "k", "u", "s", store=store)
+            self.assertEqual(mock_tmdb.call_count, 3)
+
+    def test_vectorized_scoring_matches_reference_formula(self):
+        rng = random.Random(7)
+        seed_results = []
+        for _ in range(8):
+            recs = [
+                _item(rng.randint(1, 400), rng.sample(range(10, 30), 3),
+                      round(rng.uniform(0, 10), 1), rng.randint(0, 3000))
+                for _ in range(300)
+            ]
+            seed_results.append((recs, rng.choice([0.2, 0.6, 1.0])))
+        preferred = {g: rng.uniform(0.2, 3.0) for g in range(10, 20)}
+
+        expected = _reference_scores(seed_results, {1, 2, 3}, preferred)
+        ranked = recommender._score_candidates(seed_results, {1, 2, 3}, preferred, 50)
+
+        best = sorted(expected.values(), reverse=True)[:50]
+        got = [expected[item["id"]] for item in ranked]
+        for want, have in zip(best, got):
+            self.assertAlmostEqual(want, have, places=12)
+        self.assertEqual(len(ranked), 50)
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(40, "abc")), (40, "abc"))
+        self.assertEqual(decode_cursor(encode_cursor(40)), (40, None))
+        self.assertIsNone(decode_cursor("not-a-cursor"))
+
+
+class RecommendationPagingTests(unittest.TestCase):
+    def setUp(self):
+        from backend.app import app, limiter
+        for p in (patch.object(limiter, "enabled", False),
+                  patch("backend.app.TMDB_API_KEY", "k"),
+                  patch("backend.app.rec_store.store", RecommendationStore())):
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app.test_client()
+        self.ranked = [_item(1000 + i) for i in range(100)]
+
+    def _get(self, history, **params):
+        with patch("backend.recommender.get_user_history", return_value=history), \
+                patch("backend.recommender._rank_history", return_value=self.ranked):
+            return self.client.get("/api/recommendations",
+                                   query_string={"media_type": "movie", "user_id": USER_ID, **params})
+
+    def test_cursor_is_rejected_once_the_history_changes(self):
+        history = [{"media_id": 1, "media_type": "movie", "rating": 5, "title": "A"}]
+        first = self._get(history).get_json()
+        self.assertEqual(self._get(history, cursor=first["next_cursor"]).status_code, 200)
+
+        history = history + [{"media_id": 2, "media_type": "movie", "rating": 4, "title": "B"}]
+        stale = self._get(history, cursor=first["next_cursor"])
+        self.assertEqual(stale.status_code, 409)
+
+    def test_page_is_clamped_to_the_materialized_depth(self):
+        history = [{"media_id": 1, "media_type": "movie", "rating": 5, "title": "A"}]
+        last = self._get(history, page=5).get_json()
+        beyond = self._get(history, page=50).get_json()
+
+        self.assertEqual([r["id"] for r in last["results"]], list(range(1080, 1100)))
+        self.assertEqual(beyond["results"], last["results"])
+        self.assertIsNone(last["next_cursor"])
+
+
+if __name__ == "__main__":
+    unittest.main()
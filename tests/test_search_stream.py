@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from backend.app import app
+
+
+class SearchStreamTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+        def movies(query, page):
+            time.sleep(0.05)
+            return [{"id": 1, "media_type": "movie"}]
+
+        def tv(query, page):
+            return [{"id": 2, "media_type": "tv"}]
+
+        def anime(query, page):
+            self.release.wait(5)
+            return [{"mal_id": 3, "media_type": "anime"}]
+
+        patches = [
+            patch("backend.app.TMDB_API_KEY", "k"),
+            patch.dict("backend.app._SEARCH_SOURCES", {"movie": movies, "tv": tv, "anime": anime}),
+            patch.dict("backend.app.SEARCH_DEADLINES", {"movie": 1.0, "tv": 1.0, "anime": 0.2}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_stream_emits_sources_in_completion_order(self):
+        started = time.monotonic()
+        response = self.client.get("/api/search?query=x&stream=1")
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual([e.get("source") for e in events], ["tv", "movie", "anime", None])
+        self.assertEqual(events[2], {"source": "anime", "results": [], "error": "timeout"})
+        self.assertEqual(events[-1], {"done": True})
+        # The slow source was abandoned at its deadline, not waited for
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_buffered_mode_keeps_source_order_and_reports_timeouts(self):
+        body = self.client.get("/api/search?query=x").get_json()
+
+        self.assertEqual([r["id"] for r in body["results"]], [1, 2])
+        self.assertEqual(body["timed_out"], ["anime"])
+
+    def test_failed_source_is_reported_not_fatal(self):
+        def broken(query, page):
+            raise RuntimeError("Upstream service unavailable.")
+
+        self.release.set()
+        with patch.dict("backend.app._SEARCH_SOURCES", {"tv": broken}):
+            response = self.client.get("/api/search?query=x&stream=1")
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertIn({"source": "tv", "results": [], "error": "unavailable"}, events)
+        self.assertEqual(len([e for e in events if e.get("results")]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
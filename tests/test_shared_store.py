@@ -0,0 +1,98 @@
+import socket
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+from backend import shared_store, tmdb
+from backend.cache import CacheEntry, MemoryLRU, TieredCache
+from benchmarks.fake_redis import FakeRedis
+
+
+def _entry(body: bytes = b'{"id": 1}') -> CacheEntry:
+    now = time.time()
+    return CacheEntry(body, 200, now + 60, now + 120)
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class SharedStoreIntegrationTests(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedis().start()
+        self.addCleanup(self.server.stop)
+
+    def _store(self) -> shared_store.RedisStore:
+        return shared_store.RedisStore.from_url(self.server.url, "watchnext:test:")
+
+    def test_entries_written_by_one_instance_are_read_by_another(self):
+        entry = _entry()
+        self._store().set("/movie/1?", entry)
+
+        cold = TieredCache(MemoryLRU(8), self._store())
+        self.assertEqual(cold.get("/movie/1?"), entry)
+        self.assertEqual(cold.stats()["second_tier_hits"], 1)
+        # Promoted: the next read does not touch the store
+        before = self.server.snapshot()["GET"]
+        cold.get("/movie/1?")
+        self.assertEqual(self.server.snapshot()["GET"], before)
+
+    def test_warm_reads_a_batch_in_one_round_trip(self):
+        writer = self._store()
+        for i in range(5):
+            writer.set(tmdb.cache_key(f"/movie/{i}", {"append_to_response": "credits"}), _entry())
+
+        with patch("backend.tmdb.cache", TieredCache(MemoryLRU(16), self._store())):
+            warmed = tmdb.warm([(f"/movie/{i}", {"append_to_response": "credits"}) for i in range(8)])
+
+        self.assertEqual(warmed, 5)
+        self.assertEqual(self.server.snapshot()["MGET"], 1)
+        self.assertEqual(self.server.snapshot()["GET"], 0)
+
+    def test_unreachable_store_degrades_to_memory_only(self):
+        with patch.dict("os.environ", {"REDIS_RETRY_SECONDS": "60"}):
+            store = shared_store.RedisStore.from_url(f"redis://127.0.0.1:{_closed_port()}/0", "watchnext:test:")
+        cache = TieredCache(MemoryLRU(8), store)
+
+        cache.set("k", _entry())
+        self.assertIsNotNone(cache.get("k"))
+        self.assertIsNone(cache.get_many(["missing"]).get("missing"))
+        stats = store.stats()
+        self.assertEqual(stats["errors"], 1)
+        self.assertGreaterEqual(stats["skipped"], 1)
+        self.assertFalse(stats["up"])
+
+    def test_limiter_uses_the_shared_store_when_configured(self):
+        with patch("backend.shared_store.REDIS_URL", self.server.url), patch.dict("os.environ", {}, clear=False):
+            self.assertEqual(shared_store.limiter_storage_uri(), self.server.url)
+        with patch("backend.shared_store.REDIS_URL", None), \
+                patch.dict("os.environ", {"RATELIMIT_STORAGE_URI": ""}):
+            self.assertEqual(shared_store.limiter_storage_uri(), "memory://")
+
+    def test_rate_limit_is_shared_between_instances(self):
+        def instance():
+            # Configured like backend.app's limiter, one per simulated server instance
+            app = Flask(__name__)
+            with patch("backend.shared_store.REDIS_URL", self.server.url), \
+                    patch.dict("os.environ", {"RATELIMIT_STORAGE_URI": ""}):
+                Limiter(get_remote_address, app=app, default_limits=["2 per minute"],
+                        storage_uri=shared_store.limiter_storage_uri(), in_memory_fallback_enabled=True)
+            app.add_url_rule("/ping", "ping", lambda: "pong")
+            return app.test_client()
+
+        first, second = instance(), instance()
+        statuses = [first.get("/ping").status_code, second.get("/ping").status_code,
+                    second.get("/ping").status_code, first.get("/ping").status_code]
+
+        self.assertEqual(statuses, [200, 200, 429, 429])
+        self.assertGreaterEqual(self.server.snapshot()["EVALSHA"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend import recommender, similarity_index
+from backend.similarity_index import IndexBuilder, SimilarityIndex
+
+
+def _card(iid, **extra):
+    return {"id": iid, "title": f"T{iid}", "vote_average": 7.0, "vote_count": 800, **extra}
+
+
+class SimilarityIndexTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name)
+
+        builder = IndexBuilder()
+        builder.add_tmdb(
+            "movie", 1,
+            {"recommendations": [_card(2), _card(3)], "similar": [_card(4)]},
+            seed=_card(1, genre_ids=[28]),
+        )
+        builder.add_cooccurrence([
+            {"user_id": "a", "media_id": 1, "media_type": "movie"},
+            {"user_id": "a", "media_id": 4, "media_type": "movie"},
+        ])
+        self.summary = builder.write(self.path)
+        self.index = SimilarityIndex(self.path)
+
+    def test_neighbours_are_ranked_by_combined_weight(self):
+        neighbours = self.index.neighbours("movie", 1)
+
+        # 4 gets a similar edge plus watched co-occurrence, beating plain recs
+        self.assertEqual([n["id"] for n in neighbours], [4, 2, 3])
+        self.assertTrue(all(n["media_type"] == "movie" for n in neighbours))
+        self.assertEqual(self.summary["movie"]["rows"], 2)
+
+    def test_unknown_item_is_a_miss(self):
+        self.assertIsNone(self.index.neighbours("movie", 999))
+        self.assertIsNone(self.index.neighbours("tv", 1))
+        self.assertEqual(self.index.stats()["misses"], 2)
+
+    def test_recommenders_answer_from_the_index_without_tmdb(self):
+        with patch("backend.recommender.similarity_index.index", self.index):
+            with patch("backend.recommender._tmdb") as mock_tmdb:
+                content = recommender.recommend_content_based("movie", 1, "k")
+                with patch("backend.recommender.get_user_history", return_value=[
+                    {"media_id": 1, "media_type": "movie", "rating": 5, "title": "A"},
+                ]):
+                    personal = recommender.recommend_for_user(
+                        "00000000-0000-4000-8000-000000000001", "movie", "k", "u", "s",
+                    )
+
+        mock_tmdb.assert_not_called()
+        self.assertEqual({r["id"] for r in content}, {2, 3, 4})
+        self.assertEqual({r["id"] for r in personal}, {2, 3, 4})
+
+
+class ObservationLogTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name)
+
+    def _append(self, media_id):
+        entry = {"t": "movie", "id": media_id, "seed": _card(media_id), "recommendations": [_card(99)], "similar": []}
+        with open(self.path / similarity_index.OBSERVATION_LOG, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    def test_lines_appended_during_a_build_survive_compaction(self):
+        self._append(1)
+        self._append(1)
+        write = IndexBuilder.write
+
+        def write_while_appending(builder, path):
+            self._append(2)  # the web app records a payload mid-build
+            return write(builder, path)
+
+        with patch.object(IndexBuilder, "write", write_while_appending):
+            similarity_index.build(self.path, include_watched=False)
+
+        self.assertEqual(set(similarity_index.load_observations(self.path)), {("movie", 1), ("movie", 2)})
+        base = (self.path / similarity_index.OBSERVATION_BASE).read_text().splitlines()
+        self.assertEqual(len(base), 1)  # two lines for id 1 compacted to one
+        self.assertEqual(list(self.path.glob("*.rotated")), [])
+
+        summary = similarity_index.build(self.path, include_watched=False)
+        self.assertEqual(summary["movie"]["rows"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
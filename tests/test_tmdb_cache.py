@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from backend import tmdb
+from backend.cache import CacheEntry, MemoryLRU, SQLiteStore, TieredCache
+
+
+class _FakeResponse:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json;charset=utf-8"}
+        self.content = json.dumps(payload or {}).encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+
+class TmdbCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = TieredCache(MemoryLRU(8))
+        patcher = patch("backend.tmdb.cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeat_fetch_is_served_from_memory(self):
+        with patch("backend.tmdb.upstream.get", return_value=_FakeResponse(payload={"genres": [1]})) as mock_get:
+            first = tmdb.fetch("/genre/movie/list", "key")
+            first["genres"].append(2)  # callers may mutate their copy
+            second = tmdb.fetch("/genre/movie/list", "key")
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(second, {"genres": [1]})
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_not_found_is_negatively_cached(self):
+        with patch("backend.tmdb.upstream.get", return_value=_FakeResponse(status_code=404)) as mock_get:
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.HTTPError):
+                    tmdb.fetch("/movie/999999", "key")
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(self.cache.stats()["negative_hits"], 1)
+
+    def test_stale_entry_is_served_while_revalidating(self):
+        key = tmdb.cache_key("/trending/movie/week", {"page": 1})
+        now = time.time()
+        self.cache.set(key, CacheEntry(b'{"results": ["old"]}', 200, now - 1, now + 60))
+
+        with patch("backend.tmdb._schedule_refresh") as mock_refresh:
+            data = tmdb.fetch("/trending/movie/week", "key", page=1)
+
+        self.assertEqual(data, {"results": ["old"]})
+        mock_refresh.assert_called_once()
+        self.assertEqual(self.cache.stats()["stale_hits"], 1)
+
+    def test_lru_evicts_oldest_and_counts_it(self):
+        lru = MemoryLRU(2)
+        for key in ("a", "b", "c"):
+            lru.set(key, CacheEntry(b"{}", 200, 0, 0))
+
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(lru.evictions, 1)
+
+    def test_sqlite_tier_survives_a_new_memory_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            entry = CacheEntry(b'{"id": 1}', 200, time.time() + 60, time.time() + 120)
+            TieredCache(MemoryLRU(4), SQLiteStore(path)).set("k", entry)
+
+            restarted = TieredCache(MemoryLRU(4), SQLiteStore(path))
+            self.assertEqual(restarted.get("k").value, b'{"id": 1}')
+            self.assertEqual(restarted.stats()["second_tier_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
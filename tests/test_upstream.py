@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.singleflight import Group
+from backend.upstream import UpstreamClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.path.startswith("/slow"):
+            time.sleep(0.2)
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UpstreamClientTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_sequential_calls_reuse_one_connection(self):
+        client = UpstreamClient(pool_maxsize=4)
+        for i in range(5):
+            response = client.get(f"{self.base}/item/{i}")
+            self.assertEqual(response.json()["path"], f"/item/{i}")
+
+        host_stats = client.stats()[f"127.0.0.1:{self.server.server_port}"]
+        self.assertEqual(host_stats["requests"], 5)
+        self.assertEqual(host_stats["connections_opened"], 1)
+        client.close()
+
+    def test_connection_errors_are_counted(self):
+        client = UpstreamClient(connect_timeout=0.5, read_timeout=0.5)
+        with self.assertRaises(Exception):
+            client.get("http://127.0.0.1:9/unreachable")
+
+        self.assertEqual(client.stats()["127.0.0.1:9"]["errors"], 1)
+        client.close()
+
+    def test_concurrent_identical_gets_share_one_request(self):
+        client = UpstreamClient()
+        start = threading.Barrier(5)
+        bodies = []
+
+        def worker():
+            start.wait()
+            bodies.append(client.get(f"{self.base}/slow", params={"b": 2, "a": 1}).json())
+
+        _Handler.hits = 0
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(_Handler.hits, 1)
+        self.assertEqual(len(bodies), 5)
+        self.assertEqual(client.flights.stats()["collapsed"], 4)
+        client.close()
+
+
+class SingleflightTests(unittest.TestCase):
+    def test_follower_stops_waiting_for_a_hung_leader(self):
+        group = Group()
+        release = threading.Event()
+        entered = threading.Event()
+
+        def hang():
+            entered.set()
+            release.wait(5)
+            return "leader"
+
+        leader = threading.Thread(target=group.do, args=("k", hang))
+        leader.start()
+        entered.wait(1)
+        started = time.perf_counter()
+        result = group.do("k", lambda: "own", wait=0.05)
+        elapsed = time.perf_counter() - started
+        release.set()
+        leader.join()
+
+        self.assertEqual(result, "own")
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(group.stats()["wait_timeouts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
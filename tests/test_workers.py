@@ -0,0 +1,66 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from backend import metrics, workers
+from backend.app import app
+
+
+class WorkerPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = workers.WorkerPool(max_workers=2, max_queue=1, quotas={"search": 2})
+        self.release = threading.Event()
+        self.addCleanup(self.pool.shutdown)
+        self.addCleanup(self.release.set)
+
+    def _block(self):
+        self.release.wait(5)
+        return "done"
+
+    def test_route_quota_rejects_without_blocking(self):
+        self.pool.submit_all("search", self._block, [(), ()])
+
+        with self.assertRaises(workers.Saturated) as ctx:
+            self.pool.submit("search", self._block)
+
+        self.assertEqual(ctx.exception.reason, "route quota")
+        self.assertEqual(self.pool.stats()["search"]["rejected"], 1)
+
+    def test_queue_depth_caps_all_routes(self):
+        self.pool.submit_all("other", self._block, [(), (), ()])
+
+        with self.assertRaises(workers.Saturated) as ctx:
+            self.pool.submit("detail", self._block)
+        self.assertEqual(ctx.exception.reason, "queue full")
+
+    def test_fan_out_is_admitted_whole_or_not_at_all(self):
+        self.pool.submit("search", self._block)
+
+        with self.assertRaises(workers.Saturated):
+            self.pool.submit_all("search", self._block, [(), ()])
+        self.assertEqual(self.pool.stats()["search"]["submitted"], 1)
+
+    def test_slots_are_released_and_context_is_carried(self):
+        timings = metrics.begin_request()
+        future = self.pool.submit("search", metrics.add_request_time, "tmdb", 0.01)
+        metrics.end_request()
+        future.result(timeout=5)
+
+        self.assertIn("tmdb;dur=10.0", timings.server_timing())
+        stats = self.pool.stats()["search"]
+        self.assertEqual((stats["queued"], stats["running"], stats["completed"]), (0, 0, 1))
+        self.assertEqual(self.pool.pool_stats()["outstanding"], 0)
+
+    def test_saturation_becomes_503_with_retry_after(self):
+        def saturated(*args, **kwargs):
+            raise workers.Saturated("search", "queue full")
+
+        with patch("backend.app.TMDB_API_KEY", "k"), patch("backend.workers.submit_all", saturated):
+            response = app.test_client().get("/api/search?query=x")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+
+if __name__ == "__main__":
+    unittest.main()